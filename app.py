@@ -1,23 +1,45 @@
-from flask import Flask, abort, jsonify
+import hmac
+import math
+import threading
+import time
 
-from sp_soccer_lib import create_team_df_dict
-from sp_soccer_lib.championships import load_england, load_greece, load_italy, team_stats
+import pandas as pd
+from flask import Flask, Response, abort, jsonify, request
+
+import config as cfg
+from sp_soccer_lib import (
+    FTR_CATEGORIES,
+    FrameCache,
+    LazyTeamFrames,
+    categorize,
+    create_team_df_dict,
+)
+from sp_soccer_lib.alerts import AlertBroker, sse_stream
+from sp_soccer_lib.championships import load_country, team_stats
+from sp_soccer_lib.leagues import LEAGUES
+from sp_soccer_lib.streak_index import StreakIndex
 
 app = Flask(__name__)
 
 app.debug = True
 
+# Warm per-country streak indexes, built on first request
+STREAK_INDEXES = {}
+# country -> (monotonic load time, matches); reloaded after cfg.API_DATA_TTL seconds
+COUNTRY_FRAMES = {}
+# Per-country lazy team frames; only requested teams are built, LRU across countries
+TEAM_FRAMES = {}
+# country -> matches received by POST /ingest that the loaded data does not have yet
+INGESTED = {}
+FRAME_CACHE = FrameCache(cfg.TEAM_FRAME_CACHE)
+ALERTS = AlertBroker()
+_DATA_LOCK = threading.Lock()
+
 
 def bootstrap_country(country):
-    if country == "greece":
-        df = load_greece()
-    elif country == "england":
-        df = load_england()
-    elif country == "italy":
-        df = load_italy()
-    else:
+    if country not in LEAGUES:
         abort(400)
-    return df
+    return load_country(country)
 
 
 @app.route("/")
@@ -33,10 +55,65 @@ def ep_team_stats(country):
     return jsonify(stats.to_dict(orient="index"))
 
 
+def set_country_frame(country, df, loaded_at=None):
+    """Serve df for the country from now on (team frames are rebuilt on demand)."""
+    COUNTRY_FRAMES[country] = (time.monotonic() if loaded_at is None else loaded_at, df)
+    TEAM_FRAMES[country] = LazyTeamFrames(df, cache=FRAME_CACHE)
+
+
+def missing_matches(df, matches):
+    """The matches df does not have yet (same date and teams)."""
+    known = pd.MultiIndex.from_arrays(
+        [df.index, df["HomeTeam"].astype(str), df["AwayTeam"].astype(str)]
+    )
+    new = pd.MultiIndex.from_arrays([matches.index, matches["HomeTeam"], matches["AwayTeam"]])
+    return matches[~new.isin(known)]
+
+
+def with_matches(df, matches):
+    """df plus the matches it does not have yet (same date and teams), in date order."""
+    if matches is None or not len(matches):
+        return df
+    matches = missing_matches(df, matches)
+    if not len(matches):
+        return df
+    plain = df.astype(dict.fromkeys(("HomeTeam", "AwayTeam", "FTR", "period"), object))
+    return categorize(pd.concat([plain, matches]).sort_index(kind="stable"))
+
+
+def country_frame(country):
+    """The country's matches, reloaded once they are older than cfg.API_DATA_TTL."""
+    with _DATA_LOCK:
+        loaded = COUNTRY_FRAMES.get(country)
+        if loaded is None or time.monotonic() - loaded[0] >= cfg.API_DATA_TTL:
+            refresh_country(country)
+        return COUNTRY_FRAMES[country][1]
+
+
+def refresh_country(country):
+    """Reload the country; its streak index (if built) applies only the matches it has not seen."""
+    df = bootstrap_country(country)
+    if country in INGESTED:
+        # Forget the ingested matches the reloaded data has caught up with
+        pending = missing_matches(df, INGESTED[country])
+        if len(pending):
+            INGESTED[country] = pending
+            df = with_matches(df, pending)
+        else:
+            del INGESTED[country]
+    set_country_frame(country, df)
+    index = STREAK_INDEXES.get(country)
+    return index.ingest_frame(df) if index is not None else []
+
+
+def get_team_frames(country):
+    country_frame(country)
+    return TEAM_FRAMES[country]
+
+
 @app.route("/team/<country>/<team>")
 def ep_team(country, team):
-    df = bootstrap_country(country)
-    teams = create_team_df_dict(df)
+    teams = get_team_frames(country)
     try:
         team_df = teams[team].reset_index()
     except KeyError:
@@ -44,5 +121,108 @@ def ep_team(country, team):
     return jsonify({team: team_df.to_dict(orient="records")})
 
 
+def get_streak_index(country):
+    """The country's streak index, brought up to date with each reload (cfg.API_DATA_TTL)."""
+    df = country_frame(country)
+    with _DATA_LOCK:
+        if country not in STREAK_INDEXES:
+            index = StreakIndex.from_dataframe(df)
+            index.add_listener(ALERTS.listener(country))
+            STREAK_INDEXES[country] = index
+        return STREAK_INDEXES[country]
+
+
+@app.route("/streaks/<country>")
+def ep_streaks(country):
+    return jsonify(get_streak_index(country).league())
+
+
+@app.route("/streaks/<country>/<team>")
+def ep_team_streak(country, team):
+    index = get_streak_index(country)
+    try:
+        record = index.team(team)
+    except KeyError:
+        abort(400)
+    return jsonify({team: record})
+
+
+@app.route("/alerts/<country>/<team>")
+def ep_alerts(country, team):
+    """Server-sent events stream: ?threshold=<value>&field=<CurrentNoDraw|c_prob_adj>"""
+    if team not in get_streak_index(country):
+        abort(400)
+    try:
+        sub = ALERTS.subscribe(
+            country,
+            team,
+            request.args.get("threshold", type=float, default=cfg.NEXT_MATCHES),
+            request.args.get("field", "CurrentNoDraw"),
+        )
+    except ValueError:
+        abort(400)
+    return Response(sse_stream(ALERTS, sub), mimetype="text/event-stream")
+
+
+def ingest_rows(payload):
+    """### /ingest body as a match frame (Date index, cfg.FIELDS and period)
+
+    Returns:
+
+        (DataFrame): the matches, or None if the body or any row is invalid
+    """
+    if not isinstance(payload, list):
+        return None
+    records = []
+    for match in payload:
+        if not isinstance(match, dict):
+            return None
+        try:
+            date = pd.Timestamp(match["Date"])
+            home, away, ftr = match["HomeTeam"], match["AwayTeam"], match["FTR"]
+            b365d = float(match.get("B365D") or "nan")
+            goals = [
+                float(match[c]) if match.get(c) is not None else math.nan for c in ("FTHG", "FTAG")
+            ]
+            period = str(match.get("period", cfg.CURRENT_PERIOD))
+        except (KeyError, TypeError, ValueError):
+            return None
+        teams = (home, away)
+        teams_valid = all(isinstance(team, str) and team for team in teams) and home != away
+        if pd.isna(date) or not teams_valid or ftr not in FTR_CATEGORIES:
+            return None
+        records.append((date, home, away, ftr, *goals, b365d, period))
+    columns = ["Date", "HomeTeam", "AwayTeam", "FTR", "FTHG", "FTAG", "B365D", "period"]
+    frame = pd.DataFrame(records, columns=columns).set_index("Date")
+    return frame[cfg.FIELDS + ["period"]]
+
+
+@app.route("/ingest/<country>", methods=["POST"])
+def ep_ingest(country):
+    """Apply new match rows (list of Date/HomeTeam/AwayTeam/FTR/B365D/period).
+
+    Needs cfg.INGEST_TOKEN in the X-Ingest-Token header (403 otherwise); a body
+    with an invalid row is rejected as a whole (400). /team serves the new
+    matches too.
+    """
+    token = request.headers.get("X-Ingest-Token", "")
+    if not cfg.INGEST_TOKEN or not hmac.compare_digest(token.encode(), cfg.INGEST_TOKEN.encode()):
+        abort(403)
+    matches = ingest_rows(request.get_json(silent=True))
+    if matches is None:
+        abort(400)
+    index = get_streak_index(country)
+    changed = []
+    with _DATA_LOCK:
+        for row in matches.itertuples():
+            changed += index.ingest(
+                row.Index, row.HomeTeam, row.AwayTeam, row.FTR, row.B365D, row.period
+            )
+        INGESTED[country] = with_matches(INGESTED.get(country, matches.iloc[:0]), matches)
+        loaded_at, df = COUNTRY_FRAMES[country]
+        set_country_frame(country, with_matches(df, matches), loaded_at)
+    return jsonify({"changed": list(dict.fromkeys(changed))})
+
+
 if __name__ == "__main__":
     app.run()
@@ -1,13 +1,25 @@
+import os
+
 PERIODS = ["1718", "1819", "1920", "2021", "2122", "2223", "2324", "2425", "2526"]
-COUNTRIES = {
-    "Greece": "G1",
-    "England": "E0",
-    "Italy": "I1",
-    "Spain": "SP1",
-    "Germany": "D1",
-    "France": "F1",
-}
+# Leagues the daily update renders and publishes, in page order; any key of
+# sp_soccer_lib.leagues.LEAGUES (file codes, date formats, name corrections)
+LEAGUES = ["greece", "italy", "england", "spain", "germany", "france"]
 FIELDS = ["HomeTeam", "AwayTeam", "FTR", "FTHG", "FTAG", "B365D"]
 CURRENT_PERIOD = "2526"
 
 NEXT_MATCHES = 5
+# Bet spans of the country page's ruin table (see sp_soccer_lib.runs.ruin_table)
+RUIN_SPANS = [3, 4, 5, 6, 8, 10]
+
+# Team frames the API keeps built, shared by all leagues (LRU, see LazyTeamFrames)
+TEAM_FRAME_CACHE = 128
+# Seconds the API serves a league's loaded matches before loading them again
+API_DATA_TTL = 15 * 60
+# Shared secret POST /ingest requires in its X-Ingest-Token header; unset disables it
+INGEST_TOKEN = os.environ.get("SOCCER_INGEST_TOKEN")
+
+# League -> Elo ratings carried from one daily update to the next (see sp_soccer_lib.elo)
+ELO_STATE_FILE = "elo_ratings.json"
+
+# Handout charts: "matplotlib" (PNG figures) or "svg" (inline, no files written)
+CHART_BACKEND = "matplotlib"
@@ -16,6 +16,7 @@ Note: This strategy is still mathematically flawed because c_prob_adj doesn't
 simulation empirically validates that insight.
 """
 
+import functools
 import math
 from dataclasses import dataclass, field
 
@@ -23,9 +24,13 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
+import config as cfg
 from sp_soccer_lib import create_team_df_dict
-from sp_soccer_lib.championships import load_country
+from sp_soccer_lib.draw_rates import DEFAULT_PRIOR, posterior_mean, priors_by_period
+from sp_soccer_lib.elo import with_ratings
+from sp_soccer_lib.leagues import iter_leagues
 from sp_soccer_lib.probabilities import cumulative_binomial_probabilities
+from sp_soccer_lib.simulation import period_matches
 
 
 @dataclass
@@ -37,6 +42,11 @@ class SimulationConfig:
     bet_progression: list = field(default_factory=lambda: [2, 4, 6, 9, 13])
     min_matches_for_pdraw: int = 3  # Minimum matches before calculating p_draw
     fixed_odds: float = 3.5  # Fallback odds if B365D is missing
+    # Also require the match's Elo draw probability (sp_soccer_lib.elo) to reach this
+    elo_draw_threshold: float | None = None
+    # Use the Beta posterior draw rate (sp_soccer_lib.draw_rates) instead of the raw
+    # rolling ratio; the prior comes from the league's earlier periods
+    posterior_draw_rate: bool = False
 
 
 @dataclass
@@ -96,6 +106,7 @@ def calc_rolling_pdraw(team_df: pd.DataFrame, match_index: int, period: str) ->
     return draws / total
 
 
+@functools.lru_cache(maxsize=4096)  # p_draw is a ratio of small counts, so it repeats
 def calc_cprob_adj(p_draw: float | None, window: int = 5) -> float | None:
     """Calculate probability of at least 1 draw in next N matches.
 
@@ -132,7 +143,12 @@ class CProbAdjSimulation:
         return odds
 
     def run_team_period(
-        self, team: str, team_df: pd.DataFrame, period: str, country: str
+        self,
+        team: str,
+        team_df: pd.DataFrame,
+        period: str,
+        country: str,
+        prior: tuple | None = None,
     ) -> SimulationResult:
         """Run simulation for a single team in a single period.
 
@@ -141,6 +157,8 @@ class CProbAdjSimulation:
             team_df: DataFrame with team's matches
             period: Period to simulate (e.g., "2324")
             country: Country name (for result tracking)
+            prior: (alpha, beta) of the posterior draw rate when
+                config.posterior_draw_rate is set (default draw_rates.DEFAULT_PRIOR)
 
         Returns:
             SimulationResult with betting outcomes
@@ -148,28 +166,39 @@ class CProbAdjSimulation:
         result = SimulationResult(country=country, team=team, period=period)
         state = BettingState()
 
-        # Filter to period matches
-        period_mask = team_df["period"] == period
-        period_indices = team_df.index[period_mask].tolist()
-
-        if not period_indices:
+        positions, draw_flags, match_odds, played_before, draws_before = period_matches(
+            team_df, period
+        )
+        if not len(positions):
             return result
-
-        for iloc_pos, (match_date, match) in enumerate(team_df.iterrows()):
-            if match["period"] != period:
-                continue
-
-            # Calculate current p_draw and c_prob_adj
-            full_iloc = team_df.index.get_loc(match_date)
-            p_draw = calc_rolling_pdraw(team_df, full_iloc, period)
+        if self.config.elo_draw_threshold is None:
+            elo_draws = [None] * len(positions)
+        else:  # elo_p_draw column added by run_full_simulation (elo.with_ratings)
+            elo_draws = team_df["elo_p_draw"].to_numpy()[positions].tolist()
+        if self.config.posterior_draw_rate:
+            rates = posterior_mean(draws_before, played_before, prior or DEFAULT_PRIOR).tolist()
+        else:  # rolling p_draw as calc_rolling_pdraw()
+            rates = [
+                drawn / played if played else None
+                for played, drawn in zip(played_before, draws_before, strict=True)
+            ]
+        # Same warm-up either way: no p_draw (so no trigger) before min_matches_for_pdraw
+        p_draws = [
+            rate if played >= self.config.min_matches_for_pdraw else None
+            for played, rate in zip(played_before, rates, strict=True)
+        ]
+
+        for iloc_pos, is_draw, odds, p_draw, elo_draw in zip(
+            positions, draw_flags, match_odds, p_draws, elo_draws, strict=True
+        ):
             c_prob_adj = calc_cprob_adj(p_draw, self.config.bet_window)
-
-            is_draw = match["FTR"] == "D"
-            odds = self.get_odds(match)
+            if math.isnan(odds):
+                odds = self.config.fixed_odds
 
             if self.verbose:
+                match = team_df.iloc[iloc_pos]
                 logger.debug(
-                    f"[{match_date.date()}] {match['HomeTeam']} vs {match['AwayTeam']} | "
+                    f"[{team_df.index[iloc_pos].date()}] {match['HomeTeam']} vs {match['AwayTeam']} | "
                     f"p_draw={p_draw:.3f if p_draw else 'N/A'} | "
                     f"c_prob_adj={c_prob_adj:.3f if c_prob_adj else 'N/A'} | "
                     f"result={match['result']}"
@@ -177,7 +206,8 @@ class CProbAdjSimulation:
 
             # Check if we should start betting
             if not state.is_betting and c_prob_adj is not None:
-                if c_prob_adj >= self.config.threshold:
+                elo_agrees = elo_draw is None or elo_draw >= self.config.elo_draw_threshold
+                if c_prob_adj >= self.config.threshold and elo_agrees:
                     state.is_betting = True
                     state.bets_remaining = self.config.bet_window
                     state.current_bet_index = 0
@@ -247,14 +277,20 @@ def run_full_simulation(
     simulation = CProbAdjSimulation(config, verbose=verbose)
     all_results = []
 
-    for country in countries:
-        logger.info(f"Loading {country}...")
-        df = load_country(country)
+    # The next leagues download while this one is simulated
+    for country, loading in iter_leagues(countries):
+        logger.info(f"Simulating {country}...")
+        df = loading.result()
+        if config.elo_draw_threshold is not None:
+            df = with_ratings(df)
         team_dfs = create_team_df_dict(df)
+        priors = priors_by_period(df) if config.posterior_draw_rate else {}
 
         for team, team_df in team_dfs.items():
             for period in periods:
-                result = simulation.run_team_period(team, team_df, period, country)
+                result = simulation.run_team_period(
+                    team, team_df, period, country, priors.get(period)
+                )
                 if result.bet_count > 0:  # Only include if bets were made
                     all_results.append(
                         {
@@ -331,7 +367,7 @@ if __name__ == "__main__":
         bet_progression=[2, 4, 6, 9, 13],
     )
 
-    countries = ["greece", "england", "italy", "spain", "germany", "france"]
+    countries = list(cfg.LEAGUES)
     periods = ["1920", "2021", "2122", "2223", "2324"]
 
     # Run simulation
@@ -0,0 +1,209 @@
+"""File change watchers for ftp_transfer.monitor_and_ftp.
+
+``InotifyWatcher`` uses the Linux inotify API through ctypes (no extra
+dependency); ``PollingWatcher`` is the portable fallback and rescans with
+``os.scandir``. Both key files by path and report sets of changed and removed
+paths, so adding or removing files never shifts what counts as modified.
+``batches()`` debounces bursts (such as a full ``update_local_handout`` run)
+into one batch per quiet period.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def scan_tree(root, walk=True, accept=None) -> dict:
+    """### {path: (mtime_ns, size)} for all files under root, using os.scandir."""
+    snapshot = {}
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if walk and (accept is None or accept(entry.path, is_dir=True)):
+                    pending.append(entry.path)
+            elif accept is None or accept(entry.path, is_dir=False):
+                stat = entry.stat()
+                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+class PollingWatcher:
+    """Rescans the tree on every poll and diffs the snapshots by path."""
+
+    def __init__(self, root, walk=True, accept=None, interval=1.0):
+        self.root = os.path.abspath(root)
+        self.walk = walk
+        self.accept = accept
+        self.interval = interval
+        self._snapshot = scan_tree(self.root, walk, accept)
+
+    def poll(self, timeout=None) -> tuple:
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = scan_tree(self.root, self.walk, self.accept)
+        changed = {path for path, meta in snapshot.items() if self._snapshot.get(path) != meta}
+        removed = set(self._snapshot) - set(snapshot)
+        self._snapshot = snapshot
+        return changed, removed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """inotify watches on every directory of the tree, added as directories appear."""
+
+    def __init__(self, root, walk=True, accept=None):
+        self.root = os.path.abspath(root)
+        self.walk = walk
+        self.accept = accept
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}  # watch descriptor -> directory
+        self._files = {}  # directory -> files known to be in it
+        self._add_tree(self.root)
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def _add_tree(self, directory) -> set:
+        """Watch directory (and subdirectories when walking); return the files already there."""
+        self._add_watch(directory)
+        found, files = set(), set()
+        for entry in os.scandir(directory):
+            if entry.is_dir(follow_symlinks=False):
+                if self.walk and self._accepts(entry.path, True):
+                    found |= self._add_tree(entry.path)
+            elif self._accepts(entry.path, False):
+                files.add(entry.path)
+        self._files[directory] = files
+        return found | files
+
+    def _drop_tree(self, directory) -> set:
+        """Stop watching directory and its subdirectories; return the files known there."""
+        prefix = directory + os.sep
+        files = set()
+        for wd, watched in list(self._dirs.items()):
+            if watched == directory or watched.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)  # fails harmlessly if already gone
+                del self._dirs[wd]
+                files |= self._files.pop(watched, set())
+        return files
+
+    def _accepts(self, path, is_dir):
+        return self.accept is None or self.accept(path, is_dir=is_dir)
+
+    def poll(self, timeout=None) -> tuple:
+        changed, removed = set(), set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed, removed
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed, removed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: report everything currently on disk
+                snapshot = scan_tree(self.root, self.walk, self.accept)
+                for path in snapshot:
+                    self._files.setdefault(os.path.dirname(path), set()).add(path)
+                changed |= set(snapshot)
+                continue
+            if mask & IN_IGNORED:
+                directory = self._dirs.pop(wd, None)
+                if directory is not None and directory not in self._dirs.values():
+                    self._files.pop(directory, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and self.walk and self._accepts(path, True):
+                    changed |= self._add_tree(path)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    # Deleted or moved out: its files are gone from the tree, and
+                    # its old watches would report later writes under this path
+                    gone = self._drop_tree(path)
+                    removed |= gone
+                    changed -= gone
+            elif not self._accepts(path, False):
+                continue
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE):
+                self._files.setdefault(directory, set()).add(path)
+                changed.add(path)
+                removed.discard(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._files.get(directory, set()).discard(path)
+                removed.add(path)
+                changed.discard(path)
+        return changed, removed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(root, walk=True, accept=None, interval=1.0):
+    """### inotify watcher on Linux, scandir polling everywhere else (or if inotify fails)."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, walk, accept)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, walk, accept, interval)
+
+
+def batches(watcher, debounce=0.5, max_wait=10.0, idle=30.0, on_idle=None):
+    """### Yield (changed, removed) path sets, one per burst of file activity.
+
+    A batch closes once no event arrives for ``debounce`` seconds or ``max_wait``
+    seconds after its first event. ``on_idle`` is called after ``idle`` seconds
+    without any activity (e.g. to keep an FTP session alive).
+    """
+    while True:
+        changed, removed = watcher.poll(idle)
+        if not changed and not removed:
+            if on_idle is not None:
+                on_idle()
+            continue
+        started = time.monotonic()
+        while time.monotonic() - started < max_wait:
+            more_changed, more_removed = watcher.poll(debounce)
+            if not more_changed and not more_removed:
+                break
+            changed = (changed - more_removed) | more_changed
+            removed = (removed - more_changed) | more_removed
+        yield changed, removed
@@ -18,31 +18,55 @@ walk = True/False
 ===========================
 '''
 import ftplib
+import hashlib
+import io
+import json
 import os
 import socket
+import tarfile
+import threading
 import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 
 from loguru import logger
 
+import file_watcher
+from sp_soccer_lib.instrumentation import count, timed
+
 __revision__ = 1.11
 
 SLEEP_SECONDS = 1
+MANIFEST_NAME = '.upload_manifest.json'
+BUNDLE_MANIFEST_NAME = '.bundle_manifest.json'
 
 
 class FtpAddOns:
+    # Shared by every instance (and every upload thread), guarded by PATH_LOCK
     PATH_CACHE = set()  # Use set for O(1) lookup instead of list O(N)
+    PATH_LOCK = threading.Lock()
 
     def __init__(self, ftp_h):
         self.ftp_h = ftp_h
 
+    def _cached(self, path):
+        with self.PATH_LOCK:
+            return path in self.PATH_CACHE
+
+    def _remember(self, path):
+        with self.PATH_LOCK:
+            self.PATH_CACHE.add(path)
+
     def ftp_exists(self, path):
         '''path exists check function for ftp handler'''
         exists = None
-        if path not in self.PATH_CACHE:
+        if not self._cached(path):
             try:
                 self.ftp_h.cwd(path)
                 exists = True
-                self.PATH_CACHE.add(path)  # Use add() for set
+                self._remember(path)
             except ftplib.error_perm as e:
                 if str(e.args).count('550'):
                     exists = False
@@ -63,11 +87,37 @@ class FtpAddOns:
                     try:
                         logger.info('Attempting to create directory (%s) ...' % (new_dir),
                                     self.ftp_h.mkd(new_dir))
+                        self._remember(new_dir)
                         logger.success('Done!')
                     except Exception as e:
                         logger.exception('ERROR -- %s' % (str(e.args)))
 
 
+def _ignore_rules(mode=''):
+    '''Return (ignore_dirs, ignore_files, ignore_file_ext) for the given mode'''
+    ignore_dirs = ['CVS', '.svn']
+    ignore_files = ['.project', '.pydevproject', '.render_manifest.json', MANIFEST_NAME]
+    ignore_file_ext = ['.pyc']
+    if mode == 'soccer_update':
+        ignore_file_ext.append('.css')
+        ignore_file_ext.append('.ico')
+        ignore_file_ext.append('.js')
+    return ignore_dirs, ignore_files, ignore_file_ext
+
+
+def _path_filter(mode=''):
+    '''accept(path, is_dir) callable applying the same ignore rules as _get_local_files'''
+    ignore_dirs, ignore_files, ignore_file_ext = _ignore_rules(mode)
+
+    def accept(path, is_dir=False):
+        name = os.path.basename(path)
+        if is_dir:
+            return name not in ignore_dirs
+        return name not in ignore_files and os.path.splitext(name)[-1].lower() not in ignore_file_ext
+
+    return accept
+
+
 def _get_local_files(local_dir, walk=False, mode=''):
     '''Retrieve local files list
     result_list == a list of dictionaries with path and mtime keys.
@@ -78,13 +128,7 @@ def _get_local_files(local_dir, walk=False, mode=''):
     '''
     result_list = []
 
-    ignore_dirs = ['CVS', '.svn']
-    ignore_files = ['.project', '.pydevproject']
-    ignore_file_ext = ['.pyc']
-    if mode == 'soccer_update':
-        ignore_file_ext.append('.css')
-        ignore_file_ext.append('.ico')
-        ignore_file_ext.append('.js')
+    ignore_dirs, ignore_files, ignore_file_ext = _ignore_rules(mode)
     logger.info('Mode: ' + mode)
     logger.info(ignore_file_ext)
     base_dir = os.path.abspath(local_dir)
@@ -109,63 +153,120 @@ def _get_local_files(local_dir, walk=False, mode=''):
     return result_list
 
 
+def _upload_batch(ftp_h, base_local_dir, base_remote_dir, rel_paths, rel_removed=()):
+    '''Send rel_paths (and delete rel_removed) over an open session, one cwd per directory'''
+    ftp_path_tools = FtpAddOns(ftp_h)
+    for rel_dir, filenames in sorted(_group_by_dir(rel_paths).items()):
+        remote_path = _remote_path(base_remote_dir, rel_dir)
+        if not ftp_path_tools.ftp_exists(remote_path):
+            ftp_path_tools.ftp_mkdirs(remote_path)
+        ftp_h.cwd(remote_path)
+        for filename in filenames:
+            rel_path = '/'.join([rel_dir, filename]) if rel_dir else filename
+            logger.info('Sending (%s) ...' % (rel_path))
+            try:
+                with open(os.path.join(base_local_dir, rel_path), 'rb') as f_h:
+                    ftp_h.storbinary('STOR %s' % (filename), f_h)
+                    count('files_uploaded')
+                    count('bytes_uploaded', f_h.tell())
+            except FileNotFoundError:
+                logger.warning('WARNING -- File no longer exists, (%s)!' % (rel_path))
+    for rel_path in rel_removed:
+        try:
+            ftp_h.delete(_remote_path(base_remote_dir, rel_path))
+        except ftplib.error_perm as e:
+            logger.warning('Could not delete (%s): %s' % (rel_path, str(e.args)))
+
+
 def monitor_and_ftp(server,
                     username,
                     password,
                     local_dir,
                     remote_dir,
                     encrypt=False,
-                    walk=False):
-    '''Monitor local files and when an update is found connect and upload'''
-    print('Monitoring changes in (%s).' % (os.path.abspath(local_dir)))
-    print('(Use ctrl-c to exit)')
-
-    last_files_list = _get_local_files(local_dir)
-
-    while True:
-        try:
-            time.sleep(SLEEP_SECONDS)
-
-            latest_files_list = _get_local_files(local_dir)
-
-            files_to_update = []
-
-            for idx in range(len(latest_files_list)):
-
-                if idx < len(last_files_list):
-                    # compare last modified times
-                    if latest_files_list[idx]['mtime'] > last_files_list[idx]['mtime']:
-                        files_to_update.append(latest_files_list[idx])
-
-                else:
-                    # add the file to the list (new file)
-                    files_to_update.append(latest_files_list[idx])
-
-            if files_to_update:
-                print
-                print('Detected NEW or CHANGED file(s), attempting to send ...')
-                print
-                is_success = upload_all(server,
-                                        username,
-                                        password,
-                                        local_dir,
-                                        remote_dir,
-                                        files_to_update,
-                                        encrypt,
-                                        walk)
-
-                if not is_success:
+                    walk=False,
+                    mode='',
+                    delete=False,
+                    debounce=0.5,
+                    keepalive=60.0,
+                    max_batches=None):
+    '''Monitor local files and when an update is found connect and upload
+
+    Changes come from file_watcher (inotify on Linux, a scandir polling
+    fallback elsewhere), keyed by path. Bursts of writes are debounced into one
+    batch, and batches share a single FTP session that is kept alive with NOOPs
+    while idle and reopened if it drops. A batch that still fails after a
+    reconnect is logged and sent again with the next one. Removed files are
+    deleted remotely only when delete is True. Returns False if the server
+    cannot be reached.
+    '''
+    base_local_dir = os.path.abspath(local_dir)
+    base_remote_dir = os.path.normpath(remote_dir).replace('\\', '/')
+    watcher = file_watcher.create_watcher(base_local_dir, walk, _path_filter(mode),
+                                          interval=SLEEP_SECONDS)
+    logger.info('Monitoring changes in (%s) with %s.' % (base_local_dir, type(watcher).__name__))
+    logger.info('(Use ctrl-c to exit)')
+    ftp_h = None
+    sent_batches = 0
+
+    def keep_alive():
+        nonlocal ftp_h
+        if ftp_h is not None:
+            try:
+                ftp_h.voidcmd('NOOP')
+            except (ftplib.Error, OSError, EOFError):
+                _quietly_close(ftp_h)
+                ftp_h = None
+
+    # Paths of a batch that could not be sent, carried into the next one
+    unsent, unsent_removed = set(), set()
+    try:
+        for changed, removed in file_watcher.batches(watcher, debounce, idle=keepalive,
+                                                     on_idle=keep_alive):
+            changed = {os.path.relpath(path, base_local_dir).replace('\\', '/')
+                       for path in changed}
+            removed = {os.path.relpath(path, base_local_dir).replace('\\', '/')
+                       for path in removed} if delete else set()
+            rel_paths = sorted((unsent - removed) | changed)
+            rel_removed = sorted((unsent_removed - changed) | removed)
+            logger.info('Detected %d NEW or CHANGED file(s), attempting to send ...' %
+                        (len(rel_paths)))
+            sent = False
+            for attempt in range(2):
+                if ftp_h is None:
+                    ftp_h = _connect(server, username, password)
+                    if ftp_h is None:
+                        return False
+                try:
+                    _upload_batch(ftp_h, base_local_dir, base_remote_dir, rel_paths, rel_removed)
+                    sent = True
                     break
-
-            else:
-                print('.',)
-
-            last_files_list = latest_files_list[:]  # copy the list to hold
-        except KeyboardInterrupt:
-            logger.warning('Exiting.')
-            break
-
-
+                except (ftplib.error_temp, ftplib.error_reply, OSError, EOFError) as e:
+                    logger.warning('Session lost (%s), reconnecting ...' % (e))
+                    _quietly_close(ftp_h)
+                    ftp_h = None
+            if not sent:
+                logger.error('Could not send %d file(s) / delete %d, retrying with the next batch'
+                             % (len(rel_paths), len(rel_removed)))
+                unsent, unsent_removed = set(rel_paths), set(rel_removed)
+                continue
+            unsent, unsent_removed = set(), set()
+            sent_batches += 1
+            if max_batches and sent_batches >= max_batches:
+                break
+    except KeyboardInterrupt:
+        logger.warning('Exiting.')
+    finally:
+        watcher.close()
+        if ftp_h is not None:
+            _quietly_close(ftp_h)
+        if unsent or unsent_removed:
+            logger.error('Exiting with %d file(s) not sent: %s' %
+                         (len(unsent | unsent_removed), sorted(unsent | unsent_removed)))
+    return True
+
+
+@timed('upload_all')
 def upload_all(server,
                username,
                password,
@@ -251,6 +352,8 @@ def upload_all(server,
                             try:
                                 with open(filepath, 'rb') as f_h:
                                     ftp_h.storbinary(send_cmd, f_h)
+                                count('files_uploaded')
+                                count('bytes_uploaded', os.path.getsize(filepath))
                                 logger.success('Done!')
                             except Exception as e:
                                 logger.exception(str(e.args))
@@ -266,6 +369,415 @@ def upload_all(server,
     return continue_on
 
 
+def _connect(server, username, password):
+    '''Connect and login, returning the ftp handler or None on failure'''
+    ftp_h = ftplib.FTP()
+    try:
+        ftp_h.connect(server)
+        ftp_h.login(username, password)
+        logger.success('Logged into (%s) as (%s)' % (server, username))
+        return ftp_h
+    except (socket.gaierror, OSError) as e:
+        logger.exception('ERROR -- Could not connect to (%s): %s' % (server, str(e.args)))
+    except ftplib.error_perm as e:
+        logger.exception('ERROR -- Check Username/Password: %s' % (str(e.args)))
+    return None
+
+
+def build_manifest(base_local_dir, local_files):
+    '''Manifest of local files: {relative path: {'size': bytes, 'md5': hex digest}}'''
+    base_local_dir = os.path.abspath(base_local_dir)
+    manifest = {}
+    for file_info in local_files:
+        filepath = file_info['path']
+        with open(filepath, 'rb') as f_h:
+            content = f_h.read()
+        rel_path = os.path.relpath(filepath, base_local_dir).replace('\\', '/')
+        manifest[rel_path] = {'size': len(content), 'md5': hashlib.md5(content).hexdigest()}
+    return manifest
+
+
+def diff_manifests(old, new):
+    '''Return (changed, removed) relative paths between two manifests'''
+    changed = sorted(path for path, entry in new.items() if old.get(path) != entry)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+
+def _group_by_dir(rel_paths):
+    '''Group relative paths as {relative dir: [file names]} so each dir is visited once'''
+    groups = {}
+    for rel_path in rel_paths:
+        rel_dir, filename = os.path.split(rel_path)
+        groups.setdefault(rel_dir, []).append(filename)
+    return groups
+
+
+def _remote_path(base_remote_dir, rel_path):
+    return (base_remote_dir.rstrip('/') + '/' + rel_path).rstrip('/') if rel_path else base_remote_dir
+
+
+def _read_local_manifest(base_local_dir):
+    try:
+        with open(os.path.join(base_local_dir, MANIFEST_NAME)) as f_h:
+            return json.load(f_h)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_remote_manifest(ftp_h, base_remote_dir):
+    buffer = io.BytesIO()
+    try:
+        ftp_h.retrbinary('RETR %s' % (_remote_path(base_remote_dir, MANIFEST_NAME)), buffer.write)
+        return json.loads(buffer.getvalue().decode())
+    except (ftplib.error_perm, ValueError):
+        return None
+    except ftplib.error_temp as e:
+        logger.warning('Could not read the remote manifest (%s), treating it as missing' % (e))
+        return None
+
+
+def build_bundle(base_local_dir, rel_paths, manifest):
+    '''tar.gz (bytes) of rel_paths plus BUNDLE_MANIFEST_NAME listing their size and md5'''
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar_h:
+        for rel_path in rel_paths:
+            tar_h.add(os.path.join(base_local_dir, rel_path), arcname=rel_path, recursive=False)
+        content = json.dumps({rel_path: manifest[rel_path] for rel_path in rel_paths}).encode()
+        info = tarfile.TarInfo(BUNDLE_MANIFEST_NAME)
+        info.size = len(content)
+        tar_h.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def extract_bundle(data, target_dir):
+    '''Reference implementation of the server-side extraction hook.
+
+    Unpacks a bundle made by build_bundle into target_dir, refusing members that
+    would land outside it (tarfile 'data' filter) and checking every file
+    against the embedded manifest. Returns the extracted relative paths.
+    '''
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar_h:
+        manifest = json.load(tar_h.extractfile(BUNDLE_MANIFEST_NAME))
+        members = [tar_h.getmember(rel_path) for rel_path in manifest]
+        for member in members:
+            content = tar_h.extractfile(member).read()
+            if hashlib.md5(content).hexdigest() != manifest[member.name]['md5']:
+                raise ValueError('Checksum mismatch for (%s)' % (member.name))
+        tar_h.extractall(target_dir, members=members, filter='data')
+    return sorted(manifest)
+
+
+def _bundle_upload(ftp_h, base_local_dir, base_remote_dir, rel_paths, manifest,
+                   extract_url, extract_token=None, timeout=60):
+    '''Send rel_paths as one archive and ask the extraction hook to unpack it.
+
+    The hook receives a POST with the archive name (relative to the remote
+    site root) and the token, and must answer with JSON {"extracted": <count>}.
+    The archive is deleted afterwards, extracted or not (the hook may delete it
+    too). Returns the archive size on success, None if the caller should fall back
+    to per-file upload.
+    '''
+    data = build_bundle(base_local_dir, rel_paths, manifest)
+    name = '.bundle-%s.tar.gz' % (hashlib.md5(data).hexdigest()[:12])
+    try:
+        ftp_h.storbinary('STOR %s' % (_remote_path(base_remote_dir, name)), io.BytesIO(data))
+    except ftplib.Error as e:
+        logger.warning('Could not upload bundle: %s' % (str(e.args)))
+        return None
+    params = urllib.parse.urlencode({'bundle': name, 'token': extract_token or ''}).encode()
+    try:
+        request = urllib.request.Request(extract_url, data=params)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            extracted = json.load(response).get('extracted')
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        logger.warning('Extraction hook failed: %s' % (e))
+        extracted = None
+    # The archive sits in the public site; remove it whether or not it was extracted
+    try:
+        ftp_h.delete(_remote_path(base_remote_dir, name))
+    except ftplib.error_perm:
+        pass  # the hook may have removed it already
+    except ftplib.Error as e:
+        logger.warning('Could not delete bundle (%s): %s' % (name, str(e.args)))
+    if extracted != len(rel_paths):
+        logger.warning('Extraction hook reported %s of %d files, falling back to per-file upload' %
+                       (extracted, len(rel_paths)))
+        return None
+    logger.success('Bundle (%s, %d bytes) extracted %d files' % (name, len(data), extracted))
+    return len(data)
+
+
+@timed('sync_all')
+def sync_all(server,
+             username,
+             password,
+             base_local_dir,
+             base_remote_dir,
+             walk=True,
+             mode='',
+             delete=False,
+             connections=1,
+             extract_url=None,
+             extract_token=None,
+             subdir=None):
+    '''Upload only files added or changed since the last sync.
+
+    The last uploaded state is a manifest of (path, size, md5) kept in
+    base_local_dir and mirrored next to the site on the server. The remote copy
+    wins, since CI runners start without the local one. Uploads are grouped by
+    remote directory (one existence check and cwd per directory); files removed
+    locally are deleted remotely only when delete is True. With connections > 1
+    the changed files are sent through pool_upload, after which the idle
+    control connection is checked with a NOOP and reopened if it timed out.
+    With extract_url the changed files go up as one tar.gz that the host
+    unpacks (see _bundle_upload), falling back to the per-file path if the
+    hook fails.
+    With subdir (relative to base_local_dir) only that part of the tree is
+    synced and the manifest entries of everything else are kept as they are.
+
+    Returns a report dict with files/bytes sent and round trips (FTP commands)
+    compared with a full per-file upload_all, or None when the login fails.
+    '''
+    base_local_dir = os.path.abspath(base_local_dir)
+    base_remote_dir = os.path.normpath(base_remote_dir).replace('\\', '/')
+    scan_dir = os.path.join(base_local_dir, subdir) if subdir else base_local_dir
+    new_manifest = build_manifest(base_local_dir, _get_local_files(scan_dir, walk, mode=mode))
+
+    ftp_h = _connect(server, username, password)
+    if ftp_h is None:
+        return None
+    ftp_path_tools = FtpAddOns(ftp_h)
+    round_trips = 1  # manifest RETR
+
+    old_manifest = _read_remote_manifest(ftp_h, base_remote_dir)
+    if old_manifest is None:
+        old_manifest = _read_local_manifest(base_local_dir) or {}
+    if subdir:
+        prefix = subdir.replace('\\', '/').strip('/') + '/'
+        changed, removed = diff_manifests(
+            {path: entry for path, entry in old_manifest.items() if path.startswith(prefix)},
+            new_manifest)
+    else:
+        changed, removed = diff_manifests(old_manifest, new_manifest)
+    synced = {path: entry for path, entry in old_manifest.items() if path not in changed}
+
+    bytes_sent = 0
+    uploaded = 0
+    if extract_url and changed:
+        bundle_size = _bundle_upload(ftp_h, base_local_dir, base_remote_dir, changed,
+                                     new_manifest, extract_url, extract_token)
+        round_trips += 1
+        if bundle_size is not None:
+            for rel_path in changed:
+                synced[rel_path] = new_manifest[rel_path]
+            bytes_sent += bundle_size
+            uploaded = len(changed)
+            count('bundles_uploaded')
+            count('files_uploaded', uploaded)
+            count('bytes_uploaded', bundle_size)
+            changed = []
+    if connections > 1 and changed:
+        pooled, _ = pool_upload(server, username, password, base_local_dir, base_remote_dir,
+                                changed, connections=connections)
+        for rel_path in pooled:
+            synced[rel_path] = new_manifest[rel_path]
+            bytes_sent += new_manifest[rel_path]['size']
+        uploaded = len(pooled)
+        round_trips += len(pooled) + 2 * len(_group_by_dir(changed))
+        changed = []
+        # The control connection sat idle through the pool and may have timed out
+        round_trips += 1
+        try:
+            ftp_h.voidcmd('NOOP')
+        except (ftplib.Error, OSError, EOFError) as e:
+            logger.warning('Control connection lost (%s), reconnecting ...' % (e))
+            _quietly_close(ftp_h)
+            ftp_h = _connect(server, username, password)
+            round_trips += 1
+    for rel_dir, filenames in sorted(_group_by_dir(changed).items()):
+        remote_path = _remote_path(base_remote_dir, rel_dir)
+        round_trips += 1 if remote_path in ftp_path_tools.PATH_CACHE else 2
+        if not ftp_path_tools.ftp_exists(remote_path):
+            ftp_path_tools.ftp_mkdirs(remote_path)
+        try:
+            ftp_h.cwd(remote_path)
+        except ftplib.error_perm as e:
+            logger.exception('ERROR -- %s' % (str(e.args)))
+            continue
+        for filename in filenames:
+            rel_path = '/'.join([rel_dir, filename]) if rel_dir else filename
+            logger.info('Sending (%s) ...' % (rel_path))
+            round_trips += 1
+            try:
+                with open(os.path.join(base_local_dir, rel_path), 'rb') as f_h:
+                    ftp_h.storbinary('STOR %s' % (filename), f_h)
+                synced[rel_path] = new_manifest[rel_path]
+                bytes_sent += new_manifest[rel_path]['size']
+                uploaded += 1
+                count('files_uploaded')
+                count('bytes_uploaded', new_manifest[rel_path]['size'])
+            except Exception as e:
+                logger.exception(str(e.args))
+
+    deleted = 0
+    if delete and ftp_h is not None:
+        for rel_dir, filenames in sorted(_group_by_dir(removed).items()):
+            for filename in filenames:
+                rel_path = '/'.join([rel_dir, filename]) if rel_dir else filename
+                round_trips += 1
+                try:
+                    ftp_h.delete(_remote_path(base_remote_dir, rel_path))
+                    synced.pop(rel_path, None)
+                    deleted += 1
+                except ftplib.error_perm as e:
+                    logger.warning('Could not delete (%s): %s' % (rel_path, str(e.args)))
+
+    content = json.dumps(synced, indent=1, sort_keys=True).encode()
+    with open(os.path.join(base_local_dir, MANIFEST_NAME), 'wb') as f_h:
+        f_h.write(content)
+    if ftp_h is not None:
+        ftp_h.storbinary('STOR %s' % (_remote_path(base_remote_dir, MANIFEST_NAME)),
+                         io.BytesIO(content))
+        round_trips += 1
+        ftp_h.quit()
+    else:
+        logger.error('Could not reconnect, remote manifest not updated (next sync resends)')
+
+    # upload_all does a cwd and a STOR per file plus one existence check per directory
+    full_round_trips = 2 * len(new_manifest) + len(_group_by_dir(new_manifest))
+    full_bytes = sum(entry['size'] for entry in new_manifest.values())
+    report = {
+        'files': len(new_manifest),
+        'uploaded': uploaded,
+        'deleted': deleted,
+        'bytes_sent': bytes_sent,
+        'bytes_saved': full_bytes - bytes_sent,
+        'round_trips': round_trips,
+        'round_trips_saved': full_round_trips - round_trips,
+    }
+    count('ftp_round_trips', round_trips)
+    logger.info('Delta sync: %s' % (report))
+    return report
+
+
+def _quietly_close(ftp_h):
+    try:
+        ftp_h.close()
+    except Exception:
+        pass
+
+
+def _partition_dirs(groups, sizes, workers):
+    '''Spread remote directories over workers, largest first onto the least loaded'''
+    loads = [0] * workers
+    buckets = [[] for _ in range(workers)]
+    dir_bytes = {rel_dir: sum(sizes[rel_path] for rel_path in rel_paths)
+                 for rel_dir, rel_paths in groups.items()}
+    for rel_dir in sorted(groups, key=lambda d: (-dir_bytes[d], d)):
+        target = loads.index(min(loads))
+        buckets[target].append(rel_dir)
+        loads[target] += dir_bytes[rel_dir]
+    return [bucket for bucket in buckets if bucket]
+
+
+@timed('pool_upload')
+def pool_upload(server,
+                username,
+                password,
+                base_local_dir,
+                base_remote_dir,
+                rel_paths,
+                connections=4,
+                retries=3,
+                backoff=1.0):
+    '''Upload files (paths relative to base_local_dir) over a pool of FTP connections.
+
+    All remote directories are created first in one pass on a control
+    connection, so FtpAddOns.PATH_CACHE is complete before the workers start.
+    Directories are then partitioned across `connections` worker threads, each
+    with its own authenticated session. Transient errors (4xx) are retried with
+    exponential backoff; dropped sessions are reconnected before retrying.
+
+    Returns (uploaded relative paths, throughput report dict).
+    '''
+    start = time.monotonic()
+    base_local_dir = os.path.abspath(base_local_dir)
+    base_remote_dir = os.path.normpath(base_remote_dir).replace('\\', '/')
+    sizes = {rel_path: os.path.getsize(os.path.join(base_local_dir, rel_path))
+             for rel_path in rel_paths}
+    groups = {}
+    for rel_path in rel_paths:
+        groups.setdefault(os.path.split(rel_path)[0], []).append(rel_path)
+
+    ftp_h = _connect(server, username, password)
+    if ftp_h is None:
+        return [], None
+    ftp_path_tools = FtpAddOns(ftp_h)
+    for rel_dir in sorted(groups):
+        remote_path = _remote_path(base_remote_dir, rel_dir)
+        if not ftp_path_tools.ftp_exists(remote_path):
+            ftp_path_tools.ftp_mkdirs(remote_path)
+    ftp_h.quit()
+
+    def worker(rel_dirs):
+        uploaded = []
+        ftp_w = None
+        current_dir = None
+        for rel_dir in rel_dirs:
+            remote_path = _remote_path(base_remote_dir, rel_dir)
+            for rel_path in groups[rel_dir]:
+                for attempt in range(retries + 1):
+                    try:
+                        if ftp_w is None:
+                            ftp_w = _connect(server, username, password)
+                            current_dir = None
+                            if ftp_w is None:
+                                raise ConnectionError('login failed')
+                        if current_dir != remote_path:
+                            ftp_w.cwd(remote_path)
+                            current_dir = remote_path
+                        with open(os.path.join(base_local_dir, rel_path), 'rb') as f_h:
+                            ftp_w.storbinary('STOR %s' % (os.path.basename(rel_path)), f_h)
+                        uploaded.append(rel_path)
+                        break
+                    except ftplib.error_perm as e:
+                        logger.exception('ERROR -- (%s): %s' % (rel_path, str(e.args)))
+                        break
+                    except (ftplib.error_temp, ftplib.error_reply, OSError, EOFError) as e:
+                        logger.warning('Attempt %d for (%s) failed: %s' % (attempt + 1, rel_path, e))
+                        if not isinstance(e, ftplib.Error) and ftp_w is not None:
+                            _quietly_close(ftp_w)  # dropped session, reconnect on retry
+                            ftp_w = None
+                        if attempt < retries:
+                            time.sleep(backoff * 2 ** attempt)
+        if ftp_w is not None:
+            ftp_w.quit()
+        return uploaded
+
+    partitions = _partition_dirs(groups, sizes, connections)
+    uploaded = []
+    with ThreadPoolExecutor(max_workers=max(len(partitions), 1)) as pool:
+        for worker_uploaded in pool.map(worker, partitions):
+            uploaded += worker_uploaded
+
+    seconds = time.monotonic() - start
+    sent = sum(sizes[rel_path] for rel_path in uploaded)
+    count('files_uploaded', len(uploaded))
+    count('bytes_uploaded', sent)
+    report = {
+        'files': len(rel_paths),
+        'uploaded': len(uploaded),
+        'connections': len(partitions),
+        'bytes': sent,
+        'seconds': round(seconds, 3),
+        'files_per_second': round(len(uploaded) / seconds, 1) if seconds else None,
+        'mb_per_second': round(sent / seconds / 1e6, 3) if seconds else None,
+    }
+    logger.info('Pooled upload: %s' % (report))
+    return uploaded, report
+
+
 if __name__ == '__main__':
     from dotenv import load_dotenv
 
@@ -286,7 +798,7 @@ if __name__ == '__main__':
     if monitor:
         try:
             monitor_and_ftp(server, username, p, local_dir,
-                            remote_dir, encrypt, walk)
+                            remote_dir, encrypt, walk, mode)
         except KeyboardInterrupt:
             logger.warning('Exiting...')
     else:
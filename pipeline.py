@@ -0,0 +1,211 @@
+"""Staged daily update: fetch -> team frames -> stats -> render -> upload.
+
+Each stage runs in its own thread and passes countries to the next one through a
+bounded queue, so a country's pages are uploading while the next country renders.
+Countries are downloaded a few at a time (``leagues.iter_leagues``) but flow
+through the stages one by one, so memory stays flat however many leagues run.
+An error in any stage drops only that country; the others carry on and the error
+is listed in the run report.
+"""
+
+import dataclasses
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from loguru import logger
+
+import config as cfg
+import ftp_transfer
+import soccer1
+from sp_soccer_lib import create_team_df_dict
+from sp_soccer_lib.elo import update_ratings
+from sp_soccer_lib.handout_helpers import style
+from sp_soccer_lib.instrumentation import count, merge, recorded, timer
+from sp_soccer_lib.leagues import iter_leagues
+
+STAGES = ("fetch", "frames", "stats", "render", "upload")
+LOCAL_DIR = "handout"
+_DONE = object()
+
+
+@dataclasses.dataclass
+class PipelineReport:
+    """Outcome of one run_pipeline() call."""
+
+    wall_seconds: float = 0.0
+    stage_seconds: dict = dataclasses.field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    country_seconds: dict = dataclasses.field(default_factory=dict)  # country -> {stage: s}
+    errors: dict = dataclasses.field(default_factory=dict)  # country -> "stage: error"
+    rendered: list = dataclasses.field(default_factory=list)
+    uploads: dict = dataclasses.field(default_factory=dict)  # country -> sync_all report
+
+    def as_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+def _stage(name, func, inbox, outbox, report):
+    """Apply func(country, payload) to each item of inbox and pass the result on."""
+    while True:
+        item = inbox.get()
+        if item is _DONE:
+            if outbox is not None:
+                outbox.put(_DONE)
+            return
+        country, payload = item
+        start = time.monotonic()
+        try:
+            with timer(f"pipeline.{name}"):
+                result = func(country, payload)
+        except Exception as e:
+            logger.exception(f"{name} failed for {country}")
+            report.errors[country] = f"{name}: {e!r}"
+            continue
+        finally:
+            elapsed = time.monotonic() - start
+            report.stage_seconds[name] += elapsed
+            report.country_seconds.setdefault(country, {})[name] = round(elapsed, 3)
+        if outbox is not None:
+            outbox.put((country, result))
+
+
+def run_pipeline(
+    server=None,
+    username=None,
+    password=None,
+    remote_dir=None,
+    countries=None,
+    dry_run=False,
+    force=False,
+    loader=None,
+    queue_size=2,
+    workers=1,
+    fetch_workers=4,
+    **sync_options,
+) -> PipelineReport:
+    """### Render and publish the handout site with the stages overlapping.
+
+    Pages are rendered exactly as ``soccer1.update_local_handout`` renders them
+    (same render manifest, unchanged pages skipped). Each country's directory is
+    synced with ``ftp_transfer.sync_all(subdir=country)`` as soon as its pages
+    are written; a final full ``sync_all`` publishes the index page and anything
+    a failed upload left behind. Each league's Elo ratings (``cfg.ELO_STATE_FILE``)
+    are brought up to date with its new matches and shown on the country page.
+
+    Parameters:
+
+        server, username, password, remote_dir (str): FTP target (unused with dry_run)
+        countries (list): countries to process, default ``soccer1.COUNTRIES``
+        dry_run (bool): fetch, build and render, but do not connect or upload
+        force (bool): render every page regardless of the render manifest
+        loader (callable): country -> match DataFrame, default ``soccer1.load_country``
+        queue_size (int): countries that may wait between two stages (and be
+                    downloaded ahead of the first one)
+        workers (int): more than 1 renders each country's pages over a process pool
+                    (forkserver, as the stages are threads)
+        fetch_workers (int): countries downloading at the same time
+        **sync_options: passed to every ``sync_all`` call (mode, connections, ...)
+
+    Returns:
+
+        (PipelineReport): per-stage and per-country timings, errors, rendered pages
+                    and upload reports
+    """
+    countries = list(soccer1.COUNTRIES if countries is None else countries)
+    loader = loader or soccer1.load_country
+    report = PipelineReport()
+    styling = style()
+    manifest = soccer1.load_manifest()
+    new_manifest = {}
+
+    def fetch(country, loading):
+        return loading.result()
+
+    def frames(country, df):
+        # Only this stage's thread touches the Elo state file
+        ratings = update_ratings({country: df}, cfg.ELO_STATE_FILE)[country]
+        return df, create_team_df_dict(df), ratings
+
+    def stats(country, built):
+        df, team_dfs, ratings = built
+        return list(
+            soccer1.changed_page_jobs(
+                country,
+                styling,
+                manifest,
+                new_manifest,
+                force,
+                df=df,
+                team_dfs=team_dfs,
+                ratings=ratings,
+            )
+        )
+
+    def render(country, jobs):
+        if pool is None:
+            for _, render_page, args in jobs:
+                render_page(*args)
+        else:
+            for future in [
+                pool.submit(recorded, render_page, *args) for _, render_page, args in jobs
+            ]:
+                merge(future.result()[1])
+        pages = [page for page, _, _ in jobs]
+        report.rendered += pages
+        count("pages_rendered", len(pages))
+        return pages
+
+    def upload(country, pages):
+        if dry_run or not pages:
+            return
+        report.uploads[country] = ftp_transfer.sync_all(
+            server, username, password, LOCAL_DIR, remote_dir, subdir=country, **sync_options
+        )
+
+    funcs = {"fetch": fetch, "frames": frames, "stats": stats, "render": render, "upload": upload}
+    queues = [queue.Queue(maxsize=queue_size) for _ in STAGES] + [None]
+    threads = [
+        threading.Thread(
+            target=_stage, args=(name, funcs[name], queues[i], queues[i + 1], report), name=name
+        )
+        for i, name in enumerate(STAGES)
+    ]
+    start = time.monotonic()
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("forkserver"))
+    for thread in threads:
+        thread.start()
+    for country, loading in iter_leagues(countries, loader, fetch_workers, prefetch=queue_size):
+        queues[0].put((country, loading))
+    queues[0].put(_DONE)
+    for thread in threads:
+        thread.join()
+    if pool is not None:
+        pool.shutdown()
+
+    soccer1.render_index_page()
+    for country, error in report.errors.items():
+        if error.startswith("upload"):
+            continue  # pages are rendered; the final sync below retries the upload
+        # Keep the previous digests of a failed country so its pages are not considered current
+        for page in [p for p in new_manifest if p == country or p.startswith(country + "/")]:
+            del new_manifest[page]
+        new_manifest.update(
+            {p: d for p, d in manifest.items() if p == country or p.startswith(country + "/")}
+        )
+    soccer1.save_manifest(new_manifest)
+    count("pages_skipped", len(new_manifest) - len(report.rendered))
+    if not dry_run:
+        report.uploads["/"] = ftp_transfer.sync_all(
+            server, username, password, LOCAL_DIR, remote_dir, **sync_options
+        )
+    report.wall_seconds = round(time.monotonic() - start, 3)
+    report.stage_seconds = {name: round(s, 3) for name, s in report.stage_seconds.items()}
+    logger.info(
+        f"Pipeline finished in {report.wall_seconds}s, stages {report.stage_seconds}, "
+        f"{len(report.rendered)} pages rendered, errors: {report.errors or 'none'}"
+    )
+    return report
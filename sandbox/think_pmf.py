@@ -1,6 +1,6 @@
 import external.thinkplot as thinkplot
-import external.thinkstats2 as thinkstats2
 from sp_soccer_lib import no_draw_frequencies
+from sp_soccer_lib.distributions import Hist, Pmf
 
 
 def main():
@@ -9,8 +9,8 @@ def main():
     freq2 = no_draw_frequencies('greece', ['AEK'])
     print(freq1, freq2)
     width = 0.45
-    first_hist = thinkstats2.Hist(freq1, label='Olympiakos')
-    other_hist = thinkstats2.Hist(freq2, label='AEK')
+    first_hist = Hist(freq1, label='Olympiakos')
+    other_hist = Hist(freq2, label='AEK')
 
     '''
     thinkplot.PrePlot takes the number of histograms we are planning to plot;
@@ -32,8 +32,8 @@ def main():
 
     freq_greece = no_draw_frequencies('greece')
     freq_england = no_draw_frequencies('england')
-    pmf = thinkstats2.Pmf(freq_greece, label='Greece')
-    pmf2 = thinkstats2.Pmf(freq_england, label='England')
+    pmf = Pmf(freq_greece, label='Greece')
+    pmf2 = Pmf(freq_england, label='England')
     print(pmf)
 
     print(pmf.Prob(2))
@@ -84,7 +84,7 @@ def main():
     for country in countries:
         thinkplot.PrePlot(len(countries))
         # freqs.append(no_draw_frequencies(country))
-        pmfs.append(thinkstats2.Pmf(
+        pmfs.append(Pmf(
             no_draw_frequencies(country), label=country))
     thinkplot.Pmfs(pmfs)
     thinkplot.Show(xlabel='no_draw_streaks')
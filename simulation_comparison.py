@@ -9,6 +9,7 @@ Compares three betting strategies:
 Produces a comprehensive markdown report.
 """
 
+import functools
 import math
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -17,9 +18,11 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
+import config as cfg
 from sp_soccer_lib import create_team_df_dict
-from sp_soccer_lib.championships import load_country
+from sp_soccer_lib.leagues import iter_leagues
 from sp_soccer_lib.probabilities import cumulative_binomial_probabilities
+from sp_soccer_lib.simulation import period_matches
 
 # =============================================================================
 # Configuration
@@ -40,7 +43,7 @@ class SimulationConfig:
     streak_threshold: int | None = None
 
 
-COUNTRIES = ["greece", "england", "italy", "spain", "germany", "france"]
+COUNTRIES = list(cfg.LEAGUES)
 PERIODS = ["1920", "2021", "2122", "2223", "2324"]
 
 
@@ -85,6 +88,7 @@ def calc_rolling_pdraw(team_df: pd.DataFrame, match_iloc: int, period: str) -> f
     return draws / total
 
 
+@functools.lru_cache(maxsize=4096)  # p_draw is a ratio of small counts, so it repeats
 def calc_cprob_adj(p_draw: float | None, window: int = 5) -> float | None:
     """Calculate P(at least 1 draw in next N matches)."""
     if p_draw is None or math.isnan(p_draw):
@@ -133,20 +137,18 @@ def run_cprob_adj_simulation(
     bets_remaining = 0
     current_bet_index = 0
 
-    period_mask = team_df["period"] == period
-    if not period_mask.any():
+    positions, draw_flags, match_odds, played_before, draws_before = period_matches(team_df, period)
+    if not len(positions):
         return result
 
-    for match_date, match in team_df.iterrows():
-        if match["period"] != period:
-            continue
-
-        full_iloc = team_df.index.get_loc(match_date)
-        p_draw = calc_rolling_pdraw(team_df, full_iloc, period)
+    for is_draw, odds, played, drawn in zip(
+        draw_flags, match_odds, played_before, draws_before, strict=True
+    ):
+        # Rolling p_draw as calc_rolling_pdraw() computes it
+        p_draw = drawn / played if played >= 3 else None
         c_prob_adj = calc_cprob_adj(p_draw, config.bet_window)
-
-        is_draw = match["FTR"] == "D"
-        odds = get_odds(match, config.fixed_odds)
+        if math.isnan(odds):
+            odds = config.fixed_odds
 
         # Check trigger
         if not is_betting and c_prob_adj is not None:
@@ -195,14 +197,15 @@ def run_old_cprob_simulation(
     bets_remaining = 0
     current_bet_index = 0
 
-    period_df = team_df[team_df["period"] == period]
-    if period_df.empty:
+    positions, draw_flags, match_odds, _, _ = period_matches(team_df, period)
+    if not len(positions):
         return result
+    streaks = team_df["count_no_draw"].to_numpy()[positions].tolist()
 
-    for match_date, match in period_df.iterrows():
-        is_draw = match["FTR"] == "D"
-        odds = get_odds(match, config.fixed_odds)
-        count_no_draw = int(match["count_no_draw"]) if match["count_no_draw"] else 0
+    for is_draw, odds, count_no_draw in zip(draw_flags, match_odds, streaks, strict=True):
+        if math.isnan(odds):
+            odds = config.fixed_odds
+        count_no_draw = int(count_no_draw) if count_no_draw else 0
 
         # Check trigger based on streak threshold
         if not is_betting:
@@ -266,9 +269,9 @@ def run_all_simulations() -> dict[str, pd.DataFrame]:
 
     all_results = {config.name: [] for config in configs}
 
-    for country in COUNTRIES:
+    for country, loading in iter_leagues(COUNTRIES):
         logger.info(f"Processing {country}...")
-        df = load_country(country)
+        df = loading.result()
         team_dfs = create_team_df_dict(df)
 
         for team, team_df in team_dfs.items():
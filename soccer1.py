@@ -1,22 +1,37 @@
 # handout: begin-exclude
+import hashlib
+import json
+import os
 import statistics
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib
 import pandas as pd
 from loguru import logger
 
 import handout
-from config import CURRENT_PERIOD
+from config import CHART_BACKEND, CURRENT_PERIOD, ELO_STATE_FILE, LEAGUES, NEXT_MATCHES
 from sp_soccer_lib import championship_teams, create_team_df_dict, no_draw_frequencies
 from sp_soccer_lib.championships import load_country, team_stats
+from sp_soccer_lib.charts import boxplot_svg, histogram_svg
+from sp_soccer_lib.elo import update_ratings
 from sp_soccer_lib.handout_helpers import get_country_header, make_link, style
+from sp_soccer_lib.instrumentation import count, merge, recorded, timed
+from sp_soccer_lib.runs import ruin_table
 
 matplotlib.use("Agg")
 from matplotlib import pyplot as plt
 
 # !import numpy as np
 
+COUNTRIES = list(LEAGUES)
+MANIFEST_FILE = "handout/.render_manifest.json"
+# Bump when page layout changes so every page is rendered again
+RENDER_VERSION = "2"
+# Matplotlib (fig, ax) pairs reused across pages, see reusable_axes()
+_FIGURES = {}
+
 
 def country_df_properties(df):
     df = df.rename(
@@ -36,6 +51,7 @@ def country_df_properties(df):
         "GF",
         "GA",
         "PTS",
+        "Elo",
         "CurrentNoDraw",
         "MaxNoDraw",
         "B365D_mean",
@@ -44,7 +60,7 @@ def country_df_properties(df):
         "c_prob_adj",
         "link",
     ]
-    return df, columns_to_show
+    return df, [column for column in columns_to_show if column in df.columns]
 
 
 def team_df_properties(df):
@@ -68,90 +84,238 @@ def team_df_properties(df):
     return df, columns_to_show
 
 
-def frequency_graphs(doc, country, team=None, team_dfs=None):
-    series = no_draw_frequencies(country, team, team_dfs=team_dfs)
+# Columns a team page needs: the displayed ones plus "result" for the frequency series
+TEAM_PAGE_COLUMNS = [
+    "period",
+    "HomeTeam",
+    "AwayTeam",
+    "result",
+    "FTHG",
+    "FTAG",
+    "B365D",
+    "count_draw",
+    "count_no_draw",
+]
+
+
+def reusable_axes(slot):
+    """One figure per chart slot, created once per process and cleared on reuse."""
+    if slot not in _FIGURES:
+        _FIGURES[slot] = plt.subplots(figsize=(3, 2))
+    fig, ax = _FIGURES[slot]
+    ax.clear()
+    return fig, ax
+
+
+def frequency_graphs(doc, country, team=None, team_dfs=None, series=None, backend=None):
+    if series is None:
+        series = no_draw_frequencies(country, team, team_dfs=team_dfs)
     freq = Counter(series)
     doc.add_text(" ")
     doc.add_html(f'<p class="centered">Average: <b>{statistics.mean(series)}</b></p>')
     doc.add_html(f'<p class="centered">Median: <b>{statistics.median(series)}</b></p>')
     table = pd.Series(freq).to_frame()
     doc.add_html(table.sort_index().to_html())
-    fig, ax = plt.subplots(figsize=(3, 2))
+    if (backend or CHART_BACKEND) == "svg":
+        doc.add_html(histogram_svg(freq))
+        doc.add_html(boxplot_svg(freq))
+        return doc
+    fig, ax = reusable_axes(0)
     ax.hist(series)
     doc.add_figure(fig, width=0.8)
-    fig, ax = plt.subplots(figsize=(3, 2))
+    fig, ax = reusable_axes(1)
     ax.boxplot(series, vert=False)
     doc.add_figure(fig, width=0.8)
-    plt.close("all")
     return doc
 
 
-def update_local_handout():
-    countries = ["greece", "italy", "england", "spain", "germany", "france"]
-    styling = style()
+def render_index_page():
+    """Write handout/index.html linking to every country page."""
     main_doc = handout.Handout("handout")
     main_doc._logger.setLevel(0)
-    for country in countries:
+    for country in COUNTRIES:
         main_doc.add_html(f'<a href="./{country}/index.html">{get_country_header(country)}</a>')
     main_doc.show()
 
-    for country in countries:
-        logger.info("Starting country: " + country)
-        country_doc = handout.Handout("handout/" + country)
 
-        country_doc.add_html(get_country_header(country))
-        country_doc.add_html(styling)
+@timed("render_country_page")
+def render_country_page(country, stats_html, series, styling, ruin_html=""):
+    """Write handout/<country>/ from the rendered stats and ruin tables and country series."""
+    country_doc = handout.Handout("handout/" + country)
+
+    country_doc.add_html(get_country_header(country))
+    country_doc.add_html(styling)
+    country_doc.add_html(stats_html)
+    if ruin_html:
+        country_doc.add_html(
+            '<p class="centered">Probability that a no-draw run of each bet span '
+            "occurs before the end of the season (counting the current streak):</p>"
+        )
+        country_doc.add_html(ruin_html)
+
+    country_doc = frequency_graphs(country_doc, country, series=series)
+
+    country_doc.show()
+    return country
 
+
+@timed("render_team_page")
+def render_team_page(country, team, team_matches, styling):
+    """Write handout/<country>/<team>/ from the team's match frame only."""
+    logger.info("Starting Team: " + team)
+    team_doc = handout.Handout("handout/" + country + "/" + team)
+
+    team_doc.add_html(styling)
+    team_doc.add_text("## " + team)
+
+    series = no_draw_frequencies(country, [team], team_dfs={team: team_matches})
+
+    # TODO: Find a solution with team logos?
+    # team_matches['HomeTeam'] = team_matches.apply(lambda row: add_logo(row), axis=1)
+    team_matches, columns_to_show = team_df_properties(team_matches)
+    team_html = (
+        team_matches.iloc[::-1]
+        .to_html(escape=False, columns=columns_to_show)
+        .replace("<td>W</td>", '<td style="background-color:greenyellow;">W</td>')
+        .replace("<td>D</td>", '<td style="background-color:orange;">D</td>')
+        .replace("<td>L</td>", '<td style="background-color:red;">L</td>')
+        .replace(team, f"<b>{team}</b>")
+    )
+    team_doc.add_html(team_html)
+
+    try:  # because there were countries with few stats in the time of codeing
+        team_doc = frequency_graphs(team_doc, country, series=series)
+    except statistics.StatisticsError as e:
+        logger.warning(e)
+    team_doc.show()
+    return team
+
+
+def country_page_jobs(country, styling, df=None, team_dfs=None, ratings=None):
+    """Load a country and yield (page, render function, args) for its country and team pages.
+
+    Only compact inputs go into the jobs: the rendered stats and ruin tables, the country
+    frequency series and, per team, the columns its page actually uses. ``df``,
+    ``team_dfs`` and the league's ``ratings`` (EloRatings) can be passed in when an
+    earlier stage already built them; otherwise the ratings saved in ELO_STATE_FILE
+    are brought up to date with the new matches.
+    """
+    if df is None:
         df = load_country(country)
+    if team_dfs is None:
         team_dfs = create_team_df_dict(df)
-        stats = team_stats(team_dfs)
-
-        stats["index_col"] = stats.index
-        stats["link"] = stats.apply(lambda row: make_link(row), axis=1)
-        stats, columns_to_show = country_df_properties(stats)
-        # Remove teams with 0 points
-        # stats = stats[stats.PTS > 0]
-        country_doc.add_html(stats.to_html(columns=columns_to_show, escape=False))
-
-        country_doc = frequency_graphs(country_doc, country, team_dfs=team_dfs)
-
-        country_doc.show()
-        # logger.info('Finished')
-
-        teams = championship_teams(df)
-        for team in teams:
-            logger.info("Starting Team: " + team)
-            team_doc = handout.Handout("handout/" + country + "/" + team)
-
-            team_doc.add_html(styling)
-            team_doc.add_text("## " + team)
-
-            team_matches = team_dfs[team]
-
-            # TODO: Find a solution with team logos?
-            # team_matches['HomeTeam'] = team_matches.apply(lambda row: add_logo(row), axis=1)
-            team_matches, columns_to_show = team_df_properties(team_matches)
-            team_html = (
-                team_matches.iloc[::-1]
-                .to_html(escape=False, columns=columns_to_show)
-                .replace("<td>W</td>", '<td style="background-color:greenyellow;">W</td>')
-                .replace("<td>D</td>", '<td style="background-color:orange;">D</td>')
-                .replace("<td>L</td>", '<td style="background-color:red;">L</td>')
-                .replace(team, f"<b>{team}</b>")
-            )
-            team_doc.add_html(team_html)
-
-            try:  # because there were countries with few stats in the time of codeing
-                team_doc = frequency_graphs(team_doc, country, [team], team_dfs=team_dfs)
-            except statistics.StatisticsError as e:
-                logger.warning(e)
-            team_doc.show()
-            # logger.info('Finished')
-    logger.info("Finished All Countries and Teams")
+    if ratings is None:
+        ratings = update_ratings({country: df}, ELO_STATE_FILE)[country]
+    stats = team_stats(team_dfs, ratings=ratings)
+    ruin_html = ruin_table(stats).to_html()
+
+    stats["index_col"] = stats.index
+    stats["link"] = stats.apply(lambda row: make_link(row), axis=1)
+    stats, columns_to_show = country_df_properties(stats)
+    # Remove teams with 0 points
+    # stats = stats[stats.PTS > 0]
+    stats_html = stats.to_html(columns=columns_to_show, escape=False)
+    series = no_draw_frequencies(country, team_dfs=team_dfs)
+    yield country, render_country_page, (country, stats_html, series, styling, ruin_html)
+
+    for team in championship_teams(df):
+        team_matches = team_dfs[team][TEAM_PAGE_COLUMNS]
+        yield f"{country}/{team}", render_team_page, (country, team, team_matches, styling)
+
+
+def page_digest(render, args):
+    """Content hash of everything a page is rendered from."""
+    digest = hashlib.sha256(
+        f"{RENDER_VERSION}|{render.__name__}|{CURRENT_PERIOD}|{NEXT_MATCHES}|{CHART_BACKEND}".encode()
+    )
+    for arg in args:
+        if isinstance(arg, pd.DataFrame):
+            digest.update("|".join(map(str, arg.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(arg, index=True).values.tobytes())
+        else:
+            digest.update(repr(arg).encode())
+    return digest.hexdigest()
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    tmp_file = MANIFEST_FILE + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, MANIFEST_FILE)
+
+
+def changed_page_jobs(country, styling, manifest, new_manifest, force=False, **frames):
+    """Yield the jobs of country_page_jobs() whose input hash differs from the manifest."""
+    for page, render, args in country_page_jobs(country, styling, **frames):
+        digest = page_digest(render, args)
+        new_manifest[page] = digest
+        unchanged = manifest.get(page) == digest and os.path.exists(f"handout/{page}/index.html")
+        if unchanged and not force:
+            continue
+        yield page, render, args
+
+
+@timed("update_local_handout")
+def update_local_handout(workers=1, force=False):
+    """### Render the handout site.
+
+    Pages whose inputs hash the same as in the previous run's manifest are left as
+    they are on disk.
+
+    Parameters:
+
+        workers (int): 1 renders pages in this process; more distributes country and
+                    team pages over a process pool of that size (output is identical)
+        force (bool): render every page regardless of the manifest
+
+    Returns:
+
+        (list): pages (handout sub-directories) that were rendered
+    """
+    styling = style()
+    render_index_page()
+
+    manifest = load_manifest()
+    new_manifest = {}
+    rendered = []
+    if workers <= 1:
+        for country in COUNTRIES:
+            logger.info("Starting country: " + country)
+            for page, render, args in changed_page_jobs(
+                country, styling, manifest, new_manifest, force
+            ):
+                render(*args)
+                rendered.append(page)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for country in COUNTRIES:
+                logger.info("Starting country: " + country)
+                # Pages render while the next country is loaded in this process
+                for page, render, args in changed_page_jobs(
+                    country, styling, manifest, new_manifest, force
+                ):
+                    futures[page] = pool.submit(recorded, render, *args)
+            for page, future in futures.items():
+                merge(future.result()[1])  # the worker's render_* timings
+                rendered.append(page)
+    save_manifest(new_manifest)
+    count("pages_rendered", len(rendered))
+    count("pages_skipped", len(new_manifest) - len(rendered))
+    logger.info(f"Finished All Countries and Teams ({len(rendered)}/{len(new_manifest)} rendered)")
+    return rendered
 
 
 if __name__ == "__main__":
-    update_local_handout()
+    update_local_handout(workers=os.cpu_count())
 
 """ ### Footer
 Authored by Stavros Pitoglou (Computer Solutions SA) / 2019
@@ -1,11 +1,51 @@
+import collections
+import threading
+from collections.abc import Mapping
+
 import numpy as np
+import pandas as pd
 from loguru import logger
 
 from config import CURRENT_PERIOD
+from sp_soccer_lib.instrumentation import timed
+
+# Fixed categories, so every frame shares the same codes
+FTR_CATEGORIES = ["H", "D", "A"]
+RESULT_CATEGORIES = ["W", "D", "L"]
+
+
+def categorize(df):
+    """### Match frame with categorical team, FTR and period columns
+
+    Team names and periods repeat thousands of times per country, so storing
+    them as small integer codes cuts memory and makes the ``==`` filters used
+    everywhere integer compares. Values and comparisons with plain strings are
+    unchanged. A frame that is already categorical is returned as is.
+
+    Parameters:
+
+        df (DataFrame): matches as loaded by ``country_dataframe()``
+
+    Returns:
+
+        (DataFrame): a copy with categorical HomeTeam/AwayTeam (shared categories),
+                    FTR and period (categories in order of appearance) columns
+    """
+    if isinstance(df["FTR"].dtype, pd.CategoricalDtype):
+        return df
+    teams = pd.CategoricalDtype(sorted(set(df["HomeTeam"].dropna()) | set(df["AwayTeam"].dropna())))
+    return df.astype(
+        {
+            "HomeTeam": teams,
+            "AwayTeam": teams,
+            "FTR": pd.CategoricalDtype(FTR_CATEGORIES),
+            "period": pd.CategoricalDtype(pd.unique(df["period"])),
+        }
+    )
 
 
 def create_team_df(df, team):
-    team_df = df.query('HomeTeam=="' + team + '" or AwayTeam=="' + team + '"')
+    team_df = df[(df["HomeTeam"] == team) | (df["AwayTeam"] == team)]
     team_df = team_df.sort_index()
     return team_df
 
@@ -21,7 +61,9 @@ def championship_teams(df):
     )
 
 
+@timed("create_team_df_dict")
 def create_team_df_dict(dataframe):
+    dataframe = categorize(dataframe)
     team_dfs = {}
     for team in championship_teams(dataframe):
         team_df = create_team_df(dataframe, team)
@@ -32,6 +74,90 @@ def create_team_df_dict(dataframe):
     return team_dfs
 
 
+class FrameCache:
+    """Thread-safe LRU of built team frames, shareable by several LazyTeamFrames."""
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize  # None: never evict
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            return frame
+
+    def put(self, key, frame):
+        with self._lock:
+            self._frames[key] = frame
+            self._frames.move_to_end(key)
+            while self.maxsize is not None and len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+
+
+class LazyTeamFrames(Mapping):
+    """### create_team_df_dict() that builds each team's frame on first access
+
+    Same keys, order and frames as ``create_team_df_dict(df)``, so it can be
+    passed to ``team_stats`` and the handout unchanged, but a caller that needs
+    one team pays for one team. The team -> row positions index is built once
+    for the country; built frames live in a ``FrameCache`` and are rebuilt
+    after eviction.
+
+    Parameters:
+
+        df (DataFrame): a country's matches
+        maxsize (int): frames kept, default all (ignored when cache is given)
+        cache (FrameCache): shared cache, to bound frames across many countries
+    """
+
+    def __init__(self, df, maxsize=None, cache=None):
+        self.df = categorize(df)
+        self.cache = cache if cache is not None else FrameCache(maxsize)
+        self._token = object()  # this country's part of a shared cache
+        self._teams = list(championship_teams(self.df))
+        self._current = set(self._teams)
+        home = self.df["HomeTeam"].cat.codes.to_numpy()
+        away = self.df["AwayTeam"].cat.codes.to_numpy()
+        codes = np.concatenate((home, away))
+        rows = np.concatenate((np.arange(len(home)), np.arange(len(away))))
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.df["HomeTeam"].cat.categories))
+        groups = np.split(rows[order][(codes[order] >= 0)], np.cumsum(counts)[:-1])
+        self._positions = {
+            team: np.sort(group)
+            for team, group in zip(self.df["HomeTeam"].cat.categories, groups, strict=True)
+        }
+
+    def __getitem__(self, team):
+        if team not in self._current:
+            raise KeyError(team)
+        frame = self.cache.get((self._token, team))
+        if frame is None:
+            team_df = self.df.iloc[self._positions[team]].sort_index()
+            frame = update_results(update_draw_streaks(team_df, verbose=0), team)
+            self.cache.put((self._token, team), frame)
+        return frame
+
+    def __iter__(self):
+        return iter(self._teams)
+
+    def __len__(self):
+        return len(self._teams)
+
+    def __contains__(self, team):
+        return team in self._current
+
+    def positions(self, team):
+        """### Row positions of the team's matches in ``df`` (any team, not only current ones)."""
+        return self._positions[team]
+
+
 def update_results(team_df, team):
     # Vectorized result calculation using np.select
     is_home = team_df["HomeTeam"] == team
@@ -46,40 +172,50 @@ def update_results(team_df, team):
     ]
     choices = ["W", "L", "L", "W"]
 
-    team_df["result"] = np.select(conditions, choices, default="D")
+    team_df["result"] = pd.Categorical(
+        np.select(conditions, choices, default="D"), categories=RESULT_CATEGORIES
+    )
     return team_df
 
 
+def _codes(series):
+    """Integer codes of a categorical column (the values themselves otherwise)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy()
+    return series.to_numpy()
+
+
+def streak_positions(is_draw, period, group=None):
+    """### Position (from 1) of each match in its draw or no-draw streak
+
+    A streak is a run of consecutive draws (or non-draws) within one period
+    (and one ``group``, e.g. team, when several teams' matches are stacked);
+    the first match of a period always starts a new one.
+
+    Parameters:
+
+        is_draw (ndarray): bool per match, in match order
+        period (ndarray): period (or period code) per match
+        group (ndarray): optional team id per match
+
+    Returns:
+
+        (ndarray): int positions, same length as is_draw
+    """
+    starts = np.ones(len(is_draw), dtype=bool)
+    starts[1:] = (is_draw[1:] != is_draw[:-1]) | (period[1:] != period[:-1])
+    if group is not None:
+        starts[1:] |= group[1:] != group[:-1]
+    start_positions = np.flatnonzero(starts)
+    return np.arange(len(is_draw)) - start_positions[np.cumsum(starts) - 1] + 1
+
+
 def update_draw_streaks(team_df, verbose=0):
-    # Use itertuples() for ~10x speedup over iterrows()
-    draw = []
-    no_draw = []
-
-    count = 1
-    memory = "G"
-    period_memory = "start"
-    for row in team_df.itertuples():
-        if row.FTR == "D":
-            no_draw.append(0)
-            if memory == "D" and row.period == period_memory:
-                count += 1
-                draw.append(count)
-            else:
-                draw.append(1)
-                memory = "D"
-                count = 1
-        else:
-            draw.append(0)
-            if memory != "D" and row.period == period_memory:
-                count += 1
-                no_draw.append(count)
-            else:
-                no_draw.append(1)
-                memory = "ND"
-                count = 1
-        period_memory = row.period
-    team_df["count_draw"] = draw
-    team_df["count_no_draw"] = no_draw
+    """### Add count_draw / count_no_draw: each match's position in its streak"""
+    is_draw = (team_df["FTR"] == "D").to_numpy()
+    position = streak_positions(is_draw, _codes(team_df["period"]))
+    team_df["count_draw"] = np.where(is_draw, position, 0)
+    team_df["count_no_draw"] = np.where(is_draw, 0, position)
     return team_df
 
 
@@ -114,33 +250,23 @@ def period_stats(team_df, team_name, period="1920"):
     return (wins, draws, losses, points, gf, ga)
 
 
+@timed("no_draw_frequencies")
 def no_draw_frequencies(country, specific_teams=None, team_dfs=None):
     """Calculate no-draw frequency distribution.
 
+    For every draw after a team's first match, the length of the no-draw streak
+    that preceded it (see ``streak_distribution.StreakDistribution``).
+
     Args:
         country: Country name
         specific_teams: Optional list of teams to process
-        team_dfs: Optional pre-computed team DataFrames (avoids redundant loading)
+        team_dfs: Optional pre-computed team DataFrames (avoids redundant loading);
+            without them the country's distribution is computed once and cached
     """
-    from .championships import load_country
+    from .streak_distribution import StreakDistribution, country_distribution
 
     if team_dfs is None:
-        df = load_country(country)
-        team_dfs = create_team_df_dict(df)
-        teams = specific_teams or championship_teams(df)
+        distribution = country_distribution(country)
     else:
-        teams = specific_teams or list(team_dfs.keys())
-
-    no_draw_distribution = []
-    for team in teams:
-        if team not in team_dfs:
-            continue
-        placeholder = "start"
-        # Use itertuples() for ~10x speedup over iterrows()
-        for row in team_dfs[team].itertuples():
-            if placeholder == "start":
-                pass
-            elif row.result == "D":
-                no_draw_distribution.append(placeholder)
-            placeholder = row.count_no_draw
-    return no_draw_distribution
+        distribution = StreakDistribution.from_team_dfs(team_dfs)
+    return distribution.frequencies(specific_teams or None)
@@ -0,0 +1,134 @@
+"""Threshold alerts pushed to subscribers when a streak index changes.
+
+Subscribers register a (country, team, field, threshold) condition and get a
+queue. ``StreakIndex`` listeners call ``AlertBroker.publish`` once per team
+update; the broker finds every threshold crossed by that single update with a
+bisect over the sorted thresholds and puts one pre-serialized event on all
+queues registered for it, so nothing is recomputed per subscriber.
+"""
+
+import bisect
+import dataclasses
+import json
+import queue
+import threading
+
+ALERT_FIELDS = ("CurrentNoDraw", "c_prob_adj")
+
+
+@dataclasses.dataclass
+class Subscription:
+    """One client's alert condition and its event queue."""
+
+    country: str
+    team: str
+    threshold: float
+    field: str = "CurrentNoDraw"
+    events: queue.Queue = dataclasses.field(default_factory=queue.Queue)
+
+    @property
+    def key(self):
+        return (self.country, self.team, self.field)
+
+
+class AlertBroker:
+    """Registry of alert conditions with fan-out to subscriber queues."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (country, team, field) -> sorted thresholds
+        self._thresholds: dict[tuple, list] = {}
+        # (country, team, field, threshold) -> subscriber queues
+        self._queues: dict[tuple, list] = {}
+
+    def subscribe(self, country, team, threshold, field="CurrentNoDraw") -> Subscription:
+        if field not in ALERT_FIELDS:
+            raise ValueError(f"Alerts are available for {ALERT_FIELDS}, not {field}")
+        sub = Subscription(country, team, float(threshold), field)
+        with self._lock:
+            thresholds = self._thresholds.setdefault(sub.key, [])
+            queues = self._queues.setdefault((*sub.key, sub.threshold), [])
+            if not queues:
+                bisect.insort(thresholds, sub.threshold)
+            queues.append(sub.events)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            condition = (*sub.key, sub.threshold)
+            queues = self._queues.get(condition, [])
+            if sub.events in queues:
+                queues.remove(sub.events)
+            if not queues:
+                self._queues.pop(condition, None)
+                thresholds = self._thresholds.get(sub.key, [])
+                if sub.threshold in thresholds:
+                    thresholds.remove(sub.threshold)
+                if not thresholds:
+                    self._thresholds.pop(sub.key, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(queues) for queues in self._queues.values())
+
+    def listener(self, country):
+        """### StreakIndex listener that publishes changes for ``country``."""
+
+        def on_change(team, before, after):
+            self.publish(country, team, before, after)
+
+        return on_change
+
+    def publish(self, country, team, before, after) -> int:
+        """### Fan out events for thresholds crossed upwards by one record change.
+
+        A threshold t is crossed when previous < t <= current. Returns the number
+        of queues that received an event.
+        """
+        delivered = 0
+        with self._lock:
+            for alert_field in ALERT_FIELDS:
+                thresholds = self._thresholds.get((country, team, alert_field))
+                if not thresholds:
+                    continue
+                current = after.get(alert_field)
+                if current is None:
+                    continue
+                previous = before.get(alert_field) if before else None
+                low = bisect.bisect_right(thresholds, previous) if previous is not None else 0
+                high = bisect.bisect_right(thresholds, current)
+                for threshold in thresholds[low:high]:
+                    event = json.dumps(
+                        {
+                            "country": country,
+                            "team": team,
+                            "field": alert_field,
+                            "threshold": threshold,
+                            "previous": previous,
+                            "value": current,
+                            "record": after,
+                        }
+                    )
+                    for events in self._queues[(country, team, alert_field, threshold)]:
+                        events.put(event)
+                        delivered += 1
+        return delivered
+
+
+def sse_stream(broker: AlertBroker, sub: Subscription, keepalive: float = 15.0):
+    """### Server-sent events generator for one subscription.
+
+    Yields ``event: alert`` messages as they arrive and a comment line every
+    ``keepalive`` seconds; the subscription is dropped when the client goes away.
+    """
+    try:
+        yield ": subscribed\n\n"
+        while True:
+            try:
+                event = sub.events.get(timeout=keepalive)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: alert\ndata: {event}\n\n"
+    finally:
+        broker.unsubscribe(sub)
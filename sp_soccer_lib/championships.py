@@ -1,17 +1,25 @@
 import pandas as pd
 
 import config as cfg
-from sp_soccer_lib import period_stats
+from sp_soccer_lib import categorize, leagues, period_stats
+from sp_soccer_lib.instrumentation import count, timed, timer
+from sp_soccer_lib.leagues import DATE_FORMAT_YY, DATE_FORMAT_YYYY, get_league  # noqa: F401
 
-# Date formats for football-data.co.uk CSV files
-DATE_FORMAT_YYYY = "%d/%m/%Y"  # Used for 1819 onwards
-DATE_FORMAT_YY = "%d/%m/%y"  # Used for 1718 (non-England)
+# Root of the <period>/<code>.csv files; a local directory works too (offline benchmarks)
+DATA_URL = "https://www.football-data.co.uk/mmz4281"
 
 
-def corrected(df):
-    """### Correct possible team misnomers and sort dataframe"""
-    df.replace("Olympiacos Piraeus", "Olympiakos", inplace=True)
-    df.replace("Volos", "Volos NFC", inplace=True)
+def corrected(df, corrections=None):
+    """### Correct possible team misnomers and sort dataframe
+
+    Parameters:
+
+        df (DataFrame): matches to correct in place
+        corrections (dict): misnomer -> name, default every registered league's table
+    """
+    corrections = leagues.all_corrections() if corrections is None else corrections
+    if corrections:
+        df.replace(corrections, inplace=True)
     df.sort_index(inplace=True)
     return df
 
@@ -23,33 +31,34 @@ def load_dataset(
 
     Parameters:
 
-        country (str): country to load data from
+        country (str): league to load data from (key, display name or file code)
         period (str): championship start-end years (eg "1920" for 2019-2020 period)
         date_format (str): strptime format string for parsing dates
             (some csv files have dd/mm/yyyy and others dd/mm/yy)
         fields (list): list of fields to include in the loaded dataset
     """
-    load = pd.read_csv(
-        f"https://www.football-data.co.uk/mmz4281/{period}/" + cfg.COUNTRIES[country] + ".csv",
-        parse_dates=["Date"],
-        index_col="Date",
-        date_format=date_format,
-    )
+    with timer("http"):
+        load = pd.read_csv(
+            f"{DATA_URL}/{period}/" + get_league(country).code + ".csv",
+            parse_dates=["Date"],
+            index_col="Date",
+            date_format=date_format,
+        )
+    count("http_requests")
     df = load[fields].copy()
     df["period"] = period
     return df
 
 
 def country_dataframe(country: str, fields: list) -> pd.DataFrame:
-    """Load all periods for a country using cfg.PERIODS."""
-    dfs = []
-    for period in cfg.PERIODS:
-        if period == "1718" and country != "England":
-            dfs.append(load_dataset(country, period, DATE_FORMAT_YY, fields=fields))
-        else:
-            dfs.append(load_dataset(country, period, fields=fields))
+    """Load all periods for a registered league using cfg.PERIODS."""
+    league = get_league(country)
+    dfs = [
+        load_dataset(country, period, league.date_format(period), fields=fields)
+        for period in cfg.PERIODS
+    ]
     df = pd.concat(dfs)
-    return corrected(df)
+    return categorize(corrected(df, league.corrections))
 
 
 def load_greece(fields=cfg.FIELDS):
@@ -76,28 +85,22 @@ def load_france(fields=cfg.FIELDS):
     return country_dataframe("France", fields)
 
 
+@timed("load_country")
 def load_country(country="greece", fields=cfg.FIELDS):
     # sourcery skip: raise-specific-error
     """### Load country proxy function
 
     Parameters:
 
-        country (str): Country name
+        country (str): registered league key (see ``sp_soccer_lib.leagues``)
     """
-    if country == "greece":
-        return load_greece(fields)
-    elif country == "italy":
-        return load_italy(fields)
-    elif country == "england":
-        return load_england(fields)
-    elif country == "spain":
-        return load_spain(fields)
-    elif country == "germany":
-        return load_germany(fields)
-    elif country == "france":
-        return load_france(fields)
-    else:
-        raise Exception("Not Found Country!")
+    try:
+        league = leagues.LEAGUES[country]
+    except KeyError:
+        raise Exception("Not Found Country!") from None
+    df = country_dataframe(league.key, fields)
+    count("rows_loaded", len(df))
+    return df
 
 
 def calc_c_prob(row):
@@ -147,7 +150,15 @@ def calc_period_draw_rate(team_df, period):
     return round(draws / total_matches, 4)
 
 
-def team_stats(team_dfs, sort_by="current_period_pts", verbose=0):
+@timed("team_stats")
+def team_stats(
+    team_dfs,
+    sort_by="current_period_pts",
+    verbose=0,
+    ratings=None,
+    posterior=False,
+    form_windows=None,
+):
     """### Cumulative team stats for all available periods
 
     Parameters:
@@ -158,6 +169,15 @@ def team_stats(team_dfs, sort_by="current_period_pts", verbose=0):
         sort_by (str): sorting method (currently only "current_period_pts" implemented).
                     Leaves sorting unchanged if "None"
         verbose (int): reporting level (1: prints resulting dataframe, 2: prints also team dictionary)
+        ratings (EloRatings or dict): adds an "Elo" column with each team's rating
+                    (see sp_soccer_lib.elo; teams without one get INITIAL_RATING);
+                    left out by default
+        posterior (bool): adds the current period's Beta posterior draw rate and its
+                    credible interval (p_draw_post, p_draw_low, p_draw_high, see
+                    sp_soccer_lib.draw_rates); ``p_draw`` stays the raw ratio
+        form_windows (tuple): adds each team's form over its last n matches for every
+                    n (pts_last<n>, draw_rate_last<n>, gf_last<n>, ga_last<n>, see
+                    sp_soccer_lib.form); left out by default
 
     Returns:
 
@@ -199,7 +219,26 @@ def team_stats(team_dfs, sort_by="current_period_pts", verbose=0):
     df["c_prob"] = df.apply(calc_c_prob, axis=1)
     df["c_prob_adj"] = df.apply(calc_c_prob_adj, axis=1)
 
+    if ratings is not None:
+        from .elo import INITIAL_RATING
+
+        ratings = getattr(ratings, "ratings", ratings)  # EloRatings or team -> rating
+        df["Elo"] = df["Name"].map(lambda team: round(ratings.get(team, INITIAL_RATING), 1))
+
     df.set_index("Name", inplace=True)
+    if posterior:
+        from .draw_rates import BetaPosteriors
+
+        columns = ["p_draw_post", "p_draw_low", "p_draw_high"]
+        rates = BetaPosteriors.from_team_dfs(team_dfs)
+        if cfg.CURRENT_PERIOD in rates.periods:
+            df = df.join(rates.to_frame(cfg.CURRENT_PERIOD)[columns])
+        else:
+            df[columns] = float("nan")
+    if form_windows:
+        from .form import current_form
+
+        df = df.join(current_form(team_dfs, form_windows))
     if sort_by == "current_period_pts":
         df.sort_values(
             by=[
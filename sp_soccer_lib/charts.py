@@ -0,0 +1,123 @@
+"""Inline SVG charts for the handout pages.
+
+Lightweight replacement for the matplotlib histogram/boxplot PNGs drawn by
+``soccer1.frequency_graphs``. Both charts are computed straight from the
+``Counter`` of no-draw streak lengths (value -> occurrences), so no figure is
+created and nothing is written next to the page.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+WIDTH = 300
+HEIGHT = 200
+MARGIN = 24
+BAR_COLOR = "#1f77b4"
+
+
+def _expand(freq: Counter) -> tuple:
+    values = np.fromiter(freq.keys(), dtype=float, count=len(freq))
+    counts = np.fromiter(freq.values(), dtype=float, count=len(freq))
+    order = np.argsort(values)
+    return values[order], counts[order]
+
+
+def _svg(body: list, width: int, height: int) -> str:
+    return (
+        f'<svg class="chart" xmlns="http://www.w3.org/2000/svg" width="80%" '
+        f'viewBox="0 0 {width} {height}" style="display:block;margin:auto">'
+        + "".join(body)
+        + "</svg>"
+    )
+
+
+def _axis_labels(low: float, high: float, y: float, scale, ticks: int = 5) -> list:
+    body = []
+    for tick in np.linspace(low, high, ticks):
+        x = scale(tick)
+        body.append(
+            f'<text x="{x:.1f}" y="{y:.1f}" font-size="9" text-anchor="middle">{tick:g}</text>'
+        )
+    return body
+
+
+def histogram_svg(freq: Counter, bins: int = 10, width: int = WIDTH, height: int = HEIGHT):
+    """### Histogram of streak lengths with the same binning as ``ax.hist`` (10 equal bins)."""
+    values, counts = _expand(freq)
+    heights, edges = np.histogram(values, bins=bins, weights=counts)
+    plot_w, plot_h = width - 2 * MARGIN, height - 2 * MARGIN
+    low, high = edges[0], edges[-1]
+    span = (high - low) or 1.0
+    top = heights.max() or 1.0
+
+    def scale_x(v):
+        return MARGIN + (v - low) / span * plot_w
+
+    body = [
+        f'<line x1="{MARGIN}" y1="{height - MARGIN}" x2="{width - MARGIN}" '
+        f'y2="{height - MARGIN}" stroke="black"/>'
+    ]
+    for count, left, right in zip(heights, edges[:-1], edges[1:], strict=True):
+        bar_h = count / top * plot_h
+        body.append(
+            f'<rect x="{scale_x(left):.1f}" y="{height - MARGIN - bar_h:.1f}" '
+            f'width="{max(scale_x(right) - scale_x(left) - 1, 0.5):.1f}" height="{bar_h:.1f}" '
+            f'fill="{BAR_COLOR}"><title>{left:g}-{right:g}: {count:g}</title></rect>'
+        )
+    body += _axis_labels(low, high, height - MARGIN + 12, scale_x)
+    body.append(f'<text x="4" y="{MARGIN - 8}" font-size="9">max {top:g}</text>')
+    return _svg(body, width, height)
+
+
+def boxplot_stats(freq: Counter) -> dict:
+    """### Quartiles, 1.5 IQR whiskers and fliers as matplotlib's boxplot computes them."""
+    values, counts = _expand(freq)
+    data = np.repeat(values, counts.astype(int))
+    q1, median, q3 = np.percentile(data, [25, 50, 75])
+    iqr = q3 - q1
+    inside = data[(data >= q1 - 1.5 * iqr) & (data <= q3 + 1.5 * iqr)]
+    low, high = inside.min(), inside.max()
+    return {
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "whislo": low,
+        "whishi": high,
+        "fliers": np.unique(data[(data < low) | (data > high)]),
+    }
+
+
+def boxplot_svg(freq: Counter, width: int = WIDTH, height: int = HEIGHT // 2):
+    """### Horizontal boxplot of streak lengths."""
+    stats = boxplot_stats(freq)
+    values, _ = _expand(freq)
+    low, high = values[0], values[-1]
+    span = (high - low) or 1.0
+    plot_w = width - 2 * MARGIN
+    mid = (height - 12) / 2
+    box_h = height / 3
+
+    def scale_x(v):
+        return MARGIN + (v - low) / span * plot_w
+
+    x = {key: scale_x(stats[key]) for key in ("whislo", "q1", "median", "q3", "whishi")}
+    body = [
+        f'<line x1="{x["whislo"]:.1f}" y1="{mid:.1f}" x2="{x["q1"]:.1f}" y2="{mid:.1f}" stroke="black"/>',
+        f'<line x1="{x["q3"]:.1f}" y1="{mid:.1f}" x2="{x["whishi"]:.1f}" y2="{mid:.1f}" stroke="black"/>',
+        f'<rect x="{x["q1"]:.1f}" y="{mid - box_h / 2:.1f}" width="{x["q3"] - x["q1"]:.1f}" '
+        f'height="{box_h:.1f}" fill="none" stroke="black"/>',
+        f'<line x1="{x["median"]:.1f}" y1="{mid - box_h / 2:.1f}" x2="{x["median"]:.1f}" '
+        f'y2="{mid + box_h / 2:.1f}" stroke="orange" stroke-width="2"/>',
+    ]
+    for key in ("whislo", "whishi"):
+        body.append(
+            f'<line x1="{x[key]:.1f}" y1="{mid - box_h / 4:.1f}" x2="{x[key]:.1f}" '
+            f'y2="{mid + box_h / 4:.1f}" stroke="black"/>'
+        )
+    for flier in stats["fliers"]:
+        body.append(
+            f'<circle cx="{scale_x(flier):.1f}" cy="{mid:.1f}" r="2.5" fill="none" stroke="black"/>'
+        )
+    body += _axis_labels(low, high, height - 2, scale_x)
+    return _svg(body, width, height)
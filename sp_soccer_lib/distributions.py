@@ -0,0 +1,423 @@
+"""NumPy-backed Hist, Pmf and Cdf with the thinkstats2 method names.
+
+The vendored ``external/thinkstats2.py`` classes keep a dict and loop over it
+in Python for every statistic, sample and sum of distributions. These keep a
+sorted support array ``xs`` and a weight array (``ws``: counts for Hist,
+probabilities for Pmf; ``ps`` cumulative for Cdf), so the same calls are array
+operations:
+
+    hist = Hist.from_arrays(*country_distribution("greece").histogram(), label="Greece")
+    pmf = Pmf(no_draw_frequencies("greece"))
+    pmf.Mean(), pmf.Percentile(90), pmf.Sample(100_000)
+    two_streaks = pmf + pmf  # convolution
+
+They plot with ``external/thinkplot`` (``Render()`` and ``label``), and
+``from_thinkstats`` / ``to_thinkstats`` convert to and from the vendored classes.
+"""
+
+import numpy as np
+
+DEFAULT_LABEL = "_nolegend_"  # as thinkstats2: not shown in plot legends
+# Largest span of integer values convolved on a dense grid (np.convolve)
+DENSE_SPAN = 1_000_000
+
+_RNG = np.random.default_rng()
+
+
+def _aggregate(xs, ws):
+    """Sorted unique xs with the weights of equal values summed."""
+    xs = np.asarray(xs)
+    ws = np.asarray(ws, dtype=float)
+    if not len(xs):
+        return xs, ws
+    support, inverse = np.unique(xs, return_inverse=True)
+    return support, np.bincount(inverse.ravel(), weights=ws.ravel(), minlength=len(support))
+
+
+def _is_integer(xs):
+    return np.issubdtype(np.asarray(xs).dtype, np.integer)
+
+
+class _Distribution:
+    """Sorted support ``xs`` with weights ``ws``."""
+
+    def __init__(self, obj=None, label=None):
+        """### Build from observations, a dict / Series of value -> weight, or another distribution
+
+        Parameters:
+
+            obj: list or array of values, dict, Hist, Pmf, Cdf (or thinkstats2 classes)
+            label (str): plot label, default the label of obj
+        """
+        self.label = label if label is not None else getattr(obj, "label", DEFAULT_LABEL)
+        if obj is None:
+            xs, ws = np.zeros(0), np.zeros(0)
+        elif isinstance(obj, Cdf):
+            xs, ws = obj.xs, np.diff(obj.ps, prepend=0.0)
+        elif isinstance(obj, _Distribution):
+            xs, ws = obj.xs, obj.ws
+        elif hasattr(obj, "Items") or hasattr(obj, "items"):
+            items = list(obj.Items() if hasattr(obj, "Items") else obj.items())
+            xs = np.asarray([x for x, _ in items])
+            ws = np.asarray([w for _, w in items], dtype=float)
+        else:
+            xs, counts = np.unique(np.asarray(obj), return_counts=True)
+            ws = counts.astype(float)
+        self.xs, self.ws = _aggregate(xs, ws)
+        self._normalize_on_init()
+
+    def _normalize_on_init(self):
+        pass
+
+    @classmethod
+    def from_arrays(cls, xs, ws, label=None):
+        """### From values and their weights (need not be sorted or unique)"""
+        new = cls.__new__(cls)
+        new.label = label if label is not None else DEFAULT_LABEL
+        new.xs, new.ws = _aggregate(xs, ws)
+        new._normalize_on_init()
+        return new
+
+    def _index(self, x):
+        i = np.searchsorted(self.xs, x)
+        if i < len(self.xs) and self.xs[i] == x:
+            return i
+        return None
+
+    def _weights(self, xs):
+        xs = np.asarray(xs)
+        i = np.clip(np.searchsorted(self.xs, xs), 0, max(len(self.xs) - 1, 0))
+        if not len(self.xs):
+            return np.zeros(xs.shape)
+        return np.where(self.xs[i] == xs, self.ws[i], 0.0)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __iter__(self):
+        return iter(self.xs.tolist())
+
+    def __contains__(self, x):
+        return self._index(x) is not None
+
+    def __getitem__(self, x):
+        i = self._index(x)
+        return 0 if i is None else self.ws[i]
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, _Distribution)
+            and np.array_equal(self.xs, other.xs)
+            and np.allclose(self.ws, other.ws)
+        )
+
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.Items())!r}, {self.label!r})"
+
+    def Copy(self, label=None):
+        return type(self).from_arrays(self.xs.copy(), self.ws.copy(), label or self.label)
+
+    def Values(self):
+        return self.xs
+
+    def Items(self):
+        return list(zip(self.xs.tolist(), self.ws.tolist(), strict=True))
+
+    SortedItems = Items
+
+    def Render(self, **options):
+        return self.xs, self.ws
+
+    def Print(self):
+        for x, w in self.Items():
+            print(x, w)
+
+    def Total(self):
+        return float(self.ws.sum())
+
+    def MaxLike(self):
+        return float(self.ws.max())
+
+    def Largest(self, n=10):
+        return self.Items()[::-1][:n]
+
+    def Smallest(self, n=10):
+        return self.Items()[:n]
+
+    def MakeCdf(self, label=None):
+        return Cdf(self, label=label if label is not None else self.label)
+
+
+class Hist(_Distribution):
+    """Value -> frequency."""
+
+    def Freq(self, x):
+        return self[x]
+
+    def Freqs(self, xs):
+        return self._weights(xs)
+
+    def IsSubset(self, other):
+        return bool(np.all(self.ws <= other._weights(self.xs)))
+
+    def Subtract(self, other):
+        """### Subtract other's frequencies in place (values may go to zero or below)"""
+        self.xs, self.ws = _aggregate(
+            np.concatenate((self.xs, other.xs)), np.concatenate((self.ws, -other.ws))
+        )
+
+
+class Pmf(_Distribution):
+    """Value -> probability, normalized on construction."""
+
+    def _normalize_on_init(self):
+        if len(self.ws):
+            self.Normalize()
+
+    def Normalize(self, fraction=1):
+        total = self.ws.sum()
+        if total == 0:
+            raise ValueError("Normalize: total probability is zero.")
+        self.ws = self.ws * (fraction / total)
+        return float(total)
+
+    def Prob(self, x, default=0):
+        i = self._index(x)
+        return default if i is None else float(self.ws[i])
+
+    def Probs(self, xs):
+        return self._weights(xs)
+
+    def ProbGreater(self, x):
+        if isinstance(x, Pmf):
+            return (self - x).ProbGreater(0)
+        return float(self.ws[self.xs > x].sum())
+
+    def ProbLess(self, x):
+        if isinstance(x, Pmf):
+            return (self - x).ProbLess(0)
+        return float(self.ws[self.xs < x].sum())
+
+    def ProbEqual(self, x):
+        if isinstance(x, Pmf):
+            return (self - x).Prob(0)
+        return self.Prob(x)
+
+    def Percentile(self, percentage):
+        cumulative = np.cumsum(self.ws)
+        i = np.searchsorted(cumulative, percentage / 100)
+        return self.xs[min(i, len(self.xs) - 1)]
+
+    def Mean(self):
+        return float(np.dot(self.xs, self.ws))
+
+    def Var(self, mu=None):
+        mu = self.Mean() if mu is None else mu
+        return float(np.dot((self.xs - mu) ** 2, self.ws))
+
+    def Std(self, mu=None):
+        return float(np.sqrt(self.Var(mu)))
+
+    def Median(self):
+        return self.MakeCdf().Percentile(50)
+
+    def Mode(self):
+        return self.xs[np.argmax(self.ws)]
+
+    MAP = Mode
+    MaximumLikelihood = Mode
+
+    def Expect(self, func):
+        return float(np.dot(func(self.xs), self.ws))
+
+    def CredibleInterval(self, percentage=90):
+        return self.MakeCdf().CredibleInterval(percentage)
+
+    def Random(self, rng=None):
+        return self.MakeCdf().Random(rng)
+
+    def Sample(self, n, rng=None):
+        return self.MakeCdf().Sample(n, rng)
+
+    def _combine(self, other, op):
+        if (
+            op is np.add
+            and _is_integer(self.xs)
+            and _is_integer(other.xs)
+            and len(self.xs)
+            and len(other.xs)
+            and (self.xs[-1] - self.xs[0]) + (other.xs[-1] - other.xs[0]) < DENSE_SPAN
+        ):
+            # Integer supports: one convolution over the dense grids
+            dense = [np.zeros(d.xs[-1] - d.xs[0] + 1) for d in (self, other)]
+            dense[0][self.xs - self.xs[0]] = self.ws
+            dense[1][other.xs - other.xs[0]] = other.ws
+            ws = np.convolve(dense[0], dense[1])
+            xs = np.arange(len(ws)) + self.xs[0] + other.xs[0]
+            reached = ws > 0
+            return Pmf.from_arrays(xs[reached], ws[reached])
+        return Pmf.from_arrays(op.outer(self.xs, other.xs), np.outer(self.ws, other.ws))
+
+    def AddPmf(self, other):
+        return self._combine(other, np.add)
+
+    def SubPmf(self, other):
+        return self.AddPmf(Pmf.from_arrays(-other.xs, other.ws))
+
+    def MulPmf(self, other):
+        return self._combine(other, np.multiply)
+
+    def DivPmf(self, other):
+        return self._combine(other, np.true_divide)
+
+    def AddConstant(self, other):
+        return Pmf.from_arrays(self.xs + other, self.ws, self.label)
+
+    def MulConstant(self, other):
+        return Pmf.from_arrays(self.xs * other, self.ws, self.label)
+
+    def __add__(self, other):
+        return self.AddPmf(other) if isinstance(other, Pmf) else self.AddConstant(other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self.SubPmf(other) if isinstance(other, Pmf) else self.AddConstant(-other)
+
+    def __mul__(self, other):
+        return self.MulPmf(other) if isinstance(other, Pmf) else self.MulConstant(other)
+
+    def __truediv__(self, other):
+        return self.DivPmf(other) if isinstance(other, Pmf) else self.MulConstant(1 / other)
+
+    def Max(self, k):
+        return self.MakeCdf().Max(k)
+
+
+class Cdf:
+    """Sorted values ``xs`` with cumulative probabilities ``ps``."""
+
+    def __init__(self, obj=None, ps=None, label=None):
+        """### From a distribution or observations, or from ``xs`` (obj) and ``ps`` arrays"""
+        self.label = label if label is not None else getattr(obj, "label", DEFAULT_LABEL)
+        if ps is not None:
+            self.xs, self.ps = np.asarray(obj), np.asarray(ps, dtype=float)
+            return
+        if isinstance(obj, Cdf) or (hasattr(obj, "xs") and hasattr(obj, "ps")):
+            self.xs, self.ps = np.array(obj.xs), np.array(obj.ps, dtype=float)
+            return
+        dist = obj if isinstance(obj, _Distribution) else Hist(obj)
+        self.xs = dist.xs
+        self.ps = np.cumsum(dist.ws)
+        if len(self.ps):
+            self.ps /= self.ps[-1]
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __getitem__(self, x):
+        return self.Prob(x)
+
+    def __eq__(self, other):
+        return np.array_equal(self.xs, other.xs) and np.allclose(self.ps, other.ps)
+
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return f"Cdf({self.xs!r}, {self.ps!r}, {self.label!r})"
+
+    def Copy(self, label=None):
+        return Cdf(self.xs.copy(), self.ps.copy(), label=label or self.label)
+
+    def MakePmf(self, label=None):
+        return Pmf(self, label=label if label is not None else self.label)
+
+    def Items(self):
+        return list(zip(self.xs.tolist(), np.diff(self.ps, prepend=0.0).tolist(), strict=True))
+
+    def Shift(self, term):
+        return Cdf(self.xs + term, self.ps.copy(), label=self.label)
+
+    def Scale(self, factor):
+        return Cdf(self.xs * factor, self.ps.copy(), label=self.label)
+
+    def Prob(self, x):
+        return float(self.Probs(np.asarray([x]))[0])
+
+    def Probs(self, xs):
+        xs = np.asarray(xs)
+        index = np.searchsorted(self.xs, xs, side="right")
+        return np.where(index > 0, self.ps[np.maximum(index - 1, 0)], 0.0)
+
+    def Value(self, p):
+        if p < 0 or p > 1:
+            raise ValueError("Probability p must be in range [0, 1]")
+        return self.xs[np.searchsorted(self.ps, p, side="left")]
+
+    def Values(self, ps=None):
+        if ps is None:
+            return self.xs
+        ps = np.asarray(ps)
+        if np.any(ps < 0) or np.any(ps > 1):
+            raise ValueError("Probability p must be in range [0, 1]")
+        # ps[-1] may round to just under 1
+        return self.xs[np.minimum(np.searchsorted(self.ps, ps, side="left"), len(self.xs) - 1)]
+
+    def Percentile(self, p):
+        return self.Value(p / 100)
+
+    def Percentiles(self, ps):
+        return self.Values(np.asarray(ps) / 100)
+
+    def PercentileRank(self, x):
+        return self.Prob(x) * 100
+
+    def PercentileRanks(self, xs):
+        return self.Probs(xs) * 100
+
+    def Random(self, rng=None):
+        return self.Values((rng or _RNG).random(1))[0]
+
+    def Sample(self, n, rng=None):
+        return self.Values((rng or _RNG).random(n))
+
+    def Mean(self):
+        return float(np.dot(self.xs, np.diff(self.ps, prepend=0.0)))
+
+    def CredibleInterval(self, percentage=90):
+        prob = (1 - percentage / 100) / 2
+        return self.Value(prob), self.Value(1 - prob)
+
+    def Render(self, **options):
+        """### Step-function points, as thinkstats2.Cdf.Render"""
+        xs = np.repeat(self.xs, 2)
+        ps = np.repeat(self.ps, 2)
+        ps[0::2] = np.concatenate(([0.0], self.ps[:-1]))
+        return xs, ps
+
+    def Max(self, k):
+        return Cdf(self.xs.copy(), self.ps**k, label=self.label)
+
+
+def from_thinkstats(obj):
+    """### Array-backed copy of a thinkstats2 / thinkbayes Hist, Pmf (Suite) or Cdf"""
+    if hasattr(obj, "xs") and hasattr(obj, "ps"):
+        return Cdf(obj)
+    if "Pmf" in {cls.__name__ for cls in type(obj).__mro__}:
+        return Pmf(obj)
+    return Hist(obj)
+
+
+def to_thinkstats(dist):
+    """### The equivalent ``external.thinkstats2`` object (for code that still needs one)"""
+    import external.thinkstats2 as thinkstats2
+
+    if isinstance(dist, Cdf):
+        return thinkstats2.Cdf(dist.xs.tolist(), dist.ps.tolist(), label=dist.label)
+    cls = thinkstats2.Pmf if isinstance(dist, Pmf) else thinkstats2.Hist
+    # Plain dict, so the Pmf is not renormalized (and floats stay exact)
+    new = cls(label=dist.label)
+    new.d = dict(dist.Items())
+    return new
@@ -0,0 +1,211 @@
+"""Beta posterior draw rates of every team, shrunk toward the league.
+
+``calc_period_draw_rate`` is a raw draws / matches ratio: 2 draws in 3 matches
+read as 0.67. Here each team-season's draw rate has a Beta(alpha, beta) prior
+fitted to the league by the method of moments (the spread of team-season draw
+rates beyond the binomial noise of their match counts), and the posterior after
+d draws in n matches is Beta(alpha + d, beta + n - d), as ``thinkbayes.Beta``
+updates, but for a (teams, periods) array at once:
+
+    rates = BetaPosteriors.from_frame(load_country("greece"))
+    rates.to_frame()          # posterior mean and credible interval per team
+
+``point_in_time`` gives the posterior mean before each match of a season (from
+the team's earlier matches of that season only) for the simulators.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import config as cfg
+from sp_soccer_lib.streak_distribution import team_match_arrays
+
+# Used when there are too few team-seasons to fit a prior: 27% draws, worth 10 matches
+DEFAULT_PRIOR = (2.7, 7.3)
+# Team-seasons with fewer matches do not take part in the prior fit
+MIN_PRIOR_MATCHES = 10
+# Cap of alpha + beta, reached when draw rates vary no more than binomial noise
+MAX_PRIOR_STRENGTH = 200.0
+# Credible interval of the posteriors
+CREDIBLE_LEVEL = 0.9
+
+
+def _count(n_teams, n_periods, team_ids, is_draw, period, played):
+    cells = (team_ids * n_periods + period)[played]
+    draws = np.bincount(cells[is_draw[played]], minlength=n_teams * n_periods)
+    matches = np.bincount(cells, minlength=n_teams * n_periods)
+    return draws.reshape(n_teams, n_periods), matches.reshape(n_teams, n_periods)
+
+
+def league_prior(draws, matches, min_matches=MIN_PRIOR_MATCHES):
+    """### Beta prior of team-season draw rates, by the method of moments
+
+    The variance of the observed rates is their true variance plus the binomial
+    noise p (1 - p) / n of each team-season; what is left after taking the noise
+    out sets the prior's strength alpha + beta = p (1 - p) / variance - 1.
+
+    Parameters:
+
+        draws (ndarray): draws per team-season (any shape)
+        matches (ndarray): matches per team-season, same shape
+        min_matches (int): smaller team-seasons are left out
+
+    Returns:
+
+        (tuple): (alpha, beta); ``DEFAULT_PRIOR`` with fewer than two team-seasons
+    """
+    draws, matches = np.asarray(draws).ravel(), np.asarray(matches).ravel()
+    used = matches >= max(min_matches, 1)
+    if used.sum() < 2:
+        return DEFAULT_PRIOR
+    rates = draws[used] / matches[used]
+    mean = rates.mean()
+    if not 0 < mean < 1:
+        return DEFAULT_PRIOR
+    variance = rates.var(ddof=1) - np.mean(mean * (1 - mean) / matches[used])
+    strength = MAX_PRIOR_STRENGTH
+    if variance > 0:
+        strength = min(mean * (1 - mean) / variance - 1, MAX_PRIOR_STRENGTH)
+    strength = max(strength, 1.0)
+    return float(mean * strength), float((1 - mean) * strength)
+
+
+def posterior_mean(drawn, played, prior):
+    """### Posterior mean draw rate after ``drawn`` draws in ``played`` matches (arrays)"""
+    alpha, beta = prior
+    return (alpha + np.asarray(drawn)) / (alpha + beta + np.asarray(played))
+
+
+@dataclass
+class BetaPosteriors:
+    """### Beta(alpha, beta) draw rate posteriors by team (rows) and period (columns)
+
+    Parameters:
+
+        teams (list): team names
+        periods (list): periods
+        draws (ndarray): (teams, periods) draws
+        matches (ndarray): (teams, periods) played matches
+        prior (tuple): (alpha, beta) every team-season starts from
+    """
+
+    teams: list
+    periods: list
+    draws: np.ndarray
+    matches: np.ndarray
+    prior: tuple = DEFAULT_PRIOR
+
+    @classmethod
+    def from_frame(cls, df, prior=None):
+        """### From a country's match frame (no team frame is built); prior fitted if None"""
+        teams, periods, team_ids, ftr, period = team_match_arrays(df)
+        draws, matches = _count(len(teams), len(periods), team_ids, ftr == 1, period, ftr >= 0)
+        return cls(teams, periods, draws, matches, prior or league_prior(draws, matches))
+
+    @classmethod
+    def from_team_dfs(cls, team_dfs, prior=None):
+        """### From built team frames (``create_team_df_dict()`` output)"""
+        teams = list(team_dfs)
+        frames = [team_dfs[team] for team in teams]
+        if not frames:
+            return cls([], [], np.zeros((0, 0), int), np.zeros((0, 0), int), prior or DEFAULT_PRIOR)
+        periods = list(pd.unique(np.concatenate([frame["period"].astype(str) for frame in frames])))
+        position = {p: i for i, p in enumerate(periods)}
+        team_ids = np.repeat(np.arange(len(teams)), [len(frame) for frame in frames])
+        period = np.concatenate([frame["period"].astype(str).map(position) for frame in frames])
+        played = np.concatenate([frame["FTR"].notna().to_numpy() for frame in frames])
+        is_draw = np.concatenate([(frame["FTR"] == "D").to_numpy() for frame in frames])
+        draws, matches = _count(len(teams), len(periods), team_ids, is_draw, period, played)
+        return cls(teams, periods, draws, matches, prior or league_prior(draws, matches))
+
+    @property
+    def alpha(self):
+        return self.prior[0] + self.draws
+
+    @property
+    def beta(self):
+        return self.prior[1] + self.matches - self.draws
+
+    def mean(self):
+        return self.alpha / (self.alpha + self.beta)
+
+    def interval(self, level=CREDIBLE_LEVEL):
+        """### (low, high) equal-tailed credible interval arrays"""
+        tail = (1 - level) / 2
+        return (
+            stats.beta.ppf(tail, self.alpha, self.beta),
+            stats.beta.ppf(1 - tail, self.alpha, self.beta),
+        )
+
+    def sample(self, n, rng=None):
+        """### n draws from every posterior, a (n, teams, periods) array"""
+        rng = rng if rng is not None else np.random.default_rng()
+        return rng.beta(self.alpha, self.beta, (n,) + self.draws.shape)
+
+    def to_frame(self, period=None, level=CREDIBLE_LEVEL):
+        """### One period's posteriors by team (default ``cfg.CURRENT_PERIOD``)
+
+        Returns:
+
+            (Pandas Dataframe): index Name; matches, draws, p_draw_post, p_draw_low
+                    and p_draw_high columns
+        """
+        column = self.periods.index(period or cfg.CURRENT_PERIOD)
+        low, high = self.interval(level)
+        return pd.DataFrame(
+            {
+                "matches": self.matches[:, column],
+                "draws": self.draws[:, column],
+                "p_draw_post": self.mean()[:, column].round(4),
+                "p_draw_low": low[:, column].round(4),
+                "p_draw_high": high[:, column].round(4),
+            },
+            index=pd.Index(self.teams, name="Name"),
+        )
+
+
+def point_in_time(team_df, prior=DEFAULT_PRIOR):
+    """### Posterior mean draw rate before each of a team's matches
+
+    Counts only the team's earlier matches of the same period, as the rolling
+    ``p_draw`` of the simulators, so there is no look-ahead.
+
+    Parameters:
+
+        team_df (DataFrame): the team's matches (created by create_team_df_dict())
+        prior (tuple): (alpha, beta), e.g. ``league_prior`` of earlier seasons
+
+    Returns:
+
+        (ndarray): one posterior mean per row of team_df
+    """
+    period = team_df["period"].astype(str).to_numpy()
+    played = team_df["FTR"].notna().to_numpy()
+    drawn = (team_df["FTR"] == "D").to_numpy()
+    starts = np.ones(len(period), dtype=bool)
+    starts[1:] = period[1:] != period[:-1]
+    segment = np.cumsum(starts) - 1
+    # Counts before each match: cumulative sums restarted at every period
+    played_before = np.cumsum(played) - played
+    drawn_before = np.cumsum(drawn) - drawn
+    first = np.flatnonzero(starts)
+    played_before = played_before - played_before[first][segment]
+    drawn_before = drawn_before - drawn_before[first][segment]
+    return posterior_mean(drawn_before, played_before, prior)
+
+
+def priors_by_period(df):
+    """### Prior of each period from the league's earlier periods only
+
+    Returns:
+
+        (dict): period -> (alpha, beta) (``DEFAULT_PRIOR`` for the first)
+    """
+    rates = BetaPosteriors.from_frame(df, prior=DEFAULT_PRIOR)
+    return {
+        period: league_prior(rates.draws[:, :i], rates.matches[:, :i])
+        for i, period in enumerate(rates.periods)
+    }
@@ -0,0 +1,234 @@
+"""Elo ratings with a draw-aware expected score, kept up to date incrementally.
+
+Result probabilities follow Davidson's extension of Elo: with
+g = 10 ** ((home rating + HOME_ADVANTAGE - away rating) / 400),
+
+    P(home) = g / (g + 1 + nu sqrt(g)),  P(draw) = nu sqrt(g) / (...),  P(away) = 1 / (...)
+
+so equal teams draw with probability nu / (2 + nu). The expected home score is
+P(home) + P(draw) / 2 and both ratings move by K times the surprise. At the
+start of each period ratings move ``SEASON_REVERSION`` of the way back to the
+mean.
+
+``EloRatings.process(df)`` applies only the matches with a result it has not
+applied yet (it keeps their keys), so the daily update keeps each league's
+state in a JSON file (``update_ratings``) and applies just the new matches;
+``replay`` rebuilds a league from its full history for backfills. The loop runs
+over plain Python lists, one step per match.
+"""
+
+import json
+import math
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 60.0  # rating points
+# nu of the draw probability: equal teams draw 27% of the time
+DRAW_NU = 2 * 0.27 / (1 - 0.27)
+SEASON_REVERSION = 0.25
+
+RATING_COLUMNS = ["elo_home", "elo_away", "elo_p_draw"]
+
+
+def result_probabilities(home_rating, away_rating, home_advantage=HOME_ADVANTAGE, nu=DRAW_NU):
+    """### (home win, draw, away win) probabilities of ratings (floats or arrays)"""
+    g = np.power(10.0, (np.asarray(home_rating) + home_advantage - np.asarray(away_rating)) / 400)
+    draw = nu * np.sqrt(g)
+    total = g + 1 + draw
+    return g / total, draw / total, 1 / total
+
+
+def match_keys(df):
+    """### "date|home|away" of every row of a match frame (an object array)"""
+    dates = np.asarray(df.index.strftime("%Y-%m-%d"), dtype=object)
+    home = df["HomeTeam"].astype(str).to_numpy(dtype=object)
+    away = df["AwayTeam"].astype(str).to_numpy(dtype=object)
+    return dates + "|" + home + "|" + away
+
+
+@dataclass
+class EloRatings:
+    """### Ratings of one league and how far through its matches they are
+
+    Parameters:
+
+        ratings (dict): team -> rating
+        applied (list): ``match_keys`` of the applied matches
+        last_date (str): date (ISO) of the latest applied match
+        period (str): period of the last applied match
+        matches (int): matches applied so far
+    """
+
+    ratings: dict = field(default_factory=dict)
+    applied: list = field(default_factory=list)
+    last_date: str | None = None
+    period: str | None = None
+    matches: int = 0
+    k_factor: float = K_FACTOR
+    home_advantage: float = HOME_ADVANTAGE
+    nu: float = DRAW_NU
+    season_reversion: float = SEASON_REVERSION
+
+    def rating(self, team):
+        return self.ratings.get(team, INITIAL_RATING)
+
+    def _reset(self):
+        self.ratings, self.applied, self.last_date, self.period, self.matches = (
+            {},
+            [],
+            None,
+            None,
+            0,
+        )
+
+    def _apply(self, df):
+        """### Apply df's matches that have a result and are not applied yet
+
+        Returns:
+
+            (tuple): positions of the applied rows in df (in date order) and their
+                        (matches, 3) pre-match ``RATING_COLUMNS`` values
+        """
+        keys = match_keys(df)
+        dates = df.index.to_numpy()
+        played = df["FTR"].notna().to_numpy()
+        new = played & ~np.isin(keys, self.applied)
+        if new.any() and self.last_date is not None:
+            late = dates[new] < np.datetime64(self.last_date)
+            if late.any():
+                if np.isin(self.applied, keys).all():
+                    # df holds every applied match: start over so the order is exact
+                    self._reset()
+                    new = played
+                else:
+                    logger.warning(
+                        f"Elo: {int(late.sum())} late result(s) dated before {self.last_date} "
+                        "applied out of date order (replay() rebuilds exactly)"
+                    )
+        positions = np.flatnonzero(new)
+        positions = positions[np.argsort(dates[positions], kind="stable")]
+        homes = df["HomeTeam"].astype(str).to_numpy()[positions].tolist()
+        aways = df["AwayTeam"].astype(str).to_numpy()[positions].tolist()
+        results = df["FTR"].astype(str).to_numpy()[positions].tolist()
+        periods = df["period"].astype(str).to_numpy()[positions].tolist()
+        ratings, k, nu = self.ratings, self.k_factor, self.nu
+        home_factor = 10 ** (self.home_advantage / 400)
+        before = np.empty((len(positions), 3))
+        score = {"H": 1.0, "D": 0.5, "A": 0.0}
+        for i, (home, away, result, period) in enumerate(
+            zip(homes, aways, results, periods, strict=True)
+        ):
+            if period != self.period:
+                if self.period is not None and ratings:
+                    mean = sum(ratings.values()) / len(ratings)
+                    for team, rating in ratings.items():
+                        ratings[team] = rating + self.season_reversion * (mean - rating)
+                self.period = period
+            home_rating = ratings.get(home, INITIAL_RATING)
+            away_rating = ratings.get(away, INITIAL_RATING)
+            g = home_factor * 10 ** ((home_rating - away_rating) / 400)
+            draw = nu * math.sqrt(g)
+            total = g + 1 + draw
+            before[i] = home_rating, away_rating, draw / total
+            change = k * (score[result] - (g + draw / 2) / total)
+            ratings[home] = home_rating + change
+            ratings[away] = away_rating - change
+        if len(positions):
+            last = pd.Timestamp(dates[positions].max())
+            if self.last_date is None or last > pd.Timestamp(self.last_date):
+                self.last_date = last.isoformat()
+            self.applied = self.applied + keys[positions].tolist()
+            self.matches += len(positions)
+        return positions, before
+
+    def process(self, df):
+        """### Apply the matches of df not applied yet, in date order
+
+        Rows without a result (postponed or not played yet) are left out and
+        applied once their result comes in. A result dated before matches that
+        were already applied rebuilds the ratings from df when df holds all of
+        them (e.g. the full history), else it is applied now, out of date order.
+
+        Parameters:
+
+            df (DataFrame): a league's matches (Date index; HomeTeam, AwayTeam, FTR,
+                        period), e.g. ``load_country()`` output
+
+        Returns:
+
+            (Pandas Dataframe): the applied matches' pre-match ratings and Elo draw
+                        probability (``RATING_COLUMNS``), df's index
+        """
+        positions, before = self._apply(df)
+        return pd.DataFrame(before, index=df.index[positions], columns=RATING_COLUMNS)
+
+    @classmethod
+    def replay(cls, df, **options):
+        """### Ratings built from a league's full history, and the per-match table"""
+        ratings = cls(**options)
+        return ratings, ratings.process(df)
+
+    def table(self):
+        """### Ratings as a Series, best first"""
+        return pd.Series(self.ratings, name="Elo", dtype=float).sort_values(ascending=False)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+
+def with_ratings(df, **options):
+    """### df with the pre-match ``RATING_COLUMNS`` of every match (full replay)
+
+    Rows without a result get NaN.
+    """
+    positions, before = EloRatings(**options)._apply(df)
+    values = np.full((len(df), len(RATING_COLUMNS)), np.nan)
+    values[positions] = before
+    return df.assign(**dict(zip(RATING_COLUMNS, values.T, strict=True)))
+
+
+def load_ratings(state_file):
+    """### League -> EloRatings saved by ``save_ratings``, empty if there are none"""
+    try:
+        with open(state_file) as f:
+            return {league: EloRatings.from_dict(d) for league, d in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_ratings(state_file, states):
+    tmp_file = state_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({league: state.to_dict() for league, state in states.items()}, f, indent=1)
+    os.replace(tmp_file, state_file)
+
+
+def update_ratings(frames, state_file=None):
+    """### Bring each league's saved ratings up to date with its frame
+
+    Parameters:
+
+        frames (dict): league -> match frame (full history or just the current period)
+        state_file (str): JSON state of the previous run, rewritten (None: replay
+                    every league from its frame and save nothing)
+
+    Returns:
+
+        (dict): league -> EloRatings
+    """
+    states = load_ratings(state_file) if state_file else {}
+    for league, df in frames.items():
+        states.setdefault(league, EloRatings()).process(df)
+    if state_file:
+        save_ratings(state_file, states)
+    return states
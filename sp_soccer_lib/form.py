@@ -0,0 +1,136 @@
+"""Last-N-match form of every team: points, draw rate and goals.
+
+All teams' matches are stacked team by team (in date order) and each measure
+is summed once with ``np.cumsum``; the total over a team's last n matches is
+then the difference of two cumulative sums, so every window size costs one
+subtraction over all matches, without ``tail(n)`` per team and date:
+
+    team_dfs = add_form(create_team_df_dict(df), windows=(5, 10))
+    team_dfs["AEK"][["pts_last5", "draw_rate_last5"]]
+
+Windows either span period boundaries (the last n matches, whatever the
+season) or restart at each period (``by_period=True``), as the no-draw streaks
+do. A window includes the row's own match, and matches without a result count
+as neither played nor drawn.
+"""
+
+import numpy as np
+import pandas as pd
+
+WINDOWS = (5, 10)
+MEASURES = ("pts", "draw_rate", "gf", "ga")
+
+
+def form_columns(windows=WINDOWS):
+    """### Names of the form columns, e.g. pts_last5, draw_rate_last5, gf_last5, ga_last5"""
+    return [f"{measure}_last{n}" for n in windows for measure in MEASURES]
+
+
+def _stacked(team_dfs):
+    """Per stacked match: segment start flags (new team / period) and played, draw,
+    points, goals for, goals against."""
+    teams = list(team_dfs)
+    frames = [team_dfs[team] for team in teams]
+    if not frames:
+        return teams, [], np.zeros(0, dtype=bool), np.zeros(0, dtype=bool), np.zeros((0, 5))
+    lengths = [len(frame) for frame in frames]
+    is_home = np.concatenate(
+        [(frame["HomeTeam"] == team).to_numpy() for team, frame in zip(teams, frames, strict=True)]
+    )
+    ftr = pd.concat([frame["FTR"].astype(object) for frame in frames]).to_numpy()
+    home_goals = np.concatenate([frame["FTHG"].to_numpy(dtype=float) for frame in frames])
+    away_goals = np.concatenate([frame["FTAG"].to_numpy(dtype=float) for frame in frames])
+    period = np.concatenate([frame["period"].astype(str).to_numpy() for frame in frames])
+
+    team_starts = np.zeros(len(ftr), dtype=bool)
+    team_starts[np.cumsum([0] + lengths[:-1])] = True
+    period_starts = team_starts.copy()
+    period_starts[1:] |= period[1:] != period[:-1]
+
+    played = pd.notna(ftr)
+    draw = ftr == "D"
+    win = ((ftr == "H") & is_home) | ((ftr == "A") & ~is_home)
+    goals_for = np.where(is_home, home_goals, away_goals)
+    goals_against = np.where(is_home, away_goals, home_goals)
+    values = np.column_stack(
+        (
+            played,
+            draw,
+            3 * win + draw,
+            np.where(played, np.nan_to_num(goals_for), 0),
+            np.where(played, np.nan_to_num(goals_against), 0),
+        )
+    ).astype(float)
+    return teams, lengths, team_starts, period_starts, values
+
+
+def rolling_sums(values, starts, window):
+    """### Sums of each row's last ``window`` rows, not reaching back past a segment start
+
+    Parameters:
+
+        values (ndarray): (rows, measures) values
+        starts (ndarray): bool per row, True where a segment (team, or team-period) starts
+        window (int): rows per window, including the row itself
+
+    Returns:
+
+        (ndarray): (rows, measures) window sums
+    """
+    totals = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=totals[1:])
+    rows = np.arange(len(values))
+    segment_start = np.flatnonzero(starts)[np.cumsum(starts) - 1]
+    first = np.maximum(rows - window + 1, segment_start)
+    return totals[rows + 1] - totals[first]
+
+
+def _form(values, starts, windows):
+    """(rows, len(windows) * len(MEASURES)) form values, in form_columns() order."""
+    columns = []
+    for n in windows:
+        played, draws, points, goals_for, goals_against = rolling_sums(values, starts, n).T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            draw_rate = np.where(played > 0, (draws / played).round(4), np.nan)
+        columns += [points, draw_rate, goals_for, goals_against]
+    return np.column_stack(columns) if columns else np.zeros((len(values), 0))
+
+
+def add_form(team_dfs, windows=WINDOWS, by_period=False):
+    """### Add the ``form_columns(windows)`` to every team frame (in place)
+
+    Parameters:
+
+        team_dfs (dict): team -> team frame (created by create_team_df_dict())
+        windows (tuple): window sizes in matches
+        by_period (bool): restart the windows at each period instead of spanning them
+
+    Returns:
+
+        (dict): team_dfs
+    """
+    teams, lengths, team_starts, period_starts, values = _stacked(team_dfs)
+    if not teams:
+        return team_dfs
+    form = _form(values, period_starts if by_period else team_starts, windows)
+    columns = form_columns(windows)
+    for team, block in zip(teams, np.split(form, np.cumsum(lengths)[:-1]), strict=True):
+        team_dfs[team][columns] = block
+    return team_dfs
+
+
+def current_form(team_dfs, windows=WINDOWS, by_period=False):
+    """### Each team's form after its last match
+
+    Returns:
+
+        (Pandas Dataframe): index Name; ``form_columns(windows)``
+    """
+    teams, lengths, team_starts, period_starts, values = _stacked(team_dfs)
+    form = _form(values, period_starts if by_period else team_starts, windows)
+    last = np.cumsum(lengths, dtype=np.int64) - 1
+    return pd.DataFrame(
+        form[last],
+        index=pd.Index(teams, name="Name"),
+        columns=form_columns(windows),
+    )
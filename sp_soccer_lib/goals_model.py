@@ -0,0 +1,312 @@
+"""Dixon-Coles goals model: draw probabilities from FTHG / FTAG.
+
+Home goals ~ Poisson(lambda), away goals ~ Poisson(mu) with
+
+    lambda = exp(attack[home] + defence[away] + home_advantage)
+    mu     = exp(attack[away] + defence[home])
+
+(``defence`` is how many goals a team lets in: higher is weaker) and the
+Dixon-Coles factor tau(x, y) correcting the 0-0, 1-0, 0-1 and 1-1 scores by
+``rho``. The log-likelihood and its gradient are array expressions over all
+matches of a league-season (gradients gathered with ``np.bincount``), so
+L-BFGS-B fits a season in milliseconds.
+
+Daily updates start from the previous fit (``fit(df, previous=...)``,
+``fit_leagues(frames, state_file)``), which cuts iterations further, and
+``match_probabilities`` gives the model's home/draw/away probabilities of any
+fixtures next to the bookmakers' ``convert_dec_to_prob(B365D)``.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from scipy import optimize, stats
+
+import config as cfg
+from sp_soccer_lib.probabilities import convert_dec_to_prob
+
+# rho is kept where tau stays positive for realistic scoring rates
+RHO_BOUNDS = (-0.3, 0.3)
+# Goals per side summed over when turning rates into result probabilities
+MAX_GOALS = 10
+
+
+@dataclass
+class DixonColes:
+    """### A fitted league-season: parameters by team (in ``teams`` order)"""
+
+    teams: list
+    attack: np.ndarray
+    defence: np.ndarray
+    home_advantage: float = 0.0
+    rho: float = 0.0
+    log_likelihood: float = float("nan")
+    iterations: int = 0
+    matches: int = 0
+    extra: dict = field(default_factory=dict)  # e.g. league and period of the fit
+
+    def params(self):
+        return np.concatenate((self.attack, self.defence, [self.home_advantage, self.rho]))
+
+    def rates(self, home, away):
+        """### Expected home and away goals of fixtures (team names or indices)"""
+        home, away = self._indices(home), self._indices(away)
+        return (
+            np.exp(self.attack[home] + self.defence[away] + self.home_advantage),
+            np.exp(self.attack[away] + self.defence[home]),
+        )
+
+    def _indices(self, teams):
+        teams = np.asarray(teams)
+        if np.issubdtype(teams.dtype, np.integer):
+            return teams
+        position = {team: i for i, team in enumerate(self.teams)}
+        return np.asarray([position[team] for team in teams.tolist()], dtype=int)
+
+    def score_matrix(self, home, away, max_goals=MAX_GOALS):
+        """### P(home scores x, away scores y) as a (fixtures, x, y) array"""
+        lam, mu = self.rates(home, away)
+        goals = np.arange(max_goals + 1)
+        matrix = (
+            stats.poisson.pmf(goals, lam[:, None])[:, :, None]
+            * stats.poisson.pmf(goals, mu[:, None])[:, None, :]
+        )
+        matrix[:, 0, 0] *= 1 - lam * mu * self.rho
+        matrix[:, 0, 1] *= 1 + lam * self.rho
+        matrix[:, 1, 0] *= 1 + mu * self.rho
+        matrix[:, 1, 1] *= 1 - self.rho
+        return matrix
+
+    def result_probabilities(self, home, away, max_goals=MAX_GOALS):
+        """### (home win, draw, away win) probability arrays of fixtures"""
+        matrix = self.score_matrix(home, away, max_goals)
+        x, y = np.indices(matrix.shape[1:])
+        return (
+            matrix[:, x > y].sum(axis=1),
+            np.einsum("nii->n", matrix),
+            matrix[:, x < y].sum(axis=1),
+        )
+
+    def to_dict(self):
+        return {
+            "teams": list(self.teams),
+            "attack": self.attack.tolist(),
+            "defence": self.defence.tolist(),
+            "home_advantage": self.home_advantage,
+            "rho": self.rho,
+            "log_likelihood": self.log_likelihood,
+            "iterations": self.iterations,
+            "matches": self.matches,
+            "extra": self.extra,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**{**d, "attack": np.asarray(d["attack"]), "defence": np.asarray(d["defence"])})
+
+
+def match_arrays(df, teams=None):
+    """### Home / away team indices and goals of the played matches of a frame
+
+    Returns:
+
+        (tuple): teams (list), home, away, home goals, away goals (int arrays)
+    """
+    played = df[df["FTHG"].notna() & df["FTAG"].notna()]
+    if teams is None:
+        teams = sorted(set(played["HomeTeam"].astype(str)) | set(played["AwayTeam"].astype(str)))
+    position = {team: i for i, team in enumerate(teams)}
+    home = played["HomeTeam"].astype(str).map(position).to_numpy(int)
+    away = played["AwayTeam"].astype(str).map(position).to_numpy(int)
+    return (
+        list(teams),
+        home,
+        away,
+        played["FTHG"].to_numpy(int),
+        played["FTAG"].to_numpy(int),
+    )
+
+
+def negative_log_likelihood(params, home, away, x, y, n_teams, weights=None):
+    """### Dixon-Coles negative log-likelihood and its gradient
+
+    ``params`` is attack, defence (n_teams each), home advantage and rho. A
+    ``(sum of attack)^2`` term pins the attack / defence level (the likelihood
+    only sees attack - defence differences).
+
+    Returns:
+
+        (tuple): (value, gradient array)
+    """
+    attack, defence = params[:n_teams], params[n_teams : 2 * n_teams]
+    home_advantage, rho = params[2 * n_teams], params[2 * n_teams + 1]
+    weights = np.ones(len(x)) if weights is None else weights
+
+    lam = np.exp(attack[home] + defence[away] + home_advantage)
+    mu = np.exp(attack[away] + defence[home])
+    # Poisson part (without the log x! and log y! constants)
+    log_likelihood = x * np.log(lam) - lam + y * np.log(mu) - mu
+    d_home = x - lam  # d/d log(lambda)
+    d_away = y - mu  # d/d log(mu)
+    d_rho = np.zeros(len(x))
+
+    tau = np.ones(len(x))
+    zero_zero, zero_one = (x == 0) & (y == 0), (x == 0) & (y == 1)
+    one_zero, one_one = (x == 1) & (y == 0), (x == 1) & (y == 1)
+    tau[zero_zero] = 1 - lam[zero_zero] * mu[zero_zero] * rho
+    tau[zero_one] = 1 + lam[zero_one] * rho
+    tau[one_zero] = 1 + mu[one_zero] * rho
+    tau[one_one] = 1 - rho
+    tau = np.maximum(tau, 1e-10)
+    log_likelihood += np.log(tau)
+
+    both = lam * mu / tau
+    d_home[zero_zero] -= (both * rho)[zero_zero]
+    d_away[zero_zero] -= (both * rho)[zero_zero]
+    d_rho[zero_zero] = -both[zero_zero]
+    d_home[zero_one] += (lam * rho / tau)[zero_one]
+    d_rho[zero_one] = (lam / tau)[zero_one]
+    d_away[one_zero] += (mu * rho / tau)[one_zero]
+    d_rho[one_zero] = (mu / tau)[one_zero]
+    d_rho[one_one] = -1 / tau[one_one]
+
+    d_home, d_away, d_rho = d_home * weights, d_away * weights, d_rho * weights
+    gradient = np.concatenate(
+        (
+            np.bincount(home, d_home, n_teams) + np.bincount(away, d_away, n_teams),
+            np.bincount(away, d_home, n_teams) + np.bincount(home, d_away, n_teams),
+            [d_home.sum(), d_rho.sum()],
+        )
+    )
+    penalty = attack.sum()
+    value = -float(np.dot(weights, log_likelihood)) + penalty**2
+    gradient = -gradient
+    gradient[:n_teams] += 2 * penalty
+    return value, gradient
+
+
+def fit(df, previous=None, xi=0.0, **extra):
+    """### Fit the model to a frame's played matches (one league-season)
+
+    Parameters:
+
+        df (DataFrame): matches with HomeTeam, AwayTeam, FTHG, FTAG (Date index)
+        previous (DixonColes): earlier fit to start from; teams it does not know
+                    start at zero
+        xi (float): time decay per day, weights exp(-xi * days before the last match)
+        extra: stored in the fit's ``extra`` (e.g. league, period)
+
+    Returns:
+
+        (DixonColes): the fit
+    """
+    teams, home, away, x, y = match_arrays(df)
+    n = len(teams)
+    weights = None
+    if xi:
+        days = (df.index.max() - df.index[df["FTHG"].notna() & df["FTAG"].notna()]).days
+        weights = np.exp(-xi * np.asarray(days, dtype=float))
+    start = np.zeros(2 * n + 2)
+    start[2 * n] = 0.25  # home advantage around exp(0.25) ~ 1.3x
+    if previous is not None:
+        known = {team: i for i, team in enumerate(previous.teams)}
+        for i, team in enumerate(teams):
+            if team in known:
+                start[i] = previous.attack[known[team]]
+                start[n + i] = previous.defence[known[team]]
+        start[2 * n], start[2 * n + 1] = previous.home_advantage, previous.rho
+    result = optimize.minimize(
+        negative_log_likelihood,
+        start,
+        args=(home, away, x, y, n, weights),
+        jac=True,
+        method="L-BFGS-B",
+        bounds=[(None, None)] * (2 * n + 1) + [RHO_BOUNDS],
+    )
+    params = result.x
+    return DixonColes(
+        teams,
+        params[:n],
+        params[n : 2 * n],
+        float(params[2 * n]),
+        float(params[2 * n + 1]),
+        -float(result.fun),
+        int(result.nit),
+        len(x),
+        extra,
+    )
+
+
+def match_probabilities(model, fixtures):
+    """### Model result probabilities of fixtures, next to the bookmakers' draw probability
+
+    Parameters:
+
+        model (DixonColes): fitted league-season
+        fixtures (DataFrame): HomeTeam, AwayTeam and optionally B365D columns;
+                    fixtures with a team the model does not know are dropped
+
+    Returns:
+
+        (Pandas Dataframe): fixtures with p_home, p_draw, p_away (and p_draw_odds)
+    """
+    known = fixtures["HomeTeam"].isin(model.teams) & fixtures["AwayTeam"].isin(model.teams)
+    fixtures = fixtures[known].copy()
+    p_home, p_draw, p_away = model.result_probabilities(
+        fixtures["HomeTeam"].astype(str).to_numpy(), fixtures["AwayTeam"].astype(str).to_numpy()
+    )
+    fixtures["p_home"] = p_home.round(4)
+    fixtures["p_draw"] = p_draw.round(4)
+    fixtures["p_away"] = p_away.round(4)
+    if "B365D" in fixtures:
+        fixtures["p_draw_odds"] = fixtures["B365D"].map(
+            lambda odds: convert_dec_to_prob(odds) if odds and pd.notna(odds) else np.nan
+        )
+    return fixtures
+
+
+def load_fits(state_file):
+    """### Fits saved by ``save_fits`` (league -> DixonColes), empty if there are none"""
+    try:
+        with open(state_file) as f:
+            return {league: DixonColes.from_dict(d) for league, d in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_fits(state_file, fits):
+    tmp_file = state_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({league: model.to_dict() for league, model in fits.items()}, f, indent=1)
+    os.replace(tmp_file, state_file)
+
+
+def fit_leagues(frames, state_file=None, period=None):
+    """### Fit each league's current season, starting from the saved fits
+
+    Parameters:
+
+        frames (dict): league -> match frame
+        state_file (str): JSON file of the previous run's fits, rewritten with the
+                    new ones (None: start from scratch, save nothing)
+        period (str): season to fit, default ``cfg.CURRENT_PERIOD``
+
+    Returns:
+
+        (dict): league -> DixonColes
+    """
+    period = period or cfg.CURRENT_PERIOD
+    previous = load_fits(state_file) if state_file else {}
+    fits = dict(previous)
+    for league, df in frames.items():
+        season = df[df["period"] == period]
+        if not len(season):
+            continue
+        # Last season's fit is a better start than zeros too (new teams start at zero)
+        fits[league] = fit(season, previous=previous.get(league), league=league, period=period)
+    if state_file:
+        save_fits(state_file, fits)
+    return fits
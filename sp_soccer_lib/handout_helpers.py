@@ -1,3 +1,6 @@
+from sp_soccer_lib.leagues import LEAGUES
+
+
 def style():
     style = """
 <style>
@@ -38,30 +41,10 @@ def style():
 
 
 def get_country_header(country):
-    if country == "england":
-        return (
-            '<img src="https://upload.wikimedia.org/wikipedia/en/thumb/f/f2/'
-            + 'Premier_League_Logo.svg/1920px-Premier_League_Logo.svg.png" alt="Logo" width="100%">'
-        )
-    elif country == "greece":
-        return '<img src="https://www.slgr.gr/img/defaultOg.jpg" ' + 'alt="Logo" width="100%">'
-    elif country == "germany":
-        return (
-            '<img src="https://2.bp.blogspot.com/-1DSQUPYLIEI/Tfuiy8MMq9I/AAAAAAAAW0c/AGs0P4JDHoA/s1600/'
-            + 'Bundesliga_Logo.png" alt="Logo" width="100%">'
-        )
-    elif country == "france":
-        return '<img src="https://cdn.apexsports.gr/sites/40/2023/01/YTWGSWMUERFZNE7O2EC7QFA6TE-1.jpg" alt="Logo" width="100%">'
-    elif country == "italy":
-        return (
-            '<img src="https://2.bp.blogspot.com/-EREH6W98EXU/XNVkWSIhfgI/AAAAAAAB7R4/'
-            + 'Kt4WHlhPBYIJ9MZkxJ9v-fL9hLbWHXQwgCLcBGAs/s1600/all-new-serie-a-logo % 2B % 25281 % 2529.jpg"'
-            + ' alt="Logo" width="100%">'
-        )
-    elif country == "spain":
-        return '<img src="https://s.yimg.com/os/creatr-uploaded-images/2023-06/c3acb370-03a0-11ee-8957-525d7f4643f9" alt="Logo" width="100%">'
-    else:
-        return f"<h2>{country.capitalize()}</h2>"
+    """### Logo (or title) of a registered league for the handout pages."""
+    if country in LEAGUES:
+        return LEAGUES[country].header()
+    return f"<h2>{country.capitalize()}</h2>"
 
 
 def make_link(row):
@@ -0,0 +1,200 @@
+"""Timers and counters for the daily update, collected into a JSON run report.
+
+    with instrumentation.timer("fetch"):
+        df = load_country(country)
+    instrumentation.count("rows_loaded", len(df))
+    instrumentation.write_report("run_report.json")
+
+Timers use ``time.perf_counter`` (monotonic) and aggregate calls, total, mean and
+max per name; they are thread safe so the pipeline stages can share them. Set
+``PROFILE_STAGE`` to a timer name to profile every block of that name with
+cProfile (or pyinstrument with ``PROFILER=pyinstrument``, if installed); the dump
+is written to ``PROFILE_DIR`` (default ``profiles``) with the report.
+
+Process-pool workers have their own copy of this module: submit the work as
+``pool.submit(recorded, func, *args)`` and ``merge()`` the timings and counters
+that come back with the result in the parent.
+"""
+
+import contextlib
+import cProfile
+import datetime
+import functools
+import json
+import os
+import platform
+import threading
+import time
+
+from loguru import logger
+
+_LOCK = threading.Lock()
+_TIMINGS = {}  # name -> [calls, total seconds, max seconds]
+_COUNTERS = {}
+_PROFILERS = {}
+_STARTED = [time.perf_counter(), datetime.datetime.now(datetime.UTC)]
+
+
+def reset():
+    """### Forget all timings, counters and profiles (start of a new run)."""
+    with _LOCK:
+        _TIMINGS.clear()
+        _COUNTERS.clear()
+        _PROFILERS.clear()
+        _STARTED[:] = [time.perf_counter(), datetime.datetime.now(datetime.UTC)]
+
+
+def count(name: str, value=1):
+    """### Add value to the counter name."""
+    with _LOCK:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + value
+
+
+def _profiler(name):
+    if os.environ.get("PROFILE_STAGE") != name:
+        return None
+    with _LOCK:
+        if name not in _PROFILERS:
+            if os.environ.get("PROFILER") == "pyinstrument":
+                try:
+                    import pyinstrument
+                except ImportError:
+                    logger.warning("pyinstrument is not installed, using cProfile")
+                else:
+                    _PROFILERS[name] = pyinstrument.Profiler()
+            _PROFILERS.setdefault(name, cProfile.Profile())
+        return _PROFILERS[name]
+
+
+@contextlib.contextmanager
+def timer(name: str):
+    """### Time the enclosed block under name (and profile it if PROFILE_STAGE == name)."""
+    profiler = _profiler(name)
+    if profiler is not None:
+        try:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.enable()
+            else:
+                profiler.start()
+        except (RuntimeError, ValueError) as e:  # another profiler is active in this process
+            logger.warning(f"Not profiling {name}: {e}")
+            profiler = None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        elif profiler is not None:
+            profiler.stop()
+        with _LOCK:
+            entry = _TIMINGS.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+
+def timed(name: str):
+    """### Decorator form of timer()."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _take() -> dict:
+    """This process's timings and counters, which are cleared."""
+    with _LOCK:
+        taken = {
+            "timings": {name: list(entry) for name, entry in _TIMINGS.items()},
+            "counters": dict(_COUNTERS),
+        }
+        _TIMINGS.clear()
+        _COUNTERS.clear()
+    return taken
+
+
+def recorded(func, *args, **kwargs):
+    """### Run func in a pool worker and return (result, what it recorded) for merge()."""
+    _take()  # a reused (or forked) worker still holds earlier tasks' numbers
+    result = func(*args, **kwargs)
+    return result, _take()
+
+
+def merge(taken: dict):
+    """### Add the timings and counters returned by recorded() to this process's."""
+    with _LOCK:
+        for name, (calls, total, longest) in taken["timings"].items():
+            entry = _TIMINGS.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += total
+            entry[2] = max(entry[2], longest)
+        for name, value in taken["counters"].items():
+            _COUNTERS[name] = _COUNTERS.get(name, 0) + value
+
+
+def _dump_profiles(profile_dir) -> list:
+    paths = []
+    for name, profiler in _PROFILERS.items():
+        os.makedirs(profile_dir, exist_ok=True)
+        if isinstance(profiler, cProfile.Profile):
+            path = os.path.join(profile_dir, f"{name}.prof")
+            profiler.dump_stats(path)
+        else:
+            path = os.path.join(profile_dir, f"{name}.html")
+            with open(path, "w") as f:
+                f.write(profiler.output_html())
+        paths.append(path)
+    return paths
+
+
+def report() -> dict:
+    """### Timings and counters recorded since the last reset()."""
+    with _LOCK:
+        timings = {
+            name: {
+                "calls": calls,
+                "total": round(total, 4),
+                "mean": round(total / calls, 4),
+                "max": round(longest, 4),
+            }
+            for name, (calls, total, longest) in sorted(_TIMINGS.items())
+        }
+        return {
+            "started": _STARTED[1].isoformat(timespec="seconds"),
+            "wall_seconds": round(time.perf_counter() - _STARTED[0], 3),
+            "python": platform.python_version(),
+            "timings": timings,
+            "counters": dict(sorted(_COUNTERS.items())),
+        }
+
+
+def write_report(path: str, profile_dir: str = None) -> dict:
+    """### Write report() (and any profiles) to disk.
+
+    Parameters:
+
+        path (str): JSON file to write
+        profile_dir (str): where profiles go, default ``PROFILE_DIR`` or ``profiles``
+
+    Returns:
+
+        (dict): the report, with the written profile paths under "profiles"
+    """
+    run_report = report()
+    run_report["profiles"] = _dump_profiles(
+        profile_dir or os.environ.get("PROFILE_DIR", "profiles")
+    )
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(run_report, f, indent=1)
+    logger.info(f"Run report written to {path}")
+    return run_report
@@ -0,0 +1,215 @@
+"""League tables and team streaks as they stood on any date.
+
+``LeagueHistory`` turns a country's matches into one row per (team, match),
+grouped by period and team in date order, and keeps running totals of
+played, W, D, L, GF, GA and points plus each match's no-draw streak. A
+team's numbers on date D are then a binary search for its last match up to D
+and a difference of two running totals, for all teams of a period at once:
+
+    history = LeagueHistory.from_frame(load_country("greece"))
+    history.table("2025-01-31")             # the table on that date
+    history.snapshot("AEK", "2025-01-31")   # one team's row
+
+No ``team_stats`` is rerun and no frame is sliced per query.
+"""
+
+import numpy as np
+import pandas as pd
+
+from sp_soccer_lib import FTR_CATEGORIES, categorize, streak_positions
+
+# Points deducted by the league (same adjustment as period_stats)
+POINT_ADJUSTMENTS = {("Aris", "2122"): -6}
+# MaxNoDrawPeriod is the longest streak within the period (team_stats' MaxNoDraw spans
+# the team's whole history)
+TABLE_COLUMNS = ["P", "W", "D", "L", "GF", "GA", "PTS", "CurrentNoDraw", "MaxNoDrawPeriod"]
+
+HOME, DRAW, AWAY = (FTR_CATEGORIES.index(result) for result in "HDA")
+
+
+class LeagueHistory:
+    """### Running totals of every team of a country, by period
+
+    Parameters:
+
+        teams (list): team names
+        periods (list): periods, in order of appearance
+        group_team (ndarray): team id of each (period, team) group
+        group_period (ndarray): period id of each group
+        starts (ndarray): first row of each group (plus the total row count at the end)
+        keys (ndarray): per row, group id * ``span`` + days since ``day0`` (sorted)
+        totals (ndarray): (rows + 1, 7) running P, W, D, L, GF, GA, PTS (row 0 zeros)
+        no_draw (ndarray): no-draw streak after each row's match
+        max_no_draw (ndarray): longest no-draw streak of the group up to each row
+        day0 (int): first match day (days since epoch)
+        span (int): days covered plus two
+    """
+
+    def __init__(
+        self,
+        teams,
+        periods,
+        group_team,
+        group_period,
+        starts,
+        keys,
+        totals,
+        no_draw,
+        max_no_draw,
+        day0,
+        span,
+    ):
+        self.teams = list(teams)
+        self.periods = list(periods)
+        self.group_team = group_team
+        self.group_period = group_period
+        self.starts = starts
+        self.keys = keys
+        self.totals = totals
+        self.no_draw = no_draw
+        self.max_no_draw = max_no_draw
+        self.day0 = day0
+        self.span = span
+        first_rows = starts[:-1]
+        self._period_start = np.full(len(self.periods), np.iinfo(np.int64).max)
+        np.minimum.at(self._period_start, group_period, keys[first_rows] % span)
+        self._adjustment = np.array(
+            [
+                POINT_ADJUSTMENTS.get((self.teams[team], self.periods[period]), 0)
+                for team, period in zip(group_team.tolist(), group_period.tolist(), strict=True)
+            ],
+            dtype=np.int64,
+        )
+
+    @classmethod
+    def from_frame(cls, df):
+        """### From a country's match frame (``load_country()`` output)"""
+        df = categorize(df)
+        n = len(df)
+        teams = list(df["HomeTeam"].cat.categories)
+        periods = list(df["period"].cat.categories)
+        team = np.concatenate((df["HomeTeam"].cat.codes, df["AwayTeam"].cat.codes))
+        period = np.tile(df["period"].cat.codes.to_numpy(), 2)
+        days = df.index.to_numpy().astype("datetime64[D]").astype(np.int64)
+        day0 = int(days.min(initial=0))
+        span = int(days.max(initial=0)) - day0 + 2
+        day = np.tile(days - day0, 2)
+        ftr = np.tile(df["FTR"].cat.codes.to_numpy(), 2)
+        is_home = np.repeat([True, False], n)
+        home_goals = df["FTHG"].to_numpy(dtype=float)
+        away_goals = df["FTAG"].to_numpy(dtype=float)
+        gf = np.concatenate((home_goals, away_goals))
+        ga = np.concatenate((away_goals, home_goals))
+        row = np.tile(np.arange(n), 2)
+
+        # One row per team and match: period, team, then date (and file) order
+        order = np.lexsort((row, day, team, period))
+        order = order[team[order] >= 0]
+        team, period, day, ftr = team[order], period[order], day[order], ftr[order]
+        is_home, gf, ga = is_home[order], gf[order], ga[order]
+
+        starts_mask = np.ones(len(team), dtype=bool)
+        starts_mask[1:] = (team[1:] != team[:-1]) | (period[1:] != period[:-1])
+        group = np.cumsum(starts_mask) - 1
+        starts = np.append(np.flatnonzero(starts_mask), len(team))
+
+        played = ftr >= 0
+        win = ((ftr == HOME) & is_home) | ((ftr == AWAY) & ~is_home)
+        draw = ftr == DRAW
+        loss = played & ~win & ~draw
+        goals_for = np.where(played, np.nan_to_num(gf), 0)
+        goals_against = np.where(played, np.nan_to_num(ga), 0)
+        points = 3 * win + draw
+        per_match = np.column_stack((played, win, draw, loss, goals_for, goals_against, points))
+        totals = np.zeros((len(team) + 1, per_match.shape[1]), dtype=np.int64)
+        np.cumsum(per_match.astype(np.int64), axis=0, out=totals[1:])
+
+        # Streaks as update_draw_streaks: restart at every period, missing results extend them
+        no_draw = np.where(draw, 0, streak_positions(draw, period, team))
+        # Running maximum per group: groups are increasing, so lift each one above the last
+        lift = group * (len(team) + 1)
+        max_no_draw = np.maximum.accumulate(no_draw + lift) - lift
+
+        return cls(
+            teams,
+            periods,
+            team[starts[:-1]],
+            period[starts[:-1]],
+            starts,
+            group * span + day,
+            totals,
+            no_draw,
+            max_no_draw,
+            day0,
+            span,
+        )
+
+    def _day(self, date):
+        day = int(np.datetime64(pd.Timestamp(date).date(), "D").astype(np.int64)) - self.day0
+        return min(max(day, -1), self.span - 1)
+
+    def period_of(self, date):
+        """### Latest period whose first match is on or before date (else the first one)"""
+        started = np.flatnonzero(self._period_start <= self._day(date))
+        return (
+            self.periods[started[np.argmax(self._period_start[started])]]
+            if len(started)
+            else self.periods[0]
+        )
+
+    def _rows(self, groups, date):
+        """Per group: rows up to and including date, as (start, end) positions."""
+        day = self._day(date)
+        end = np.searchsorted(self.keys, groups * self.span + day, side="right")
+        start = self.starts[groups]
+        return start, np.maximum(end, start)
+
+    def _values(self, groups, date):
+        start, end = self._rows(groups, date)
+        values = self.totals[end] - self.totals[start]
+        values[:, 6] += self._adjustment[groups]
+        has_matches = end > start
+        last = np.maximum(end - 1, 0)
+        current = np.where(has_matches, self.no_draw[last], 0)
+        longest = np.where(has_matches, self.max_no_draw[last], 0)
+        return np.column_stack((values, current, longest))
+
+    def table(self, date, period=None):
+        """### League table of a period as it stood at the end of date
+
+        Parameters:
+
+            date (str or Timestamp): matches on or before this date count
+            period (str): default the period being played on date (``period_of``)
+
+        Returns:
+
+            (Pandas Dataframe): index Name; ``TABLE_COLUMNS``, sorted as team_stats
+                    (points, then goals for, then fewest goals against)
+        """
+        period = period or self.period_of(date)
+        groups = np.flatnonzero(self.group_period == self.periods.index(period))
+        table = pd.DataFrame(
+            self._values(groups, date),
+            index=pd.Index(
+                np.asarray(self.teams, dtype=object)[self.group_team[groups]], name="Name"
+            ),
+            columns=TABLE_COLUMNS,
+        )
+        return table.sort_values(["PTS", "GF", "GA"], ascending=[False, False, True], kind="stable")
+
+    def snapshot(self, team, date, period=None):
+        """### One team's ``TABLE_COLUMNS`` at the end of date (zeros if it is not in the period)"""
+        period = period or self.period_of(date)
+        match = np.flatnonzero(
+            (self.group_team == self.teams.index(team))
+            & (self.group_period == self.periods.index(period))
+        )
+        if not len(match):
+            return pd.Series(0, index=TABLE_COLUMNS, name=team)
+        return pd.Series(self._values(match, date)[0], index=TABLE_COLUMNS, name=team)
+
+
+def league_histories(frames):
+    """### League -> LeagueHistory of each match frame"""
+    return {league: LeagueHistory.from_frame(df) for league, df in frames.items()}
@@ -0,0 +1,145 @@
+"""Registry of the football-data.co.uk divisions we know how to load and render.
+
+Every entry point (``load_country``, the Flask app, the handout, the simulation
+scripts) looks leagues up here instead of keeping its own list; ``cfg.LEAGUES``
+picks which registered leagues the daily update publishes. A new division is
+one ``League(...)`` line: its file code, display name, and any per-period date
+format or team-name quirks of its CSV files.
+
+``iter_leagues()`` loads many leagues concurrently but hands them out one at a
+time, in order, with at most ``prefetch`` loaded frames waiting, so a run over
+dozens of leagues holds a bounded number of them in memory.
+"""
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# Date formats for football-data.co.uk CSV files
+DATE_FORMAT_YYYY = "%d/%m/%Y"  # Used for 1819 onwards
+DATE_FORMAT_YY = "%d/%m/%y"  # Used for 1718 (non-England)
+_YY_1718 = {"1718": DATE_FORMAT_YY}
+
+
+@dataclass(frozen=True)
+class League:
+    """One division: ``key`` names it in URLs and handout paths, ``code`` is its CSV file."""
+
+    key: str
+    code: str
+    name: str
+    logo: str | None = None  # image shown on the handout index and country page
+    date_formats: dict = field(default_factory=dict)  # period -> strptime format
+    corrections: dict = field(default_factory=dict)  # team misnomer -> canonical name
+
+    def date_format(self, period: str) -> str:
+        return self.date_formats.get(period, DATE_FORMAT_YYYY)
+
+    def header(self) -> str:
+        if self.logo:
+            return f'<img src="{self.logo}" alt="Logo" width="100%">'
+        return f"<h2>{self.name}</h2>"
+
+
+LEAGUES = {}
+
+
+def register(league: League) -> League:
+    """### Add (or replace) a league in the registry."""
+    LEAGUES[league.key] = league
+    return league
+
+
+def get_league(name: str) -> League:
+    """### Look a league up by key ("greece"), display name ("Greece") or file code ("G1").
+
+    Raises:
+
+        KeyError: the league is not registered
+    """
+    if name in LEAGUES:
+        return LEAGUES[name]
+    for league in LEAGUES.values():
+        if name in (league.name, league.code) or name.lower() == league.key:
+            return league
+    raise KeyError(f"Unknown league: {name}")
+
+
+def all_corrections() -> dict:
+    """### Every registered league's team-name corrections in one table."""
+    return {k: v for league in LEAGUES.values() for k, v in league.corrections.items()}
+
+
+def iter_leagues(keys, loader=None, workers: int = 4, prefetch: int = 2):
+    """### Load leagues concurrently, yielding them one at a time in order.
+
+    Parameters:
+
+        keys (list): league keys to load
+        loader (callable): key -> DataFrame, default ``championships.load_country``
+        workers (int): leagues downloading at the same time
+        prefetch (int): leagues loaded (or loading) ahead of the consumer;
+                    bounds how many frames are in memory at once
+
+    Returns:
+
+        (generator): (key, Future) pairs; ``future.result()`` returns the frame or
+                    raises that league's error, so one failure does not stop the rest
+    """
+    if loader is None:
+        from sp_soccer_lib.championships import load_country as loader
+    keys = iter(keys)
+    pending = collections.deque()
+    with ThreadPoolExecutor(max(1, workers)) as pool:
+        for key in keys:
+            pending.append((key, pool.submit(loader, key)))
+            if len(pending) >= max(1, prefetch):
+                break
+        while pending:
+            key, future = pending.popleft()
+            yield key, future
+            del future  # the consumer holds the only reference now
+            for next_key in keys:
+                pending.append((next_key, pool.submit(loader, next_key)))
+                break
+
+
+# fmt: off
+for _league in (
+    League("greece", "G1", "Greece", "https://www.slgr.gr/img/defaultOg.jpg", _YY_1718,
+           {"Olympiacos Piraeus": "Olympiakos", "Volos": "Volos NFC"}),
+    League("italy", "I1", "Italy",
+           "https://2.bp.blogspot.com/-EREH6W98EXU/XNVkWSIhfgI/AAAAAAAB7R4/"
+           "Kt4WHlhPBYIJ9MZkxJ9v-fL9hLbWHXQwgCLcBGAs/s1600/all-new-serie-a-logo % 2B % 25281 % 2529.jpg",
+           _YY_1718),
+    League("england", "E0", "England",
+           "https://upload.wikimedia.org/wikipedia/en/thumb/f/f2/"
+           "Premier_League_Logo.svg/1920px-Premier_League_Logo.svg.png"),
+    League("spain", "SP1", "Spain",
+           "https://s.yimg.com/os/creatr-uploaded-images/2023-06/c3acb370-03a0-11ee-8957-525d7f4643f9",
+           _YY_1718),
+    League("germany", "D1", "Germany",
+           "https://2.bp.blogspot.com/-1DSQUPYLIEI/Tfuiy8MMq9I/AAAAAAAAW0c/AGs0P4JDHoA/s1600/"
+           "Bundesliga_Logo.png", _YY_1718),
+    League("france", "F1", "France",
+           "https://cdn.apexsports.gr/sites/40/2023/01/YTWGSWMUERFZNE7O2EC7QFA6TE-1.jpg", _YY_1718),
+    # Lower divisions and further countries; English files use four-digit years throughout
+    League("england2", "E1", "England Championship"),
+    League("england3", "E2", "England League One"),
+    League("england4", "E3", "England League Two"),
+    League("england5", "EC", "England National League"),
+    League("scotland", "SC0", "Scotland Premiership", date_formats=_YY_1718),
+    League("scotland2", "SC1", "Scotland Championship", date_formats=_YY_1718),
+    League("scotland3", "SC2", "Scotland League One", date_formats=_YY_1718),
+    League("scotland4", "SC3", "Scotland League Two", date_formats=_YY_1718),
+    League("germany2", "D2", "Germany 2. Bundesliga", date_formats=_YY_1718),
+    League("italy2", "I2", "Italy Serie B", date_formats=_YY_1718),
+    League("spain2", "SP2", "Spain Segunda", date_formats=_YY_1718),
+    League("france2", "F2", "France Ligue 2", date_formats=_YY_1718),
+    League("netherlands", "N1", "Netherlands", date_formats=_YY_1718),
+    League("belgium", "B1", "Belgium", date_formats=_YY_1718),
+    League("portugal", "P1", "Portugal", date_formats=_YY_1718),
+    League("turkey", "T1", "Turkey", date_formats=_YY_1718),
+):
+    register(_league)
+# fmt: on
@@ -0,0 +1,166 @@
+"""Exact probabilities of long no-draw runs.
+
+With a constant draw probability p (q = 1 - p for no draw), let Q_n be the
+probability that n matches contain no run of k or more no-draws. Then
+
+    Q_n = 1                              for n < k
+    Q_k = 1 - q^k
+    Q_n = Q_{n-1} - p q^k Q_{n-k-1}      for n > k
+
+(a run of exactly k first completes at match n when matches n-k+1..n are no-draws,
+match n-k is a draw and the first n-k-1 matches have no such run). The tables
+are filled for many (k, p) pairs at once, one vectorized step per match, and
+kept per (k, p), so later queries only index them.
+
+``longest_run_probability`` answers "a run of at least k in n matches";
+``streak_survival_probability`` starts from a team's current streak, and
+``ruin_table`` turns both into per-team ruin probabilities for each bet span.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+import config as cfg
+
+# (k, p) -> Q_0..Q_n; dropped wholesale past this many entries
+MAX_TABLES = 100_000
+
+_TABLES = {}
+_LOCK = threading.Lock()
+
+
+def _no_run_tables(k, p, n_max):
+    """Q_0..Q_n_max for each (k[i], p[i]) pair, one row per pair."""
+    q_k = (1 - p) ** k
+    table = np.ones((len(k), n_max + 1))
+    rows = np.arange(len(k))
+    for n in range(1, n_max + 1):
+        longer = table[:, n - 1] - p * q_k * table[rows, np.maximum(n - k - 1, 0)]
+        table[:, n] = np.where(n < k, 1.0, np.where(n == k, 1 - q_k, longer))
+    table[k <= 0] = 0.0  # every sequence has a run of length >= 0
+    return table
+
+
+def _cached_tables(k, p, n_max):
+    """Q_0..Q_n_max for the distinct (k, p) pairs, and each element's row in it."""
+    pairs, inverse = np.unique(np.stack((k.ravel(), p.ravel())), axis=1, return_inverse=True)
+    keys = list(zip(pairs[0].astype(int).tolist(), pairs[1].tolist(), strict=True))
+    with _LOCK:
+        missing = [i for i, key in enumerate(keys) if len(_TABLES.get(key, ())) <= n_max]
+        if missing:
+            built = _no_run_tables(pairs[0, missing].astype(int), pairs[1, missing], n_max)
+            if len(_TABLES) + len(missing) > MAX_TABLES:
+                _TABLES.clear()
+            for i, row in zip(missing, built, strict=True):
+                _TABLES[keys[i]] = row
+        tables = np.stack([_TABLES[key][: n_max + 1] for key in keys])
+    return tables, inverse.reshape(k.shape)
+
+
+def no_run_probability(n, k, p):
+    """### P(no run of k or more no-draws in n matches)
+
+    Parameters:
+
+        n (int or array): number of matches
+        k (int or array): run length
+        p (float or array): draw probability per match
+
+    Returns:
+
+        (float or ndarray): probabilities, broadcast over n, k and p
+    """
+    n, k, p = np.broadcast_arrays(np.asarray(n, int), np.asarray(k, int), np.asarray(p, float))
+    if n.size == 0:
+        return np.zeros(n.shape)
+    tables, rows = _cached_tables(k, p, int(n.max()))
+    result = tables[rows, np.maximum(n, 0)]
+    return result if result.ndim else float(result)
+
+
+def longest_run_probability(n, k, p):
+    """### P(longest no-draw run >= k within n matches | draw probability p)
+
+    Broadcasts like ``no_run_probability``.
+    """
+    return 1 - no_run_probability(n, k, p)
+
+
+def streak_survival_probability(current, remaining, k, p):
+    """### P(a no-draw run reaches k before the season ends), counting the current streak
+
+    The current run either reaches k, or ends with a draw after j < k - current more
+    no-draws and the remaining matches start from scratch.
+
+    Parameters:
+
+        current (int or array): no-draw streak now (``CurrentNoDraw``)
+        remaining (int or array): matches left to play
+        k (int or array): run length
+        p (float or array): draw probability per match
+
+    Returns:
+
+        (float or ndarray): probabilities, broadcast over the arguments
+    """
+    current, remaining, k, p = np.broadcast_arrays(
+        np.asarray(current, int),
+        np.asarray(remaining, int),
+        np.asarray(k, int),
+        np.asarray(p, float),
+    )
+    q = 1 - p
+    needed = np.maximum(k - current, 0)
+    survived = np.where(remaining < needed, q**remaining, 0.0)  # season ends mid-run
+    if k.size:
+        tables, rows = _cached_tables(k, p, max(int(remaining.max()), 0))
+    for j in range(int(needed.max(initial=0))):
+        draw_next = (j < needed) & (j < remaining)
+        rest = tables[rows, np.maximum(remaining - j - 1, 0)]
+        survived = survived + np.where(draw_next, q**j * p * rest, 0.0)
+    result = np.clip(1 - survived, 0.0, 1.0)
+    return result if result.ndim else float(result)
+
+
+def ruin_table(stats, spans=None, threshold=0, season_matches=None):
+    """### Per-team probability that each bet span is lost before the season ends
+
+    A progression of ``span`` bets that starts at a no-draw streak of ``threshold``
+    is lost when a run reaches ``threshold + span``.
+
+    Parameters:
+
+        stats (DataFrame): ``team_stats()`` output (CurrentNoDraw, p_draw, B365D_mean
+                    and the current period's wins/draws/losses)
+        spans (list): bet spans, default ``cfg.RUIN_SPANS``
+        threshold (int): streak at which betting starts
+        season_matches (int): matches per team per season, default a double
+                    round robin of the teams in ``stats``
+
+    Returns:
+
+        (Pandas Dataframe): one row per team, one ``span_<n>`` column per span;
+                    empty where the team has no draw rate or odds
+    """
+    spans = cfg.RUIN_SPANS if spans is None else spans
+    if season_matches is None:
+        season_matches = 2 * (len(stats) - 1)
+    period = cfg.CURRENT_PERIOD
+    played = stats[[f"{period}_wins", f"{period}_draws", f"{period}_losses"]].sum(axis=1)
+    remaining = np.maximum(season_matches - played.to_numpy(int), 0)
+    # Current draw rate, or the bookmakers' mean implied probability early in the season
+    p = pd.to_numeric(stats["p_draw"], errors="coerce").fillna(1 / stats["B365D_mean"])
+    known = p.notna().to_numpy()
+    p = p.fillna(0).to_numpy(float)[:, None]
+    current = stats["CurrentNoDraw"].to_numpy(int)[:, None]
+    k = threshold + np.asarray(spans)[None, :]
+    probabilities = streak_survival_probability(current, remaining[:, None], k, p).round(4)
+    probabilities[~known] = np.nan
+    return pd.DataFrame(probabilities, index=stats.index, columns=[f"span_{s}" for s in spans])
+
+
+def clear_cache():
+    with _LOCK:
+        _TABLES.clear()
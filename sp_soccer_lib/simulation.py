@@ -10,6 +10,39 @@ def cash_flow_meta(cash_flow: list):
     return min_cum, max_cum
 
 
+def period_matches(team_df, period):
+    """### Per-match arrays for simulating one team's period
+
+    Built with a few vectorized compares on the categorical columns instead of
+    a frame slice per match.
+
+    Parameters:
+
+        team_df (DataFrame): the team's matches (created by create_team_df_dict())
+        period (str): period to simulate (e.g. "2324")
+
+    Returns:
+
+        (tuple): arrays over the matches of ``period``, in order: iloc position in
+                    team_df, is_draw, B365D odds (NaN when missing), and the team's
+                    matches played / drawn earlier in the period (rolling draw rate)
+    """
+    in_period = (team_df["period"] == period).to_numpy()
+    drawn = (team_df["result"] == "D").to_numpy() & in_period
+    played_before = np.cumsum(in_period) - in_period
+    draws_before = np.cumsum(drawn) - drawn
+    is_draw = (team_df["FTR"] == "D").to_numpy()
+    odds = team_df["B365D"].to_numpy(dtype=float)
+    positions = np.flatnonzero(in_period)
+    return (
+        positions,
+        is_draw[positions],
+        odds[positions],
+        played_before[positions].tolist(),
+        draws_before[positions].tolist(),
+    )
+
+
 class Simulation:
     def __init__(self):
         pass
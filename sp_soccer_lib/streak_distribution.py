@@ -0,0 +1,140 @@
+"""No-draw streak lengths for a whole country in one vectorized pass.
+
+``no_draw_frequencies`` collects, for every draw a team plays (except its first
+match), the length of the no-draw streak just before it (0 after a draw).
+``StreakDistribution`` computes those values for all teams at once from stacked
+numpy arrays and keeps them grouped by team (``offsets``), so a team's values
+are a slice and the country histogram is a single ``bincount``.
+
+Distributions of loaded countries are cached (``country_distribution``), so
+per-team queries in a loop load and compute the country once.
+"""
+
+import threading
+
+import numpy as np
+
+from sp_soccer_lib import LazyTeamFrames, streak_positions
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def team_match_arrays(df):
+    """### Every championship team's matches stacked team by team, in date order
+
+    Uses the LazyTeamFrames index, so no team frame is built.
+
+    Returns:
+
+        (tuple): teams and periods (lists), then per stacked match: team id (index
+                    into teams), FTR code (-1 missing, see FTR_CATEGORIES) and
+                    period code (index into periods)
+    """
+    lazy = LazyTeamFrames(df)
+    teams = list(lazy)
+    positions = [lazy.positions(team) for team in teams]
+    rows = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int64)
+    team_ids = np.repeat(np.arange(len(teams)), [len(p) for p in positions])
+    # Stable sort by date within each team, as the team frames' sort_index()
+    dates = lazy.df.index.to_numpy()[rows]
+    order = np.lexsort((dates, team_ids))
+    rows, team_ids = rows[order], team_ids[order]
+    ftr = lazy.df["FTR"].cat.codes.to_numpy()[rows]
+    period = lazy.df["period"].cat.codes.to_numpy()[rows]
+    return teams, list(lazy.df["period"].cat.categories), team_ids, ftr, period
+
+
+class StreakDistribution:
+    """### Streak lengths preceding each draw, grouped by team
+
+    Parameters:
+
+        teams (list): team names, in order
+        values (ndarray): streak lengths, team by team, in match order
+        offsets (ndarray): team i's values are ``values[offsets[i]:offsets[i + 1]]``
+    """
+
+    def __init__(self, teams, values, offsets):
+        self.teams = list(teams)
+        self.values = values
+        self.offsets = offsets
+        self._slices = {
+            team: slice(offsets[i], offsets[i + 1]) for i, team in enumerate(self.teams)
+        }
+
+    @classmethod
+    def _from_stacked(cls, teams, team_ids, count_no_draw, is_result_draw):
+        follows = np.zeros(len(team_ids), dtype=bool)
+        follows[1:] = team_ids[1:] == team_ids[:-1]
+        hits = np.flatnonzero(is_result_draw & follows)
+        values = count_no_draw[hits - 1].astype(np.int64)
+        per_team = np.bincount(team_ids[hits], minlength=len(teams))
+        return cls(teams, values, np.concatenate(([0], np.cumsum(per_team))))
+
+    @classmethod
+    def from_team_dfs(cls, team_dfs):
+        """### From built team frames (``count_no_draw`` and ``result`` columns)"""
+        teams = list(team_dfs)
+        frames = [team_dfs[team] for team in teams]
+        lengths = [len(frame) for frame in frames]
+        if not frames:
+            return cls([], np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64))
+        count_no_draw = np.concatenate([frame["count_no_draw"].to_numpy() for frame in frames])
+        is_result_draw = np.concatenate([(frame["result"] == "D").to_numpy() for frame in frames])
+        team_ids = np.repeat(np.arange(len(teams)), lengths)
+        return cls._from_stacked(teams, team_ids, count_no_draw, is_result_draw)
+
+    @classmethod
+    def from_frame(cls, df):
+        """### From a country's match frame, without building any team frame"""
+        teams, _, team_ids, ftr, period = team_match_arrays(df)
+        is_draw = ftr == 1  # FTR_CATEGORIES.index("D")
+        # update_results() labels anything but a home/away win "D" (e.g. a missing FTR)
+        is_result_draw = (ftr != 0) & (ftr != 2)
+        position = streak_positions(is_draw, period, team_ids)
+        count_no_draw = np.where(is_draw, 0, position)
+        return cls._from_stacked(teams, team_ids, count_no_draw, is_result_draw)
+
+    def team_values(self, team):
+        """### One team's streak lengths (a view, empty for an unknown team)"""
+        return self.values[self._slices.get(team, slice(0, 0))]
+
+    def frequencies(self, teams=None) -> list:
+        """### Streak lengths as no_draw_frequencies returns them (teams in the given order)"""
+        if teams is None:
+            return self.values.tolist()
+        return [v for team in teams for v in self.team_values(team).tolist()]
+
+    def histogram(self, teams=None):
+        """### Streak length -> count as two arrays (lengths with a zero count left out)
+
+        Returns:
+
+            (tuple): (lengths, counts) int arrays, lengths ascending
+        """
+        values = self.values if teams is None else np.asarray(self.frequencies(teams), dtype=int)
+        counts = np.bincount(values) if len(values) else np.zeros(0, dtype=np.int64)
+        lengths = np.flatnonzero(counts)
+        return lengths, counts[lengths]
+
+
+def country_distribution(country) -> StreakDistribution:
+    """### Cached StreakDistribution of a country (loaded with ``load_country`` once)"""
+    from sp_soccer_lib.championships import load_country
+
+    with _LOCK:
+        if country in _CACHE:
+            return _CACHE[country]
+    distribution = StreakDistribution.from_frame(load_country(country))
+    with _LOCK:
+        return _CACHE.setdefault(country, distribution)
+
+
+def clear_cache(country=None):
+    """### Forget cached distributions (of one country, or all)"""
+    with _LOCK:
+        if country is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(country, None)
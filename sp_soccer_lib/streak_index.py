@@ -0,0 +1,167 @@
+"""Incremental team -> latest streak state index.
+
+Keeps just enough per-team state to answer ``CurrentNoDraw``, ``MaxNoDraw``,
+``p_draw``, ``c_prob`` and ``c_prob_adj`` without building ``team_stats``.
+Matches are applied one at a time with the same streak rules as
+``update_draw_streaks()``, so the index can be fed from a full country frame
+once and then kept current with only the newly arrived rows.
+"""
+
+import math
+from dataclasses import dataclass
+
+import pandas as pd
+
+import config as cfg
+
+STREAK_FIELDS = ["CurrentNoDraw", "MaxNoDraw", "p_draw", "c_prob", "c_prob_adj"]
+
+
+@dataclass
+class TeamStreakState:
+    """Running streak and draw-rate counters for one team."""
+
+    memory: str = "G"
+    count: int = 1
+    period: str = "start"
+    current_no_draw: int = 0
+    max_no_draw: int = 0
+    b365d_sum: float = 0.0
+    b365d_count: int = 0
+    period_matches: int = 0
+    period_draws: int = 0
+
+    def apply(self, is_draw: bool, period: str, b365d: float, current_period: str):
+        """Advance the state by one match (mirrors update_draw_streaks)."""
+        if is_draw:
+            if self.memory == "D" and period == self.period:
+                self.count += 1
+            else:
+                self.memory = "D"
+                self.count = 1
+            self.current_no_draw = 0
+        else:
+            if self.memory != "D" and period == self.period:
+                self.count += 1
+            else:
+                self.memory = "ND"
+                self.count = 1
+            self.current_no_draw = self.count
+            self.max_no_draw = max(self.max_no_draw, self.count)
+        self.period = period
+
+        if b365d is not None and not math.isnan(b365d):
+            self.b365d_sum += b365d
+            self.b365d_count += 1
+        if period == current_period:
+            self.period_matches += 1
+            self.period_draws += int(is_draw)
+
+
+class StreakIndex:
+    """Team -> latest streak/probability record for one country."""
+
+    def __init__(self, current_period: str = cfg.CURRENT_PERIOD):
+        self.current_period = current_period
+        self._states: dict[str, TeamStreakState] = {}
+        self._records: dict[str, dict] = {}
+        self._seen: set = set()
+        self._league: dict | None = None
+        self._listeners: list = []
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, current_period: str = cfg.CURRENT_PERIOD):
+        """### Build an index from a country dataframe (as returned by load_country)."""
+        index = cls(current_period)
+        index.ingest_frame(df)
+        return index
+
+    def add_listener(self, callback):
+        """### Register callback(team, before, after) called for every record change.
+
+        ``before`` is None the first time a team is seen.
+        """
+        self._listeners.append(callback)
+
+    def ingest_frame(self, df: pd.DataFrame) -> list:
+        """### Apply all rows not ingested yet, in date order.
+
+        Returns:
+
+            (list): names of the teams whose record changed
+        """
+        changed = []
+        columns = ["HomeTeam", "AwayTeam", "FTR", "B365D", "period"]
+        for row in df[columns].itertuples():
+            changed.extend(
+                self.ingest(row.Index, row.HomeTeam, row.AwayTeam, row.FTR, row.B365D, row.period)
+            )
+        return list(dict.fromkeys(changed))
+
+    def ingest(self, date, home: str, away: str, ftr: str, b365d: float, period: str) -> list:
+        """### Apply a single match to both teams' state.
+
+        Already ingested matches (same date and teams) are ignored, so a refreshed
+        country frame can be fed again and only the new rows take effect.
+
+        Returns:
+
+            (list): names of the teams whose record changed (empty for duplicates)
+        """
+        key = (date, home, away)
+        if key in self._seen:
+            return []
+        self._seen.add(key)
+        is_draw = ftr == "D"
+        for team in (home, away):
+            state = self._states.setdefault(team, TeamStreakState())
+            state.apply(is_draw, period, b365d, self.current_period)
+            before = self._records.get(team)
+            self._records[team] = self._build_record(state)
+            for callback in self._listeners:
+                callback(team, before, self._records[team])
+        self._league = None
+        return [home, away]
+
+    def _build_record(self, state: TeamStreakState) -> dict:
+        from .championships import calc_c_prob, calc_c_prob_adj
+
+        record = {
+            "CurrentNoDraw": state.current_no_draw,
+            "MaxNoDraw": state.max_no_draw,
+            "B365D_mean": (
+                state.b365d_sum / state.b365d_count if state.b365d_count else float("nan")
+            ),
+            "p_draw": (
+                round(state.period_draws / state.period_matches, 4)
+                if state.period_matches
+                else None
+            ),
+        }
+        record["c_prob"] = calc_c_prob(record)
+        record["c_prob_adj"] = calc_c_prob_adj(record)
+        return {field: record[field] for field in STREAK_FIELDS}
+
+    def teams(self) -> list:
+        """Teams playing in the current period (same set as championship_teams)."""
+        return sorted(
+            team for team, state in self._states.items() if state.period == self.current_period
+        )
+
+    def team(self, team: str) -> dict:
+        """### Latest record for one team (KeyError if unknown)."""
+        if self._states[team].period != self.current_period:
+            raise KeyError(team)
+        return self._records[team]
+
+    def league(self) -> dict:
+        """### Latest records for all current-period teams, keyed by team name."""
+        if self._league is None:
+            self._league = {team: self._records[team] for team in self.teams()}
+        return self._league
+
+    def __contains__(self, team):
+        return team in self._states and self._states[team].period == self.current_period
+
+    def __len__(self):
+        return len(self.teams())
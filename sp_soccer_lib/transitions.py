@@ -0,0 +1,254 @@
+"""Draw probability by the no-draw streak a team is on.
+
+The streak strategy bets that a draw gets likelier the longer a team goes
+without one. If results do not depend on streaks, P(draw | k), the draw rate of
+matches played after a no-draw streak of k (k = 0: after a draw), is flat in k.
+``DrawTransitions`` counts those matches and their draws for every team, season
+and k with one ``np.bincount`` over the stacked match arrays, and tests the
+flat hypothesis:
+
+    transitions = transitions_for(load_country("greece"))
+    transitions.estimate()                  # pooled P(draw | k)
+    transitions.estimate(team="AEK")        # one team, all seasons
+    transitions.permutation_test(long_streak=5)
+
+Results are cached per data snapshot (a hash of the match frame), so the daily
+update can call ``transitions_for`` on every run and only recomputes a league
+whose matches changed.
+"""
+
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from sp_soccer_lib import streak_positions
+from sp_soccer_lib.streak_distribution import team_match_arrays
+
+# Snapshots kept by transitions_for(); the oldest is dropped first
+MAX_SNAPSHOTS = 64
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def _streak_before(is_draw, segment):
+    """No-draw streak before each match, and whether the match has one (not first in segment)."""
+    position = streak_positions(is_draw, segment)
+    count_no_draw = np.where(is_draw, 0, position)
+    follows = np.zeros(len(is_draw), dtype=bool)
+    follows[1:] = segment[1:] == segment[:-1]
+    state = np.zeros(len(is_draw), dtype=np.int64)
+    state[1:] = count_no_draw[:-1]
+    return state, follows
+
+
+def _long_minus_short(is_draw, state, follows, long_streak):
+    """Draw rate after streaks >= long_streak minus the rate after shorter ones (per row)."""
+    long = follows & (state >= long_streak)
+    short = follows & (state < long_streak)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        long_rate = (is_draw & long).sum(axis=-1) / long.sum(axis=-1)
+        short_rate = (is_draw & short).sum(axis=-1) / short.sum(axis=-1)
+    return long_rate - short_rate
+
+
+class DrawTransitions:
+    """### Matches and draws by team, season and preceding no-draw streak
+
+    Parameters:
+
+        teams (list): team names
+        periods (list): periods (seasons)
+        trials (ndarray): ``trials[t, s, k]`` matches team t played in period s after a
+                    no-draw streak of k (a team's first match of a period has none)
+        draws (ndarray): how many of those were draws
+        matches (tuple): stacked (is_draw, segment) arrays of the played matches, for
+                    the permutation test (segment: one increasing id per team and period)
+    """
+
+    def __init__(self, teams, periods, trials, draws, matches=None):
+        self.teams = list(teams)
+        self.periods = list(periods)
+        self.trials = trials
+        self.draws = draws
+        self.matches = matches
+
+    @classmethod
+    def from_frame(cls, df):
+        """### From a country's match frame (no team frame is built)"""
+        teams, periods, team_ids, ftr, period = team_match_arrays(df)
+        is_draw = ftr == 1  # FTR_CATEGORIES.index("D")
+        team_period = team_ids * max(len(periods), 1) + period
+        # A missing result extends the no-draw streak (as count_no_draw) but is no trial
+        state, follows = _streak_before(is_draw, team_period)
+        counted = follows & (ftr >= 0)
+        n_streaks = int(state.max(initial=0)) + 1
+        cells = (team_period * n_streaks + state)[counted]
+        shape = (len(teams), len(periods), n_streaks)
+        size = int(np.prod(shape))
+        trials = np.bincount(cells, minlength=size).reshape(shape)
+        draws = np.bincount(cells[is_draw[counted]], minlength=size).reshape(shape)
+        # Played matches with consecutive segment ids (the permutation test sorts on them)
+        played = ftr >= 0
+        changes = team_period[played][1:] != team_period[played][:-1]
+        segment = np.concatenate(([0], np.cumsum(changes)))
+        return cls(teams, periods, trials, draws, (is_draw[played], segment))
+
+    def estimate(self, team=None, period=None):
+        """### P(draw | no-draw streak k), pooled over all teams and periods or for one
+
+        Returns:
+
+            (Pandas Dataframe): index streak k; trials, draws and p_draw columns
+                    (streaks nobody reached are left out)
+        """
+        trials, draws = self.trials, self.draws
+        if team is not None:
+            index = self.teams.index(team)
+            trials, draws = trials[index : index + 1], draws[index : index + 1]
+        if period is not None:
+            index = self.periods.index(period)
+            trials, draws = trials[:, index : index + 1], draws[:, index : index + 1]
+        trials, draws = trials.sum(axis=(0, 1)), draws.sum(axis=(0, 1))
+        reached = np.flatnonzero(trials)
+        return pd.DataFrame(
+            {
+                "trials": trials[reached],
+                "draws": draws[reached],
+                "p_draw": (draws[reached] / trials[reached]).round(4),
+            },
+            index=pd.Index(reached, name="streak"),
+        )
+
+    def to_frame(self):
+        """### Every non-empty (team, period, streak) cell as a row: trials and draws"""
+        team, period, streak = np.nonzero(self.trials)
+        return pd.DataFrame(
+            {
+                "team": np.asarray(self.teams, dtype=object)[team],
+                "period": np.asarray(self.periods, dtype=object)[period],
+                "streak": streak,
+                "trials": self.trials[team, period, streak],
+                "draws": self.draws[team, period, streak],
+            }
+        )
+
+    def _split(self, long_streak):
+        trials = self.trials.sum(axis=(0, 1))
+        draws = self.draws.sum(axis=(0, 1))
+        return (
+            (int(draws[:long_streak].sum()), int(trials[:long_streak].sum())),
+            (int(draws[long_streak:].sum()), int(trials[long_streak:].sum())),
+        )
+
+    def exact_test(self, long_streak=5):
+        """### One-sided exact binomial test: draws after streaks >= long_streak vs the rest
+
+        Returns:
+
+            (float): p-value of seeing as many draws after long streaks if their draw
+                    probability were the draw rate after shorter ones
+        """
+        (short_draws, short_trials), (long_draws, long_trials) = self._split(long_streak)
+        if not long_trials or not short_trials:
+            return np.nan
+        return stats.binomtest(
+            long_draws, long_trials, short_draws / short_trials, "greater"
+        ).pvalue
+
+    def homogeneity_test(self, max_streak=10):
+        """### Chi-square test that the draw rate is the same for every streak length
+
+        Streaks of ``max_streak`` or more are pooled into one row.
+
+        Returns:
+
+            (tuple): (chi-square statistic, p-value)
+        """
+        trials = self.trials.sum(axis=(0, 1))
+        draws = self.draws.sum(axis=(0, 1))
+        trials = np.append(trials[:max_streak], trials[max_streak:].sum())
+        draws = np.append(draws[:max_streak], draws[max_streak:].sum())
+        reached = trials > 0
+        table = np.column_stack((draws[reached], trials[reached] - draws[reached]))
+        if len(table) < 2 or not table.all(axis=0).any():
+            return np.nan, np.nan
+        statistic, pvalue, _, _ = stats.chi2_contingency(table)
+        return float(statistic), float(pvalue)
+
+    def permutation_test(self, long_streak=5, iterations=1000, rng=None, chunk=250):
+        """### Permutation test of a higher draw rate after streaks >= long_streak
+
+        Each team's results are shuffled within each season (keeping its number
+        of draws), ``chunk`` shuffles at a time as one index matrix. Matches with a
+        missing result are left out.
+
+        Returns:
+
+            (tuple): (observed draw rate difference long - short, one-sided p-value)
+        """
+        is_draw, segment = self.matches
+        observed = float(_long_minus_short(is_draw, *_streak_before(is_draw, segment), long_streak))
+        if np.isnan(observed):
+            return observed, np.nan
+        rng = rng or np.random.default_rng()
+        n = len(is_draw)
+        at_least = 0
+        for start in range(0, iterations, chunk):
+            rows = min(chunk, iterations - start)
+            # Sorting segment + U(0, 1) keys shuffles within segments only
+            order = np.argsort(segment + rng.random((rows, n)), axis=1)
+            shuffled = is_draw[order]
+            # One segment id per shuffle and team-season, so streaks never cross them
+            stacked = (np.arange(rows)[:, None] * (segment.max() + 1) + segment).ravel()
+            state, follows = _streak_before(shuffled.ravel(), stacked)
+            differences = _long_minus_short(
+                shuffled, state.reshape(rows, n), follows.reshape(rows, n), long_streak
+            )
+            at_least += int(np.sum(differences >= observed - 1e-12))
+        return observed, (at_least + 1) / (iterations + 1)
+
+
+def _snapshot(df):
+    columns = df[["HomeTeam", "AwayTeam", "FTR", "period"]]
+    return hashlib.sha1(pd.util.hash_pandas_object(columns, index=True).to_numpy()).hexdigest()
+
+
+def transitions_for(df) -> DrawTransitions:
+    """### DrawTransitions of a match frame, cached by the frame's contents"""
+    key = _snapshot(df)
+    with _LOCK:
+        if key in _CACHE:
+            return _CACHE[key]
+    transitions = DrawTransitions.from_frame(df)
+    with _LOCK:
+        while len(_CACHE) >= MAX_SNAPSHOTS:
+            _CACHE.pop(next(iter(_CACHE)))
+        return _CACHE.setdefault(key, transitions)
+
+
+def league_transitions(frames) -> pd.DataFrame:
+    """### (team, period, streak) trials and draws of several leagues in one table
+
+    Parameters:
+
+        frames (dict): league -> match frame
+
+    Returns:
+
+        (Pandas Dataframe): ``DrawTransitions.to_frame()`` rows with a league column;
+                    ``groupby("streak")[["trials", "draws"]].sum()`` pools them
+    """
+    tables = [transitions_for(df).to_frame().assign(league=league) for league, df in frames.items()]
+    if not tables:
+        return pd.DataFrame(columns=["league", "team", "period", "streak", "trials", "draws"])
+    table = pd.concat(tables, ignore_index=True)
+    return table[["league", "team", "period", "streak", "trials", "draws"]]
+
+
+def clear_cache():
+    with _LOCK:
+        _CACHE.clear()
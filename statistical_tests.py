@@ -1,50 +1,223 @@
-# from external import thinkplot
-# from collections import Counter
-# from sp_soccer_lib.championships import load_england, load_italy, team_stats, load_country
-# from sp_soccer_lib.handout_helpers import style, get_country_header, make_link
-# from sp_soccer_lib import create_team_df_dict, championship_teams, no_draw_frequencies, create_team_df, update_draw_streaks, update_results
-# from sp_soccer_lib.probabilities import cumulative_binomial_probabilities
-# from external import thinkstats2
+"""Statistical checks that draws do not depend on the no-draw streak.
 
-# import pprint as pp
-# import pandas as pd
+For every team of a league (``league_battery``):
 
-"""
-next_matches = 7
-
-
-def calc_c_prob(row):
-    return cumulative_binomial_probabilities(next_matches + int(row['CurrentNoDraw']), 1, 0.1)[3]
-
-
-df = load_country('greece')  # , 'FTHG'
-
-team_dfs = create_team_df_dict(df)
-stats = team_stats(team_dfs)
-# stats['Name'] = stats.index
+- Wald–Wolfowitz runs test on the team's draw / no-draw sequence;
+- permutation test on the mean no-draw streak before a draw (the
+  ``no_draw_frequencies`` values), shuffling the team's results within each
+  season; all permutations are one index matrix (``StreakPermutationTest``);
+- chi-square of the observed streak histogram against the geometric one that
+  independent matches with the team's draw rate would give.
 
-stats['c_prob'] = stats.apply(lambda row: calc_c_prob(row), axis=1)
+Run as a script to print the table of every league in ``cfg.LEAGUES``:
 
+    python statistical_tests.py [iterations] [workers]
+"""
 
-print(stats)
-print(stats.columns)
-
-
-print(Counter(stats['MaxNoDraw'].values))
-
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import config as cfg
+import external.thinkstats2 as thinkstats2
+from sp_soccer_lib import create_team_df_dict, no_draw_frequencies, streak_positions
+from sp_soccer_lib.championships import load_country
+from sp_soccer_lib.distributions import Cdf
 
-freq = no_draw_frequencies('greece')
-series = pd.Series(freq)
-counts = series.value_counts()
-print(dict(counts))
-print(Counter(freq))
+# Smallest expected count of a chi-square bin; the tail bin absorbs the rest
+MIN_EXPECTED = 5
+
+
+def runs_test(is_draw):
+    """### Wald–Wolfowitz runs test (normal approximation, two-sided)
+
+    Parameters:
 
-hist = thinkstats2.Hist([1, 2, 2, 3, 5])
-print(hist)
+        is_draw (ndarray): bool per match, in match order
 
-for val in sorted(hist.Values()):
-    print(val, hist.Freq(val))
+    Returns:
 
-thinkplot.Hist(hist)
-thinkplot.Show(xlabel='value', ylabel='frequency')
-"""
+        (tuple): (number of runs, z score, p-value); z and p are nan without
+                    both draws and non-draws
+    """
+    is_draw = np.asarray(is_draw, dtype=bool)
+    n = len(is_draw)
+    draws = int(is_draw.sum())
+    runs = int(n > 0) + int(np.count_nonzero(is_draw[1:] != is_draw[:-1]))
+    others = n - draws
+    if not draws or not others:
+        return runs, np.nan, np.nan
+    product = 2 * draws * others
+    mean = product / n + 1
+    variance = product * (product - n) / (n**2 * (n - 1))
+    if variance <= 0:
+        return runs, np.nan, np.nan
+    z = (runs - mean) / np.sqrt(variance)
+    return runs, float(z), float(2 * stats.norm.sf(abs(z)))
+
+
+def geometric_chi_square(values):
+    """### Chi-square of streak lengths before a draw against a geometric distribution
+
+    With independent matches and draw probability p, the streak before a draw is
+    k with probability p (1 - p)^k; p is fitted from the mean (1 / (1 + mean)).
+
+    Parameters:
+
+        values (list): streak lengths (``no_draw_frequencies`` output)
+
+    Returns:
+
+        (tuple): (chi-square statistic, p-value), nan with fewer than three bins
+    """
+    values = np.asarray(values, dtype=int)
+    if not len(values):
+        return np.nan, np.nan
+    p = 1 / (1 + values.mean())
+    observed = np.bincount(values)
+    expected = len(values) * p * (1 - p) ** np.arange(len(observed))
+    # Bins 0..k-1 with enough expected matches, then one tail bin for >= k
+    small = expected < MIN_EXPECTED
+    k = max(int(np.argmax(small)) if small.any() else len(observed), 1)
+    observed = np.append(observed[:k], observed[k:].sum())
+    expected = np.append(expected[:k], len(values) - expected[:k].sum())
+    if len(observed) < 3 or expected[-1] <= 0:
+        return np.nan, np.nan
+    statistic = float(((observed - expected) ** 2 / expected).sum())
+    return statistic, float(stats.chi2.sf(statistic, len(observed) - 2))
+
+
+def mean_streak_before_draw(is_draw, is_result_draw, period):
+    """### Mean ``no_draw_frequencies`` value of each row of permuted results
+
+    Parameters:
+
+        is_draw (ndarray): (rows, matches) FTR == "D"; one row per permutation
+        is_result_draw (ndarray): (rows, matches) result == "D" (a missing FTR too)
+        period (ndarray): period code per match
+
+    Returns:
+
+        (ndarray): mean streak before a draw per row (nan without draws)
+    """
+    is_draw = np.atleast_2d(is_draw)
+    is_result_draw = np.atleast_2d(is_result_draw)
+    rows, n = is_draw.shape
+    position = streak_positions(
+        is_draw.ravel(), np.tile(period, rows), np.repeat(np.arange(rows), n)
+    ).reshape(rows, n)
+    before = np.where(is_draw, 0, position)[:, :-1]
+    hits = is_result_draw[:, 1:]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (before * hits).sum(axis=1) / hits.sum(axis=1)
+
+
+class StreakPermutationTest(thinkstats2.HypothesisTest):
+    """### Permutation test of the mean no-draw streak before a draw
+
+    ``data`` is (is_draw, is_result_draw, period codes) of one team's matches.
+    The null model shuffles the team's matches within each season. ``PValue``
+    runs every permutation at once and is two-sided.
+    """
+
+    def __init__(self, data, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        super().__init__(tuple(np.asarray(array) for array in data))
+
+    def MakeModel(self):
+        period = self.data[2]
+        # Consecutive ids per season, so sorting id + U(0, 1) shuffles within seasons
+        self.segment = np.concatenate(([0], np.cumsum(period[1:] != period[:-1])))
+
+    def TestStatistic(self, data):
+        return float(mean_streak_before_draw(*data)[0])
+
+    def RunModel(self):
+        return tuple(array[0] for array in self.RunModels(1)) + (self.data[2],)
+
+    def RunModels(self, iters):
+        """### ``iters`` shuffles as (iters, matches) is_draw and is_result_draw arrays"""
+        is_draw, is_result_draw, _ = self.data
+        order = np.argsort(self.segment + self.rng.random((iters, len(is_draw))), axis=1)
+        return is_draw[order], is_result_draw[order]
+
+    def PValue(self, iters=1000):
+        self.test_stats = mean_streak_before_draw(*self.RunModels(iters), self.data[2])
+        self.test_stats = self.test_stats[~np.isnan(self.test_stats)]
+        if np.isnan(self.actual) or not len(self.test_stats):
+            return np.nan
+        self.test_cdf = Cdf(self.test_stats)
+        lower = np.count_nonzero(self.test_stats <= self.actual)
+        upper = np.count_nonzero(self.test_stats >= self.actual)
+        return min(1.0, 2 * min(lower, upper) / len(self.test_stats))
+
+
+def team_battery(team, team_df, iterations=1000, seed=None):
+    """### All tests for one team (see the module docstring)
+
+    Returns:
+
+        (dict): one row of the league table
+    """
+    is_draw = (team_df["FTR"] == "D").to_numpy()
+    is_result_draw = (team_df["result"] == "D").to_numpy()
+    period = pd.factorize(team_df["period"])[0]
+    values = no_draw_frequencies(None, [team], team_dfs={team: team_df})
+    runs, z, runs_p = runs_test(is_draw)
+    permutation = StreakPermutationTest(
+        (is_draw, is_result_draw, period), rng=np.random.default_rng(seed)
+    )
+    chi_square, chi_square_p = geometric_chi_square(values)
+    return {
+        "Name": team,
+        "matches": len(team_df),
+        "draws": int(is_draw.sum()),
+        "runs": runs,
+        "runs_z": round(z, 4),
+        "runs_p": round(runs_p, 4),
+        "mean_streak": round(float(np.mean(values)), 4) if values else np.nan,
+        "perm_p": round(permutation.PValue(iterations), 4),
+        "chi2": round(chi_square, 4),
+        "chi2_p": round(chi_square_p, 4),
+    }
+
+
+def league_battery(country, df=None, iterations=1000, workers=1, seed=0):
+    """### Test table of one league, a row per championship team
+
+    Parameters:
+
+        country (str): league key
+        df (DataFrame): the league's matches, default ``load_country(country)``
+        iterations (int): permutations per team
+        workers (int): > 1 runs the teams on a process pool of that size
+                    (results do not depend on it)
+        seed (int): seeds every team's permutations
+
+    Returns:
+
+        (Pandas Dataframe): runs, permutation and chi-square results by team
+    """
+    if df is None:
+        df = load_country(country)
+    team_dfs = create_team_df_dict(df)
+    seeds = np.random.SeedSequence(seed).spawn(len(team_dfs))
+    jobs = [(team, team_dfs[team], iterations, s) for team, s in zip(team_dfs, seeds, strict=True)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(team_battery, *zip(*jobs, strict=True)))
+    else:
+        rows = [team_battery(*job) for job in jobs]
+    return pd.DataFrame(rows).set_index("Name")
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        for country in cfg.LEAGUES:
+            print(f"## {country}")
+            print(league_battery(country, iterations=iterations, workers=workers))
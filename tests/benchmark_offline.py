@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+"""Offline benchmarks for the update pipeline on synthetic leagues.
+
+Unlike tests/benchmark.py nothing is downloaded: deterministic CSVs are written to
+a temporary directory and ``championships.DATA_URL`` points at it, so the timings
+measure our code rather than football-data.co.uk.
+
+    python tests/benchmark_offline.py                          # today's size
+    python tests/benchmark_offline.py --scale 100 --repeat 1   # 100x the leagues
+    python tests/benchmark_offline.py --save after.json --compare before.json
+    python tests/benchmark_offline.py --history benchmarks.jsonl
+
+``--compare`` exits with status 1 when a benchmark's median is slower than the
+baseline's by more than ``--threshold`` (default 1.25, i.e. 25%).
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pandas as pd  # noqa: E402
+from loguru import logger  # noqa: E402
+from synthetic import synthetic_leagues, synthetic_periods, write_synthetic_csvs  # noqa: E402
+
+import config as cfg  # noqa: E402
+from sp_soccer_lib import (  # noqa: E402
+    championships,
+    create_team_df,
+    create_team_df_dict,
+    leagues,
+    no_draw_frequencies,
+    update_draw_streaks,
+)
+
+BENCHMARKS = {}
+# Today's production size: six leagues, nine seasons, ~20 teams
+DEFAULT_LEAGUES = 6
+DEFAULT_SEASONS = len(cfg.PERIODS)
+DEFAULT_TEAMS = 20
+
+
+def benchmark(name):
+    """Register func(ctx) as a benchmark; ctx holds the synthetic data (see prepare())."""
+
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+@benchmark("load_csv")
+def _load(ctx):
+    for league in ctx["leagues"]:
+        championships.country_dataframe(league, cfg.FIELDS)
+
+
+@benchmark("create_team_df_dict")
+def _team_frames(ctx):
+    for df in ctx["frames"].values():
+        create_team_df_dict(df)
+
+
+@benchmark("update_draw_streaks")
+def _streaks(ctx):
+    for raw in ctx["raw_team_frames"]:
+        update_draw_streaks(raw.copy())
+
+
+@benchmark("team_stats")
+def _team_stats(ctx):
+    for team_dfs in ctx["team_dfs"].values():
+        championships.team_stats(team_dfs)
+
+
+@benchmark("no_draw_frequencies")
+def _frequencies(ctx):
+    for league, team_dfs in ctx["team_dfs"].items():
+        no_draw_frequencies(league, team_dfs=team_dfs)
+
+
+@benchmark("cprob_simulation")
+def _cprob_simulation(ctx):
+    from cprob_simulation import CProbAdjSimulation, SimulationConfig
+
+    simulation = CProbAdjSimulation(SimulationConfig())
+    for league, team_dfs in ctx["team_dfs"].items():
+        for team, team_df in team_dfs.items():
+            simulation.run_team_period(team, team_df, cfg.CURRENT_PERIOD, league)
+
+
+@benchmark("comparison_simulations")
+def _comparison_simulations(ctx):
+    import simulation_comparison as sc
+
+    old = sc.SimulationConfig(name="old", streak_threshold=4)
+    adj = sc.SimulationConfig(name="adj", threshold=0.8)
+    for league, team_dfs in ctx["team_dfs"].items():
+        for team, team_df in team_dfs.items():
+            sc.run_old_cprob_simulation(team, team_df, cfg.CURRENT_PERIOD, league, old)
+            sc.run_cprob_adj_simulation(team, team_df, cfg.CURRENT_PERIOD, league, adj)
+
+
+@benchmark("render_pages")
+def _render(ctx):
+    import soccer1
+    from sp_soccer_lib.handout_helpers import style
+
+    logging.getLogger("handout").setLevel(logging.WARNING)  # set to INFO on import
+    league, team_dfs = next(iter(ctx["team_dfs"].items()))
+    cwd = os.getcwd()
+    os.chdir(ctx["workdir"])
+    try:
+        jobs = soccer1.country_page_jobs(
+            league, style(), df=ctx["frames"][league], team_dfs=team_dfs
+        )
+        for _page, render, args in jobs:
+            render(*args)
+    finally:
+        os.chdir(cwd)
+
+
+@benchmark("json_serialization")
+def _json(ctx):
+    for league, team_dfs in ctx["team_dfs"].items():
+        json.dumps(ctx["stats"][league].to_dict(orient="index"), default=str)
+        for team_df in team_dfs.values():
+            json.dumps(team_df.to_dict(orient="records"), default=str)
+
+
+def prepare(workdir, n_leagues, seasons, n_teams) -> dict:
+    """Write the CSVs and build the inputs every benchmark starts from."""
+    synthetic = synthetic_leagues(n_leagues)
+    periods = synthetic_periods(seasons)
+    write_synthetic_csvs(Path(workdir) / "csv", synthetic, n_teams=n_teams, periods=periods)
+    keys = [league.key for league in synthetic]
+    frames = {key: championships.country_dataframe(key, cfg.FIELDS) for key in keys}
+    team_dfs = {league: create_team_df_dict(df) for league, df in frames.items()}
+    raw_team_frames = [
+        create_team_df(df, team) for league, df in frames.items() for team in team_dfs[league]
+    ]
+    return {
+        "workdir": workdir,
+        "leagues": keys,
+        "frames": frames,
+        "team_dfs": team_dfs,
+        "raw_team_frames": raw_team_frames,
+        "stats": {league: championships.team_stats(dfs) for league, dfs in team_dfs.items()},
+        "matches": sum(len(df) for df in frames.values()),
+    }
+
+
+def run(
+    n_leagues=DEFAULT_LEAGUES, seasons=DEFAULT_SEASONS, n_teams=DEFAULT_TEAMS, repeat=3, only=None
+) -> dict:
+    """### Run the benchmarks and return their timings.
+
+    Parameters:
+
+        n_leagues, seasons, n_teams (int): size of the synthetic data
+        repeat (int): runs per benchmark (min and median are reported)
+        only (list): benchmark names to run, default all
+
+    Returns:
+
+        (dict): {"meta": run description, "results": {name: {"min", "median", "runs"}}}
+    """
+    seasons = min(seasons, 50)
+    periods = synthetic_periods(seasons)
+    logger.disable("")
+    with (
+        tempfile.TemporaryDirectory() as workdir,
+        mock.patch.object(championships, "DATA_URL", str(Path(workdir) / "csv")),
+        mock.patch.object(cfg, "PERIODS", periods),
+        mock.patch.dict(leagues.LEAGUES, {lg.key: lg for lg in synthetic_leagues(n_leagues)}),
+    ):
+        ctx = prepare(workdir, n_leagues, seasons, n_teams)
+        results = {}
+        for name, func in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func(ctx)
+                runs.append(time.perf_counter() - start)
+            results[name] = {
+                "min": round(min(runs), 4),
+                "median": round(statistics.median(runs), 4),
+                "runs": len(runs),
+            }
+    logger.enable("")
+    return {"meta": _meta(n_leagues, seasons, n_teams, ctx["matches"]), "results": results}
+
+
+def _meta(n_leagues, seasons, n_teams, matches) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "leagues": n_leagues,
+        "seasons": seasons,
+        "teams": n_teams,
+        "matches": matches,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 1.25) -> list:
+    """### Names of benchmarks whose median exceeds the baseline median times threshold."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else float("inf")
+        flag = "REGRESSION" if ratio > threshold else ""
+        print(
+            f"{name:24} {before['median']:9.4f}s -> {result['median']:9.4f}s  x{ratio:5.2f} {flag}"
+        )
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the number of leagues")
+    parser.add_argument("--leagues", type=int)
+    parser.add_argument("--seasons", type=int, default=DEFAULT_SEASONS)
+    parser.add_argument("--teams", type=int, default=DEFAULT_TEAMS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS))
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--history", help="append results to this JSON-lines file")
+    parser.add_argument("--compare", help="baseline JSON file written by --save")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    n_leagues = args.leagues or max(1, round(DEFAULT_LEAGUES * args.scale))
+    current = run(n_leagues, args.seasons, args.teams, args.repeat, args.only)
+    print(json.dumps(current["meta"]))
+    for name, result in current["results"].items():
+        print(f"{name:24} min {result['min']:9.4f}s  median {result['median']:9.4f}s")
+    if args.save:
+        Path(args.save).write_text(json.dumps(current, indent=1))
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(current) + "\n")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare(current, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
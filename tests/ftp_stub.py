@@ -0,0 +1,112 @@
+"""In-memory stand-in for an FTP server, patched in place of ``ftplib.FTP``.
+
+Implements the subset of the ``ftplib.FTP`` API used by ``ftp_transfer`` and
+records every command so tests can compare round trips between upload modes.
+"""
+
+import ftplib
+import posixpath
+import threading
+import time
+
+
+class FakeFTPServer:
+    def __init__(self, fail_stor=0, latency=0.0):
+        self.dirs = {"/"}
+        self.files = {}
+        self.commands = []
+        self.connections = 0
+        self.fail_stor = fail_stor  # number of STORs to reject with a transient error
+        self.latency = latency  # seconds slept per command, to mimic a slow host
+        self.lock = threading.Lock()
+
+    def client(self, *args, **kwargs):
+        return FakeFTP(self)
+
+    def command_count(self, verb=None):
+        return sum(1 for command in self.commands if verb is None or command == verb)
+
+
+class FakeFTP:
+    def __init__(self, server: FakeFTPServer):
+        self.server = server
+        self.cwd_path = "/"
+        self.closed = False
+
+    def _record(self, verb):
+        if self.closed:
+            raise ConnectionResetError("connection closed")
+        with self.server.lock:
+            self.server.commands.append(verb)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def _abs(self, path):
+        return posixpath.normpath(posixpath.join(self.cwd_path, path))
+
+    def connect(self, host="", port=0, timeout=None):
+        with self.server.lock:
+            self.server.connections += 1
+        return "220 fake"
+
+    def login(self, user="", passwd=""):
+        self._record("USER")
+        return "230 ok"
+
+    def cwd(self, path):
+        self._record("CWD")
+        path = self._abs(path)
+        if path not in self.server.dirs:
+            raise ftplib.error_perm("550 No such directory")
+        self.cwd_path = path
+        return "250 ok"
+
+    def pwd(self):
+        return self.cwd_path
+
+    def mkd(self, path):
+        self._record("MKD")
+        path = self._abs(path)
+        if posixpath.dirname(path) not in self.server.dirs:
+            raise ftplib.error_perm("550 Parent missing")
+        self.server.dirs.add(path)
+        return path
+
+    def storbinary(self, cmd, fp, blocksize=8192, callback=None, rest=None):
+        self._record("STOR")
+        with self.server.lock:
+            if self.server.fail_stor:
+                self.server.fail_stor -= 1
+                raise ftplib.error_temp("421 Try again")
+        path = self._abs(cmd.split(" ", 1)[1])
+        if posixpath.dirname(path) not in self.server.dirs:
+            raise ftplib.error_perm("553 Could not create file")
+        self.server.files[path] = fp.read()
+        return "226 ok"
+
+    def retrbinary(self, cmd, callback, blocksize=8192, rest=None):
+        self._record("RETR")
+        path = self._abs(cmd.split(" ", 1)[1])
+        if path not in self.server.files:
+            raise ftplib.error_perm("550 No such file")
+        callback(self.server.files[path])
+        return "226 ok"
+
+    def delete(self, path):
+        self._record("DELE")
+        path = self._abs(path)
+        if path not in self.server.files:
+            raise ftplib.error_perm("550 No such file")
+        del self.server.files[path]
+        return "250 ok"
+
+    def voidcmd(self, cmd):
+        self._record(cmd.split(" ", 1)[0])
+        return "200 ok"
+
+    def quit(self):
+        self.closed = True
+        return "221 bye"
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,128 @@
+"""Deterministic synthetic league data for offline tests.
+
+Produces frames shaped like the output of ``country_dataframe()`` (Date index,
+``cfg.FIELDS`` columns plus ``period``) without touching football-data.co.uk,
+and can write them out as football-data.co.uk style CSV files.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config as cfg
+from sp_soccer_lib.leagues import DATE_FORMAT_YY, LEAGUES, League
+
+DRAW_RATE = 0.27
+
+
+def synthetic_country_df(
+    n_teams: int = 6,
+    periods: list | None = None,
+    seed: int = 0,
+    start_year: int = 2017,
+) -> pd.DataFrame:
+    """### Double round-robin league with seeded results.
+
+    Parameters:
+
+        n_teams (int): number of teams (rounded up to an even number)
+        periods (list): period strings to generate (defaults to the last two of cfg.PERIODS)
+        seed (int): random seed, same seed gives the same frame
+        start_year (int): calendar year of the first generated period
+    """
+    rng = np.random.default_rng(seed)
+    periods = periods or cfg.PERIODS[-2:]
+    n_teams += n_teams % 2
+    teams = [f"Team {i:02d}" for i in range(n_teams)]
+
+    frames = []
+    for offset, period in enumerate(periods):
+        start = pd.Timestamp(year=start_year + offset, month=8, day=15)
+        fixtures = _round_robin(teams)
+        rows = []
+        for round_no, round_fixtures in enumerate(fixtures):
+            date = start + pd.Timedelta(days=7 * round_no)
+            for home, away in round_fixtures:
+                rows.append((date, home, away))
+        n = len(rows)
+        outcome = rng.choice(["H", "D", "A"], size=n, p=[0.45, DRAW_RATE, 1 - 0.45 - DRAW_RATE])
+        base = rng.integers(0, 3, size=n)
+        margin = rng.integers(1, 3, size=n)
+        fthg = np.where(outcome == "A", base, base + np.where(outcome == "H", margin, 0))
+        ftag = np.where(outcome == "H", base, base + np.where(outcome == "A", margin, 0))
+        frame = pd.DataFrame(
+            {
+                "Date": [r[0] for r in rows],
+                "HomeTeam": [r[1] for r in rows],
+                "AwayTeam": [r[2] for r in rows],
+                "FTR": outcome,
+                "FTHG": fthg,
+                "FTAG": ftag,
+                "B365D": np.round(rng.uniform(2.8, 4.2, size=n), 2),
+            }
+        ).set_index("Date")
+        frame["period"] = period
+        frames.append(frame)
+    return pd.concat(frames)[cfg.FIELDS + ["period"]]
+
+
+def _round_robin(teams):
+    """Circle-method double round robin: list of rounds of (home, away)."""
+    n = len(teams)
+    rotation = list(teams)
+    first_half = []
+    for _ in range(n - 1):
+        first_half.append([(rotation[i], rotation[n - 1 - i]) for i in range(n // 2)])
+        rotation = [rotation[0], rotation[-1]] + rotation[1:-1]
+    second_half = [[(away, home) for home, away in rnd] for rnd in first_half]
+    return first_half + second_half
+
+
+def synthetic_periods(seasons: int, last: str = cfg.CURRENT_PERIOD) -> list:
+    """### The last ``seasons`` period strings up to and including ``last`` (e.g. "2425")."""
+    last_start = 2000 + int(last[:2])
+    return [
+        f"{year % 100:02d}{(year + 1) % 100:02d}"
+        for year in range(last_start - seasons + 1, last_start + 1)
+    ]
+
+
+def synthetic_leagues(n_leagues: int) -> list:
+    """### ``n_leagues`` League entries: the registered ones first, then made-up ones."""
+    leagues = list(LEAGUES.values())[:n_leagues]
+    for i in range(len(leagues), n_leagues):
+        leagues.append(
+            League(f"league{i:03d}", f"X{i:03d}", f"League{i:03d}", None, {"1718": DATE_FORMAT_YY})
+        )
+    return leagues
+
+
+def write_synthetic_csvs(
+    directory, leagues: list, n_teams: int = 20, periods: list | None = None, seed: int = 0
+) -> Path:
+    """### Write ``<directory>/<period>/<code>.csv`` files laid out like football-data.co.uk.
+
+    Dates use each league's ``date_format()`` (two-digit years for 1718 outside
+    England), as ``country_dataframe()`` expects, so ``championships.DATA_URL`` can point at the
+    directory and the real loading path runs offline.
+
+    Parameters:
+
+        directory (str | Path): output root
+        leagues (list): League entries (see synthetic_leagues)
+        n_teams (int): teams per league
+        periods (list): period strings (defaults to the last two of cfg.PERIODS)
+        seed (int): base random seed, league i uses seed + i
+    """
+    directory = Path(directory)
+    periods = periods or cfg.PERIODS[-2:]
+    start_year = 2000 + int(periods[0][:2])
+    for i, league in enumerate(leagues):
+        df = synthetic_country_df(n_teams, periods, seed=seed + i, start_year=start_year)
+        for period, frame in df.groupby("period", sort=False):
+            out = frame.drop(columns="period").reset_index()
+            out["Date"] = out["Date"].dt.strftime(league.date_format(period))
+            (directory / period).mkdir(parents=True, exist_ok=True)
+            out.to_csv(directory / period / f"{league.code}.csv", index=False)
+    return directory
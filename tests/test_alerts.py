@@ -0,0 +1,222 @@
+import json
+
+from synthetic import synthetic_country_df
+
+from sp_soccer_lib.alerts import AlertBroker, sse_stream
+from sp_soccer_lib.streak_index import StreakIndex
+
+
+class FakeMatchFeed:
+    """Replays a country frame into a StreakIndex a few matches at a time."""
+
+    def __init__(self, df, start):
+        self.df = df
+        self.position = start
+
+    def initial(self):
+        return self.df.iloc[: self.position]
+
+    def tick(self, matches=1):
+        self.position += matches
+        return self.df.iloc[: self.position]
+
+
+def drain(sub):
+    events = []
+    while not sub.events.empty():
+        events.append(json.loads(sub.events.get_nowait()))
+    return events
+
+
+def test_publish_only_fires_on_upward_crossings():
+    broker = AlertBroker()
+    sub = broker.subscribe("greece", "AEK", 3)
+    other = broker.subscribe("greece", "AEK", 5)
+
+    broker.publish("greece", "AEK", {"CurrentNoDraw": 1}, {"CurrentNoDraw": 2})
+    assert drain(sub) == []
+    broker.publish("greece", "AEK", {"CurrentNoDraw": 2}, {"CurrentNoDraw": 3})
+    assert [e["value"] for e in drain(sub)] == [3]
+    broker.publish("greece", "AEK", {"CurrentNoDraw": 3}, {"CurrentNoDraw": 0})
+    broker.publish("greece", "PAOK", {"CurrentNoDraw": 2}, {"CurrentNoDraw": 9})
+    assert drain(sub) == [] and drain(other) == []
+
+
+def test_fan_out_shares_one_event_per_condition():
+    broker = AlertBroker()
+    subs = [broker.subscribe("greece", "AEK", 0.8, field="c_prob_adj") for _ in range(50)]
+    delivered = broker.publish("greece", "AEK", {"c_prob_adj": 0.7}, {"c_prob_adj": 0.85})
+    assert delivered == 50
+    payloads = [sub.events.get_nowait() for sub in subs]
+    assert all(payload is payloads[0] for payload in payloads)
+
+    for sub in subs:
+        broker.unsubscribe(sub)
+    assert broker.subscriber_count() == 0
+    assert broker.publish("greece", "AEK", {"c_prob_adj": 0.7}, {"c_prob_adj": 0.85}) == 0
+
+
+def test_fake_feed_drives_streak_alerts():
+    df = synthetic_country_df(n_teams=6, periods=["2425", "2526"], seed=5)
+    feed = FakeMatchFeed(df, start=len(df) // 2)
+    index = StreakIndex.from_dataframe(feed.initial())
+    broker = AlertBroker()
+    index.add_listener(broker.listener("greece"))
+    sub = broker.subscribe("greece", "Team 00", 2)
+
+    events = []
+    while feed.position < len(df):
+        index.ingest_frame(feed.tick(3))
+        events += drain(sub)
+
+    streaks = [e["value"] for e in events]
+    assert streaks and all(value >= 2 for value in streaks)
+    assert all(e["previous"] is None or e["previous"] < 2 for e in events)
+
+
+def test_sse_stream_formats_events_and_unsubscribes():
+    broker = AlertBroker()
+    sub = broker.subscribe("greece", "AEK", 4)
+    stream = sse_stream(broker, sub, keepalive=0.01)
+    assert next(stream) == ": subscribed\n\n"
+    assert next(stream) == ": keepalive\n\n"
+
+    broker.publish("greece", "AEK", {"CurrentNoDraw": 3}, {"CurrentNoDraw": 4})
+    message = next(stream)
+    assert message.startswith("event: alert\ndata: ")
+    assert json.loads(message.split("data: ", 1)[1])["team"] == "AEK"
+
+    stream.close()
+    assert broker.subscriber_count() == 0
+
+
+def test_alert_endpoint_streams_ingested_matches(mocker):
+    import app
+
+    df = synthetic_country_df(n_teams=4, periods=["2526"], seed=1)
+    mocker.patch.object(app, "bootstrap_country", return_value=df)
+    mocker.patch.dict(app.STREAK_INDEXES, clear=True)
+    mocker.patch.dict(app.COUNTRY_FRAMES, clear=True)
+    mocker.patch.dict(app.TEAM_FRAMES, clear=True)
+    mocker.patch.object(app, "ALERTS", AlertBroker())
+    mocker.patch.dict(app.INGESTED, clear=True)
+    mocker.patch.object(app.cfg, "INGEST_TOKEN", "secret")
+    client = app.app.test_client()
+
+    current = app.get_streak_index("greece").team("Team 00")["CurrentNoDraw"]
+    response = client.get(f"/alerts/greece/Team 00?threshold={current + 1}", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    chunks = iter(response.response)
+    assert next(chunks) == b": subscribed\n\n"
+
+    new_match = {
+        "Date": "2030-01-01",
+        "HomeTeam": "Team 00",
+        "AwayTeam": "Team 01",
+        "FTR": "H",
+        "B365D": 3.4,
+        "period": "2526",
+    }
+    response = client.post("/ingest/greece", json=[new_match], headers={"X-Ingest-Token": "secret"})
+    assert response.get_json() == {"changed": ["Team 00", "Team 01"]}
+    event = json.loads(next(chunks).decode().split("data: ", 1)[1])
+    assert event["value"] == current + 1
+    assert client.get("/alerts/greece/Team 00?field=MaxNoDraw").status_code == 400
+
+
+def test_streak_index_applies_reloaded_matches(mocker):
+    import app
+
+    df = synthetic_country_df(n_teams=4, periods=["2526"], seed=1)
+    load = mocker.patch.object(app, "bootstrap_country", side_effect=[df.iloc[:-2], df])
+    mocker.patch.dict(app.STREAK_INDEXES, clear=True)
+    mocker.patch.dict(app.COUNTRY_FRAMES, clear=True)
+    mocker.patch.dict(app.TEAM_FRAMES, clear=True)
+    mocker.patch.object(app, "ALERTS", AlertBroker())
+    mocker.patch.object(app.cfg, "API_DATA_TTL", 60)
+    clock = mocker.patch.object(app.time, "monotonic", return_value=1000.0)
+    client = app.app.test_client()
+
+    before = client.get("/streaks/greece").get_json()
+    clock.return_value = 1060.0
+    after = client.get("/streaks/greece").get_json()
+    assert load.call_count == 2
+    assert after == StreakIndex.from_dataframe(df).league()
+    assert after != before
+
+
+def test_ingest_requires_token_and_valid_rows(mocker):
+    import app
+
+    df = synthetic_country_df(n_teams=4, periods=["2526"], seed=1)
+    mocker.patch.object(app, "bootstrap_country", return_value=df)
+    mocker.patch.dict(app.STREAK_INDEXES, clear=True)
+    mocker.patch.dict(app.COUNTRY_FRAMES, clear=True)
+    mocker.patch.dict(app.TEAM_FRAMES, clear=True)
+    mocker.patch.dict(app.INGESTED, clear=True)
+    mocker.patch.object(app, "ALERTS", AlertBroker())
+    client = app.app.test_client()
+    match = {"Date": "2030-01-01", "HomeTeam": "Team 00", "AwayTeam": "Team 01", "FTR": "D"}
+    headers = {"X-Ingest-Token": "secret"}
+
+    mocker.patch.object(app.cfg, "INGEST_TOKEN", None)
+    assert client.post("/ingest/greece", json=[match], headers=headers).status_code == 403
+    mocker.patch.object(app.cfg, "INGEST_TOKEN", "secret")
+    assert client.post("/ingest/greece", json=[match]).status_code == 403
+    wrong = {"X-Ingest-Token": "guess"}
+    assert client.post("/ingest/greece", json=[match], headers=wrong).status_code == 403
+
+    before = client.get("/streaks/greece").get_json()
+    for body in (
+        {"Date": "2030-01-01"},
+        [match, {key: value for key, value in match.items() if key != "FTR"}],
+        [{**match, "FTR": "X"}],
+        [{**match, "Date": "not a date"}],
+        [{**match, "B365D": "n/a"}],
+        [{**match, "AwayTeam": "Team 00"}],
+    ):
+        assert client.post("/ingest/greece", json=body, headers=headers).status_code == 400
+    assert client.get("/streaks/greece").get_json() == before
+
+    team_rows = len(client.get("/team/greece/Team 00").get_json()["Team 00"])
+    assert client.post("/ingest/greece", json=[match], headers=headers).status_code == 200
+    rows = client.get("/team/greece/Team 00").get_json()["Team 00"]
+    assert len(rows) == team_rows + 1
+    assert rows[-1]["FTR"] == "D"
+    assert rows[-1]["count_no_draw"] == 0
+    assert client.get("/streaks/greece/Team 00").get_json()["Team 00"]["CurrentNoDraw"] == 0
+
+    # The ingested match survives a reload of data that does not have it yet
+    app.refresh_country("greece")
+    assert len(client.get("/team/greece/Team 00").get_json()["Team 00"]) == team_rows + 1
+    assert len(app.INGESTED["greece"]) == 1
+
+
+def test_ingested_matches_are_dropped_once_the_data_has_them(mocker):
+    import app
+
+    df = synthetic_country_df(n_teams=4, periods=["2526"], seed=1)
+    bootstrap = mocker.patch.object(app, "bootstrap_country", return_value=df)
+    mocker.patch.dict(app.STREAK_INDEXES, clear=True)
+    mocker.patch.dict(app.COUNTRY_FRAMES, clear=True)
+    mocker.patch.dict(app.TEAM_FRAMES, clear=True)
+    mocker.patch.dict(app.INGESTED, clear=True)
+    mocker.patch.object(app.cfg, "INGEST_TOKEN", "secret")
+    client = app.app.test_client()
+    headers = {"X-Ingest-Token": "secret"}
+    matches = [
+        {"Date": f"2030-01-0{day}", "HomeTeam": "Team 00", "AwayTeam": "Team 01", "FTR": "D"}
+        for day in (1, 2)
+    ]
+    assert client.post("/ingest/greece", json=matches, headers=headers).status_code == 200
+
+    # The next reload has the first match (still pending) and then both
+    published = app.ingest_rows(matches)
+    bootstrap.return_value = app.with_matches(df, published.iloc[:1])
+    app.refresh_country("greece")
+    assert list(app.INGESTED["greece"].index.strftime("%Y-%m-%d")) == ["2030-01-02"]
+    assert len(app.country_frame("greece")) == len(df) + 2
+    bootstrap.return_value = app.with_matches(df, published)
+    app.refresh_country("greece")
+    assert "greece" not in app.INGESTED
+    assert len(app.country_frame("greece")) == len(df) + 2
@@ -0,0 +1,54 @@
+from unittest import mock
+
+import benchmark_offline
+import pandas as pd
+import pytest
+from synthetic import (
+    synthetic_country_df,
+    synthetic_leagues,
+    synthetic_periods,
+    write_synthetic_csvs,
+)
+
+import config as cfg
+from sp_soccer_lib import categorize, championships, leagues
+
+
+def test_synthetic_csvs_load_through_country_dataframe(tmp_path):
+    periods = ["1718", "1819"]
+    write_synthetic_csvs(tmp_path, [leagues.LEAGUES["greece"]], n_teams=4, periods=periods, seed=3)
+    with (
+        mock.patch.object(championships, "DATA_URL", str(tmp_path)),
+        mock.patch.object(cfg, "PERIODS", periods),
+    ):
+        loaded = championships.country_dataframe("Greece", cfg.FIELDS)
+
+    expected = categorize(synthetic_country_df(n_teams=4, periods=periods, seed=3, start_year=2017))
+
+    def ordered(df):
+        return df.reset_index().sort_values(["Date", "HomeTeam"]).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(ordered(loaded), ordered(expected), check_dtype=False)
+
+
+def test_synthetic_periods_end_at_current_period():
+    assert synthetic_periods(len(cfg.PERIODS)) == cfg.PERIODS
+    assert synthetic_periods(3, last="0102") == ["9900", "0001", "0102"]
+
+
+def test_suite_runs_every_benchmark_at_small_scale():
+    n_leagues = len(leagues.LEAGUES) + 1  # one made-up league beyond the registry
+    current = benchmark_offline.run(n_leagues=n_leagues, seasons=2, n_teams=4, repeat=1)
+    assert set(current["results"]) == set(benchmark_offline.BENCHMARKS)
+    assert current["meta"]["leagues"] == n_leagues
+    assert current["meta"]["matches"] == n_leagues * 2 * 12
+    assert all(result["min"] > 0 for result in current["results"].values())
+    made_up = synthetic_leagues(n_leagues)[-1]
+    assert made_up.key not in leagues.LEAGUES  # patched registry is restored
+
+
+@pytest.mark.parametrize("median, regressed", [(1.2, []), (1.3, ["team_stats"])])
+def test_compare_flags_regressions_over_threshold(median, regressed):
+    baseline = {"results": {"team_stats": {"median": 1.0}, "removed": {"median": 1.0}}}
+    current = {"results": {"team_stats": {"median": median}, "new": {"median": 9.0}}}
+    assert benchmark_offline.compare(current, baseline, threshold=1.25) == regressed
@@ -0,0 +1,46 @@
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+import numpy as np
+import pytest
+from matplotlib import cbook
+
+from sp_soccer_lib.charts import boxplot_stats, boxplot_svg, histogram_svg
+
+SERIES = [1, 2, 2, 3, 3, 3, 4, 5, 5, 6, 8, 13, 21]
+
+
+def test_boxplot_stats_match_matplotlib():
+    expected = cbook.boxplot_stats(SERIES)[0]
+    actual = boxplot_stats(Counter(SERIES))
+    for key in ("q1", "med", "q3", "whislo", "whishi"):
+        assert actual["median" if key == "med" else key] == pytest.approx(expected[key])
+    assert list(actual["fliers"]) == sorted(expected["fliers"])
+
+
+def test_histogram_bars_follow_ax_hist_bins():
+    svg = histogram_svg(Counter(SERIES))
+    root = ET.fromstring(svg)
+    bars = root.findall("{http://www.w3.org/2000/svg}rect")
+    expected, _ = np.histogram(SERIES, bins=10)
+    counts = [
+        float(bar.find("{http://www.w3.org/2000/svg}title").text.split(": ")[1]) for bar in bars
+    ]
+    assert counts == list(expected)
+
+
+def test_single_value_series_renders():
+    for svg in (histogram_svg(Counter([4, 4, 4])), boxplot_svg(Counter([4, 4, 4]))):
+        assert ET.fromstring(svg).tag.endswith("svg")
+
+
+def test_svg_backend_writes_no_figures(tmp_path):
+    import handout
+
+    import soccer1
+
+    doc = handout.Handout(str(tmp_path))
+    soccer1.frequency_graphs(doc, "greece", series=SERIES, backend="svg")
+    doc.show()
+    assert not list(tmp_path.glob("*.png"))
+    assert (tmp_path / "index.html").read_text().count("<svg") == 2
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+import external.thinkstats2 as thinkstats2
+from sp_soccer_lib.distributions import Cdf, Hist, Pmf, from_thinkstats, to_thinkstats
+
+STREAKS = [0, 1, 1, 2, 2, 2, 3, 5, 5, 8, 13, 0, 2, 4]
+
+
+def test_hist_and_pmf_match_thinkstats2():
+    hist, reference_hist = Hist(STREAKS, label="Greece"), thinkstats2.Hist(STREAKS)
+    assert hist.Items() == reference_hist.SortedItems()
+    assert hist.Freq(2) == 4 and hist[99] == 0 and 13 in hist
+    assert hist.label == "Greece"
+
+    pmf, reference = Pmf(STREAKS), thinkstats2.Pmf(STREAKS)
+    for x, p in reference.SortedItems():
+        assert pmf.Prob(x) == pytest.approx(p)
+    assert pmf.Total() == pytest.approx(1)
+    assert pmf.Mean() == pytest.approx(reference.Mean())
+    assert pmf.Var() == pytest.approx(reference.Var())
+    assert pmf.Mode() == reference.Mode()
+    assert pmf.ProbGreater(3) == pytest.approx(reference.ProbGreater(3))
+    assert pmf.ProbLess(3) == pytest.approx(reference.ProbLess(3))
+    # thinkstats2 walks the dict in insertion order, and may fall off the end at 100
+    ordered = thinkstats2.Pmf(sorted(STREAKS))
+    for percentage in (0, 10, 50, 90, 99):
+        assert pmf.Percentile(percentage) == ordered.Percentile(percentage)
+    assert pmf.Percentile(100) == 13
+    assert Pmf(hist) == Pmf(dict(reference_hist.Items()))
+
+
+def test_sums_of_distributions_match_thinkstats2():
+    pmf, other = Pmf(STREAKS), Pmf([1, 1, 4, 7])
+    reference, other_reference = thinkstats2.Pmf(STREAKS), thinkstats2.Pmf([1, 1, 4, 7])
+    for result, expected in (
+        (pmf + other, reference + other_reference),  # integer grid convolution
+        (pmf - other, reference - other_reference),
+        (pmf * other, reference * other_reference),
+        (pmf.MulConstant(0.5) + other, reference.MulConstant(0.5) + other_reference),
+    ):
+        xs, ps = zip(*sorted(expected.Items()), strict=True)
+        assert result.xs.tolist() == pytest.approx(xs)
+        assert result.ws.tolist() == pytest.approx(ps)
+    assert (pmf + 2).Mean() == pytest.approx(pmf.Mean() + 2)
+    assert pmf.ProbGreater(other) == pytest.approx(reference.ProbGreater(other_reference))
+
+
+def test_cdf():
+    pmf = Pmf(STREAKS)
+    cdf = pmf.MakeCdf()
+    assert cdf.ps[-1] == pytest.approx(1)
+    assert cdf.Prob(-1) == 0 and cdf.Prob(2) == pytest.approx(8 / 14)
+    assert cdf.Prob(2.5) == cdf.Prob(2)
+    assert cdf.PercentileRanks([2, 100]) == pytest.approx([800 / 14, 100])
+    assert cdf.Value(0) == 0 and cdf.Value(1) == 13 and cdf.Percentile(50) == 2
+    assert cdf.CredibleInterval(80) == (0, 8)
+    assert cdf.Mean() == pytest.approx(pmf.Mean())
+    assert cdf.MakePmf() == pmf
+    with pytest.raises(ValueError):
+        cdf.Value(1.5)
+
+    xs, ps = cdf.Render()
+    assert xs.tolist() == np.repeat(cdf.xs, 2).tolist()
+    assert ps[:4].tolist() == pytest.approx([0, 2 / 14, 2 / 14, 4 / 14])
+
+    maximum = cdf.Max(3)  # largest of three draws
+    assert maximum.Prob(2) == pytest.approx(cdf.Prob(2) ** 3)
+
+
+def test_sampling_stays_on_the_support():
+    rng = np.random.default_rng(0)
+    pmf = Pmf(STREAKS)
+    sample = pmf.Sample(50_000, rng)
+    assert set(sample.tolist()) <= set(STREAKS)
+    assert sample.mean() == pytest.approx(pmf.Mean(), rel=0.02)
+    assert Pmf(sample).Prob(2) == pytest.approx(pmf.Prob(2), abs=0.01)
+
+
+def test_thinkstats2_bridge():
+    reference = thinkstats2.Pmf(STREAKS, label="Greece")
+    pmf = from_thinkstats(reference)
+    assert isinstance(pmf, Pmf) and pmf.label == "Greece"
+    assert pmf.Mean() == pytest.approx(reference.Mean())
+    assert isinstance(from_thinkstats(thinkstats2.Hist(STREAKS)), Hist)
+
+    back = to_thinkstats(pmf)
+    assert isinstance(back, thinkstats2.Pmf)
+    assert back.Mean() == pytest.approx(reference.Mean())
+    assert sorted(to_thinkstats(Hist(STREAKS)).Items()) == thinkstats2.Hist(STREAKS).SortedItems()
+    cdf = pmf.MakeCdf()
+    assert isinstance(from_thinkstats(to_thinkstats(cdf)), Cdf)
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+from scipy import stats
+from synthetic import synthetic_country_df
+
+import config as cfg
+import cprob_simulation
+import external.thinkbayes as thinkbayes
+from sp_soccer_lib import create_team_df_dict
+from sp_soccer_lib.championships import calc_period_draw_rate, team_stats
+from sp_soccer_lib.draw_rates import (
+    DEFAULT_PRIOR,
+    MAX_PRIOR_STRENGTH,
+    BetaPosteriors,
+    league_prior,
+    point_in_time,
+    priors_by_period,
+)
+
+
+@pytest.fixture
+def df():
+    return synthetic_country_df(n_teams=8, periods=cfg.PERIODS[-3:], seed=4)
+
+
+def test_counts_match_team_frames(df):
+    team_dfs = create_team_df_dict(df)
+    rates = BetaPosteriors.from_frame(df)
+    from_frames = BetaPosteriors.from_team_dfs(team_dfs)
+    assert rates.teams == from_frames.teams
+    assert rates.periods == from_frames.periods
+    assert np.array_equal(rates.draws, from_frames.draws)
+    assert np.array_equal(rates.matches, from_frames.matches)
+    column = rates.periods.index(cfg.CURRENT_PERIOD)
+    for i, team in enumerate(rates.teams):
+        raw = calc_period_draw_rate(team_dfs[team], cfg.CURRENT_PERIOD)
+        assert rates.draws[i, column] / rates.matches[i, column] == pytest.approx(raw, abs=1e-4)
+
+
+def test_posterior_matches_thinkbayes_beta(df):
+    rates = BetaPosteriors.from_frame(df, prior=(3.0, 8.0))
+    mean = rates.mean()
+    low, high = rates.interval(0.8)
+    for i in range(len(rates.teams)):
+        for j in range(len(rates.periods)):
+            beta = thinkbayes.Beta(3.0, 8.0)
+            beta.Update((rates.draws[i, j], rates.matches[i, j] - rates.draws[i, j]))
+            assert mean[i, j] == pytest.approx(beta.Mean())
+            assert low[i, j] == pytest.approx(stats.beta.ppf(0.1, beta.alpha, beta.beta))
+            assert high[i, j] == pytest.approx(stats.beta.ppf(0.9, beta.alpha, beta.beta))
+            assert low[i, j] < mean[i, j] < high[i, j]
+
+
+def test_league_prior_method_of_moments():
+    rng = np.random.default_rng(0)
+    true_rates = rng.beta(27, 73, 5000)
+    matches = np.full(5000, 38)
+    draws = rng.binomial(matches, true_rates)
+    alpha, beta = league_prior(draws, matches)
+    assert alpha / (alpha + beta) == pytest.approx(0.27, abs=0.01)
+    assert alpha + beta == pytest.approx(100, rel=0.25)
+    # No spread beyond binomial noise: strongest prior allowed
+    draws = rng.binomial(matches, 0.27)
+    alpha, beta = league_prior(draws, matches)
+    assert alpha + beta <= MAX_PRIOR_STRENGTH
+    assert league_prior([1], [20]) == DEFAULT_PRIOR
+
+
+def test_point_in_time_uses_only_earlier_matches_of_the_period(df):
+    team_dfs = create_team_df_dict(df)
+    team, team_df = next(iter(team_dfs.items()))
+    prior = (2.0, 5.0)
+    values = point_in_time(team_df, prior)
+    for position in range(len(team_df)):
+        earlier = team_df.iloc[:position]
+        earlier = earlier[earlier["period"] == team_df["period"].iloc[position]]
+        drawn = int((earlier["FTR"] == "D").sum())
+        assert values[position] == pytest.approx((2.0 + drawn) / (7.0 + len(earlier)))
+
+
+def test_priors_by_period_use_earlier_periods(df):
+    priors = priors_by_period(df)
+    periods = list(priors)
+    assert priors[periods[0]] == DEFAULT_PRIOR
+    rates = BetaPosteriors.from_frame(df)
+    assert priors[periods[2]] == league_prior(rates.draws[:, :2], rates.matches[:, :2])
+
+
+def test_team_stats_posterior_columns(df):
+    team_dfs = create_team_df_dict(df)
+    plain = team_stats(team_dfs)
+    stats_ = team_stats(team_dfs, posterior=True)
+    assert list(stats_.columns[: len(plain.columns)]) == list(plain.columns)
+    assert stats_["p_draw"].equals(plain["p_draw"])
+    assert (stats_["p_draw_low"] <= stats_["p_draw_post"]).all()
+    assert (stats_["p_draw_post"] <= stats_["p_draw_high"]).all()
+
+
+def test_posterior_simulation_keeps_the_warm_up(df):
+    team_dfs = create_team_df_dict(df)
+    team, team_df = next(iter(team_dfs.items()))
+    first = team_df[team_df["period"] == cfg.CURRENT_PERIOD].iloc[:3]
+
+    def run(**options):
+        config = cprob_simulation.SimulationConfig(threshold=0.0, **options)
+        simulation = cprob_simulation.CProbAdjSimulation(config)
+        return simulation.run_team_period(team, first, cfg.CURRENT_PERIOD, "greece")
+
+    # The posterior is defined from the first match, but bets still wait for three played
+    assert run().triggers == run(posterior_draw_rate=True).triggers == 0
+    assert run(posterior_draw_rate=True, min_matches_for_pdraw=0).triggers == 1
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+from synthetic import synthetic_country_df
+
+import cprob_simulation
+from sp_soccer_lib import create_team_df_dict, elo
+from sp_soccer_lib.championships import team_stats
+
+
+@pytest.fixture
+def df():
+    return synthetic_country_df(n_teams=8, periods=["2324", "2425", "2526"], seed=5)
+
+
+def test_probabilities():
+    home, draw, away = elo.result_probabilities(1500, 1500, home_advantage=0)
+    assert home == pytest.approx(away)
+    assert draw == pytest.approx(0.27)
+    home, draw, away = elo.result_probabilities(np.array([1400, 1700]), 1500)
+    assert home + draw + away == pytest.approx([1, 1])
+    assert home[1] > home[0] and away[1] < away[0]
+
+
+def test_incremental_updates_match_full_replay(df):
+    full, per_match = elo.EloRatings.replay(df)
+    assert len(per_match) == len(df) == full.matches
+    assert per_match.index.is_monotonic_increasing
+
+    # Daily updates: the frame grows; a cut also falls inside a match day
+    incremental = elo.EloRatings()
+    applied = []
+    for end in (100, 101, 150, len(df)):
+        applied.append(incremental.process(df.iloc[:end]))
+    assert incremental.process(df).empty  # nothing new
+    assert incremental.matches == len(df)
+    assert incremental.ratings == pytest.approx(full.ratings)
+    pd.testing.assert_frame_equal(pd.concat(applied), per_match)
+
+    # Only the current period's frame is needed once the history was applied
+    history = elo.EloRatings()
+    history.process(df[df["period"] != "2526"])
+    history.process(df[df["period"] == "2526"])
+    assert history.ratings == pytest.approx(full.ratings)
+
+
+def test_late_results_match_full_replay(df):
+    full, _ = elo.EloRatings.replay(df)
+    last_round = df.index == df.index.max()
+    postponed = df.index == df.index.unique()[-5]
+    pending = df.copy()
+    pending.loc[last_round | postponed, "FTR"] = np.nan
+
+    # Last round not played yet, then completed; one earlier match postponed
+    incremental = elo.EloRatings()
+    incremental.process(pending)
+    assert incremental.matches == len(df) - last_round.sum() - postponed.sum()
+    incremental.process(df.assign(FTR=pending["FTR"].where(postponed, df["FTR"])))
+    expected = df.assign(FTR=df["FTR"].where(~postponed))
+    assert incremental.ratings == pytest.approx(elo.EloRatings.replay(expected)[0].ratings)
+
+    # The postponed result comes in (dated before applied matches)
+    incremental.process(df)
+    assert incremental.matches == len(df)
+    assert incremental.ratings == pytest.approx(full.ratings)
+
+    # So does a row the frame did not have before
+    missing = elo.EloRatings()
+    missing.process(df[~postponed])
+    missing.process(df)
+    assert missing.ratings == pytest.approx(full.ratings)
+
+    # Only the current period at hand: the late result is applied, out of date order
+    current = df[df["period"] == "2526"]
+    partial = elo.EloRatings()
+    partial.process(df[df["period"] != "2526"])
+    partial.process(current[~postponed[df["period"] == "2526"]])
+    partial.process(current)
+    assert partial.matches == len(df)
+    assert set(partial.ratings) == set(full.ratings)
+
+
+def test_rating_changes_are_zero_sum_within_a_period(df):
+    season = df[df["period"] == "2324"]
+    ratings, _ = elo.EloRatings.replay(season)
+    assert sum(ratings.ratings.values()) == pytest.approx(elo.INITIAL_RATING * 8)
+    assert ratings.table().index[0] == max(ratings.ratings, key=ratings.ratings.get)
+
+
+def test_state_file_round_trip(df, tmp_path):
+    state_file = str(tmp_path / "elo.json")
+    elo.update_ratings({"greece": df.iloc[:120]}, state_file)
+    assert elo.load_ratings(state_file)["greece"].matches == 120
+    states = elo.update_ratings({"greece": df}, state_file)
+    assert states["greece"].matches == len(df)
+    assert states["greece"].ratings == pytest.approx(elo.EloRatings.replay(df)[0].ratings)
+
+
+def test_with_ratings_keeps_row_order(df):
+    shuffled = df.sample(frac=1, random_state=0)
+    rated = elo.with_ratings(shuffled)
+    _, per_match = elo.EloRatings.replay(df)
+    expected = elo.with_ratings(df)
+    key = ["HomeTeam", "AwayTeam", "period"]
+    merged = rated.reset_index().merge(expected.reset_index(), on=["Date"] + key)
+    for column in elo.RATING_COLUMNS:
+        np.testing.assert_allclose(merged[f"{column}_x"], merged[f"{column}_y"])
+    assert expected["elo_home"].tolist() == per_match["elo_home"].tolist()
+
+
+def test_team_stats_column_is_opt_in(df):
+    team_dfs = create_team_df_dict(df)
+    assert "Elo" not in team_stats(team_dfs)
+    ratings, _ = elo.EloRatings.replay(df)
+    stats = team_stats(team_dfs, ratings=ratings)
+    assert stats.loc["Team 00", "Elo"] == round(ratings.rating("Team 00"), 1)
+    partial = team_stats(team_dfs, ratings={"Team 00": 1612.34})
+    assert partial.loc["Team 00", "Elo"] == 1612.3
+    assert partial.loc["Team 01", "Elo"] == elo.INITIAL_RATING
+
+
+def test_simulation_elo_trigger(df):
+    team_dfs = create_team_df_dict(elo.with_ratings(df))
+    team = next(iter(team_dfs))
+
+    def run(**options):
+        config = cprob_simulation.SimulationConfig(threshold=0.5, **options)
+        simulation = cprob_simulation.CProbAdjSimulation(config)
+        return simulation.run_team_period(team, team_dfs[team], "2526", "greece")
+
+    plain = run()
+    assert plain.triggers > 0
+    assert run(elo_draw_threshold=0.0).cash_flow == plain.cash_flow
+    assert run(elo_draw_threshold=1.0).triggers == 0
@@ -0,0 +1,157 @@
+import sys
+import threading
+import time
+
+import pytest
+from ftp_stub import FakeFTPServer
+
+import file_watcher
+import ftp_transfer
+
+WATCHERS = [
+    pytest.param(lambda root: file_watcher.PollingWatcher(root, interval=0.05), id="polling"),
+    pytest.param(
+        file_watcher.InotifyWatcher,
+        id="inotify",
+        marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only"),
+    ),
+]
+
+
+def drain(watcher, timeout=0.3):
+    changed, removed = set(), set()
+    while True:
+        more_changed, more_removed = watcher.poll(timeout)
+        if not more_changed and not more_removed:
+            return changed, removed
+        changed = (changed - more_removed) | more_changed
+        removed = (removed - more_changed) | more_removed
+
+
+@pytest.mark.parametrize("make_watcher", WATCHERS)
+def test_changes_are_keyed_by_path(tmp_path, make_watcher):
+    for name in ("b.html", "c.html"):
+        (tmp_path / name).write_text(name)
+    watcher = make_watcher(str(tmp_path))
+    try:
+        # A new file sorting before the others must not mark them as changed
+        (tmp_path / "a.html").write_text("new")
+        (tmp_path / "greece").mkdir()
+        (tmp_path / "greece" / "index.html").write_text("nested")
+        assert drain(watcher) == (
+            {str(tmp_path / "a.html"), str(tmp_path / "greece" / "index.html")},
+            set(),
+        )
+        time.sleep(0.01)  # make sure mtime_ns moves for the polling watcher
+        (tmp_path / "c.html").write_text("changed")
+        (tmp_path / "b.html").unlink()
+        assert drain(watcher) == ({str(tmp_path / "c.html")}, {str(tmp_path / "b.html")})
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("make_watcher", WATCHERS)
+def test_directory_moved_out_of_the_tree(tmp_path, make_watcher):
+    root, outside = tmp_path / "handout", tmp_path / "outside"
+    (root / "greece" / "AEK").mkdir(parents=True)
+    outside.mkdir()
+    (root / "index.html").write_text("index")
+    (root / "greece" / "index.html").write_text("country")
+    (root / "greece" / "AEK" / "index.html").write_text("team")
+    watcher = make_watcher(str(root))
+    try:
+        (root / "greece" / "new.html").write_text("new")
+        assert drain(watcher) == ({str(root / "greece" / "new.html")}, set())
+        (root / "greece").rename(outside / "greece")
+        pages = {str(root / "greece" / name) for name in ("index.html", "new.html")}
+        assert drain(watcher) == (set(), pages | {str(root / "greece" / "AEK" / "index.html")})
+        # Writes in the moved-out directory are no longer reported
+        (outside / "greece" / "index.html").write_text("changed")
+        (root / "index.html").write_text("changed")
+        assert drain(watcher) == ({str(root / "index.html")}, set())
+    finally:
+        watcher.close()
+
+
+def test_ignore_rules_apply_to_watched_files(tmp_path):
+    watcher = file_watcher.create_watcher(str(tmp_path), accept=ftp_transfer._path_filter())
+    try:
+        (tmp_path / ".render_manifest.json").write_text("{}")
+        (tmp_path / "CVS").mkdir()
+        (tmp_path / "CVS" / "Entries").write_text("")
+        (tmp_path / "index.html").write_text("page")
+        assert drain(watcher) == ({str(tmp_path / "index.html")}, set())
+    finally:
+        watcher.close()
+
+
+def test_bursts_are_debounced_into_one_batch(tmp_path):
+    watcher = file_watcher.create_watcher(str(tmp_path))
+
+    def render():
+        for i in range(40):
+            (tmp_path / f"figure-{i}.png").write_bytes(b"png")
+            time.sleep(0.002)
+
+    threading.Thread(target=render).start()
+    try:
+        changed, removed = next(file_watcher.batches(watcher, debounce=0.3, idle=5))
+    finally:
+        watcher.close()
+    assert len(changed) == 40 and not removed
+
+
+def test_monitor_uploads_batches_over_one_session(tmp_path, mocker):
+    server = FakeFTPServer()
+    server.dirs.add("/site")
+    mocker.patch("ftp_transfer.ftplib.FTP", side_effect=server.client)
+    mocker.patch.object(ftp_transfer.FtpAddOns, "PATH_CACHE", set())
+    (tmp_path / "index.html").write_text("old")
+
+    monitor = threading.Thread(
+        target=ftp_transfer.monitor_and_ftp,
+        args=("host", "user", "pass", str(tmp_path), "/site"),
+        kwargs={"walk": True, "debounce": 0.2, "keepalive": 0.1, "max_batches": 2},
+    )
+    monitor.start()
+    time.sleep(0.3)
+    (tmp_path / "greece").mkdir()
+    for name in ("index.html", "figure-0.png", "figure-1.png"):
+        (tmp_path / "greece" / name).write_bytes(name.encode())
+    time.sleep(0.6)
+    (tmp_path / "index.html").write_text("new")
+    monitor.join(timeout=5)
+
+    assert not monitor.is_alive()
+    assert server.connections == 1
+    assert server.command_count("STOR") == 4
+    assert server.command_count("NOOP") >= 1
+    assert server.files["/site/index.html"] == b"new"
+    assert server.files["/site/greece/figure-1.png"] == b"figure-1.png"
+
+
+def test_monitor_carries_a_failed_batch_into_the_next(tmp_path, mocker):
+    server = FakeFTPServer(fail_stor=2)  # the first batch fails on both attempts
+    server.dirs.add("/site")
+    mocker.patch("ftp_transfer.ftplib.FTP", side_effect=server.client)
+    mocker.patch.object(ftp_transfer.FtpAddOns, "PATH_CACHE", set())
+    error = mocker.spy(ftp_transfer.logger, "error")
+
+    monitor = threading.Thread(
+        target=ftp_transfer.monitor_and_ftp,
+        args=("host", "user", "pass", str(tmp_path), "/site"),
+        kwargs={"debounce": 0.2, "keepalive": 5, "max_batches": 1},
+    )
+    monitor.start()
+    time.sleep(0.3)
+    (tmp_path / "first.html").write_text("first")
+    time.sleep(0.6)
+    assert monitor.is_alive()  # a failed batch does not count towards max_batches
+    (tmp_path / "second.html").write_text("second")
+    monitor.join(timeout=5)
+
+    assert not monitor.is_alive()
+    assert error.call_count == 1
+    assert server.command_count("STOR") == 4
+    assert server.files["/site/first.html"] == b"first"
+    assert server.files["/site/second.html"] == b"second"
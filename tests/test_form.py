@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from synthetic import synthetic_country_df
+
+import config as cfg
+from sp_soccer_lib import create_team_df_dict
+from sp_soccer_lib.championships import team_stats
+from sp_soccer_lib.form import add_form, current_form, form_columns, rolling_sums
+
+
+@pytest.fixture
+def team_dfs():
+    df = synthetic_country_df(n_teams=8, periods=cfg.PERIODS[-3:], seed=8)
+    # A fixture without a result yet
+    df.iloc[-1, df.columns.get_loc("FTR")] = np.nan
+    df.iloc[-1, df.columns.get_loc("FTHG")] = np.nan
+    df.iloc[-1, df.columns.get_loc("FTAG")] = np.nan
+    return create_team_df_dict(df)
+
+
+def expected_form(team, team_df, n, position, by_period):
+    """Form of one row the slow way: tail(n) of the matches up to it."""
+    earlier = team_df.iloc[: position + 1]
+    if by_period:
+        earlier = earlier[earlier["period"] == team_df["period"].iloc[position]]
+    window = earlier.tail(n)
+    played = window[window["FTR"].notna()]
+    is_home = played["HomeTeam"] == team
+    points = (played["result"] == "W").sum() * 3 + (played["result"] == "D").sum()
+    return {
+        "pts": points,
+        "draw_rate": round((played["FTR"] == "D").mean(), 4) if len(played) else np.nan,
+        "gf": np.where(is_home, played["FTHG"], played["FTAG"]).sum(),
+        "ga": np.where(is_home, played["FTAG"], played["FTHG"]).sum(),
+    }
+
+
+@pytest.mark.parametrize("by_period", [False, True])
+def test_add_form_matches_tail(team_dfs, by_period):
+    add_form(team_dfs, windows=(3, 5), by_period=by_period)
+    for team in list(team_dfs)[:3]:
+        team_df = team_dfs[team]
+        for position in (0, 2, 13, 14, 15, 20, len(team_df) - 1):
+            for n in (3, 5):
+                expected = expected_form(team, team_df, n, position, by_period)
+                for measure, value in expected.items():
+                    actual = team_df[f"{measure}_last{n}"].iloc[position]
+                    assert actual == pytest.approx(value, nan_ok=True), (team, position, measure)
+
+
+def test_rolling_sums_restart_at_segments():
+    values = np.arange(1, 8, dtype=float)[:, None]
+    starts = np.array([True, False, False, True, False, False, False])
+    sums = rolling_sums(values, starts, 2)[:, 0]
+    assert sums.tolist() == [1, 3, 5, 4, 9, 11, 13]
+
+
+def test_current_form_and_team_stats(team_dfs):
+    form = current_form(team_dfs, windows=(5,))
+    assert list(form.columns) == form_columns((5,))
+    add_form(team_dfs, windows=(5,))
+    for team, team_df in team_dfs.items():
+        assert form.loc[team].to_numpy() == pytest.approx(
+            team_df[form_columns((5,))].iloc[-1].to_numpy(dtype=float), nan_ok=True
+        )
+    stats = team_stats(team_dfs, form_windows=(5,))
+    pd.testing.assert_frame_equal(stats[form.columns], form.loc[stats.index])
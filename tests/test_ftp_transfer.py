@@ -0,0 +1,230 @@
+import ftplib
+import io
+import json
+import urllib.error
+import urllib.parse
+
+import pytest
+from ftp_stub import FakeFTP, FakeFTPServer
+
+import ftp_transfer
+
+REMOTE = "/site"
+
+
+@pytest.fixture
+def server(mocker):
+    server = FakeFTPServer()
+    server.dirs.add(REMOTE)
+    mocker.patch("ftp_transfer.ftplib.FTP", side_effect=server.client)
+    mocker.patch.object(ftp_transfer.FtpAddOns, "PATH_CACHE", set())
+    return server
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "handout"
+    for page in ["", "greece", "greece/AEK", "greece/PAOK", "italy", "italy/Roma"]:
+        (root / page).mkdir(parents=True, exist_ok=True)
+        (root / page / "index.html").write_text(f"<p>{page}</p>")
+        (root / page / "figure-0.png").write_bytes(page.encode() * 10)
+    return root
+
+
+def sync(site, **kwargs):
+    return ftp_transfer.sync_all("host", "user", "pass", str(site), REMOTE, **kwargs)
+
+
+def test_first_sync_uploads_everything(server, site):
+    report = sync(site)
+    assert report["uploaded"] == report["files"] == 12
+    assert f"{REMOTE}/greece/AEK/index.html" in server.files
+    assert f"{REMOTE}/{ftp_transfer.MANIFEST_NAME}" in server.files
+    assert (site / ftp_transfer.MANIFEST_NAME).exists()
+
+
+def test_second_sync_only_sends_changes(server, site):
+    sync(site)
+    server.commands.clear()
+    report = sync(site)
+    assert report["uploaded"] == 0 and report["bytes_sent"] == 0
+    assert server.command_count("STOR") == 1  # the manifest itself
+
+    (site / "greece" / "AEK" / "index.html").write_text("<p>new result</p>")
+    (site / "italy" / "Roma" / "figure-1.png").write_bytes(b"png")
+    (site / "greece" / "PAOK" / "figure-0.png").unlink()
+    report = sync(site, delete=True)
+    assert (report["uploaded"], report["deleted"]) == (2, 1)
+    assert f"{REMOTE}/greece/PAOK/figure-0.png" not in server.files
+    assert server.files[f"{REMOTE}/greece/AEK/index.html"] == b"<p>new result</p>"
+    assert report["bytes_saved"] > 0 and report["round_trips_saved"] > 0
+
+
+def test_remote_manifest_is_used_without_local_copy(server, site):
+    sync(site)
+    (site / ftp_transfer.MANIFEST_NAME).unlink()  # fresh CI checkout
+    assert sync(site)["uploaded"] == 0
+
+
+def test_transient_manifest_error_falls_back_to_full_upload(server, site, mocker):
+    mocker.patch.object(FakeFTP, "retrbinary", side_effect=ftplib.error_temp("421 Try again"))
+    report = sync(site)
+    assert report["uploaded"] == 12
+    assert f"{REMOTE}/{ftp_transfer.MANIFEST_NAME}" in server.files
+
+
+def test_delta_sync_uses_fewer_commands_than_upload_all(server, site):
+    ftp_transfer.upload_all("host", "user", "pass", str(site), REMOTE, [], walk=True)
+    full = server.command_count()
+    server.files.clear()
+    server.commands.clear()
+    ftp_transfer.FtpAddOns.PATH_CACHE.clear()
+    sync(site)
+    server.commands.clear()
+    (site / "italy" / "index.html").write_text("changed")
+    sync(site)
+    assert server.command_count() < full / 4
+
+
+def all_files(site):
+    return sorted(
+        str(p.relative_to(site)) for p in site.rglob("*") if p.is_file() and p.name[0] != "."
+    )
+
+
+def test_pool_upload_spreads_directories_over_connections(server, site):
+    uploaded, report = ftp_transfer.pool_upload(
+        "host", "user", "pass", str(site), REMOTE, all_files(site), connections=3, backoff=0
+    )
+    assert sorted(uploaded) == all_files(site)
+    assert report["connections"] == 3 and report["uploaded"] == 12
+    assert server.connections == 1 + 3  # control connection + one per worker
+    # Directories are created once, in the pre-pass, and cached for every worker
+    assert server.command_count("MKD") == 5
+    assert f"{REMOTE}/italy/Roma" in ftp_transfer.FtpAddOns.PATH_CACHE
+
+
+def test_pool_upload_retries_transient_and_dropped_sessions(server, site, mocker):
+    server.fail_stor = 2
+    uploaded, _ = ftp_transfer.pool_upload(
+        "host", "user", "pass", str(site), REMOTE, all_files(site), connections=2, backoff=0
+    )
+    assert sorted(uploaded) == all_files(site)
+
+    # Drop one session mid-upload: the worker reconnects and carries on
+    server.files.clear()
+    original = server.client
+    clients = []
+
+    def flaky_client(*args, **kwargs):
+        client = original()
+        clients.append(client)
+        if len(clients) == 2:
+            store = client.storbinary
+
+            def drop_once(*a, **kw):
+                client.storbinary = store
+                client.closed = True
+                raise ConnectionResetError("dropped")
+
+            client.storbinary = drop_once
+        return client
+
+    mocker.patch("ftp_transfer.ftplib.FTP", side_effect=flaky_client)
+    uploaded, _ = ftp_transfer.pool_upload(
+        "host", "user", "pass", str(site), REMOTE, all_files(site), connections=2, backoff=0
+    )
+    assert sorted(uploaded) == all_files(site)
+    assert len(clients) == 1 + 2 + 1
+
+
+def test_sync_all_with_connection_pool(server, site):
+    report = sync(site, connections=4)
+    assert report["uploaded"] == 12
+    assert sync(site, connections=4)["uploaded"] == 0
+
+
+def test_sync_all_reconnects_after_idle_pool_upload(server, site, mocker):
+    clients = []
+
+    def client(*args, **kwargs):
+        clients.append(server.client())
+        return clients[-1]
+
+    mocker.patch("ftp_transfer.ftplib.FTP", side_effect=client)
+    pool_upload = ftp_transfer.pool_upload
+
+    def idle_timeout(*args, **kwargs):
+        clients[0].close()  # the server drops the idle control connection
+        return pool_upload(*args, **kwargs)
+
+    mocker.patch("ftp_transfer.pool_upload", side_effect=idle_timeout)
+    report = sync(site, connections=2)
+    assert report["uploaded"] == 12
+    manifest = json.loads(server.files[f"{REMOTE}/{ftp_transfer.MANIFEST_NAME}"])
+    assert len(manifest) == 12
+    assert sync(site, connections=2)["uploaded"] == 0
+
+
+class ExtractHook:
+    """Stands in for the host's extraction endpoint, unpacking bundles into the fake server."""
+
+    def __init__(self, server, workdir, fail=False):
+        self.server = server
+        self.workdir = workdir
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self, request, timeout=None):
+        self.calls += 1
+        if self.fail:
+            raise urllib.error.URLError("hook not installed")
+        name = urllib.parse.parse_qs(request.data.decode())["bundle"][0]
+        data = self.server.files[f"{REMOTE}/{name}"]
+        target = self.workdir / str(self.calls)
+        extracted = ftp_transfer.extract_bundle(data, target)
+        for rel_path in extracted:
+            self.server.files[f"{REMOTE}/{rel_path}"] = (target / rel_path).read_bytes()
+        return io.BytesIO(json.dumps({"extracted": len(extracted)}).encode())
+
+
+def test_bundle_sync_sends_one_archive(server, site, tmp_path, mocker):
+    hook = ExtractHook(server, tmp_path / "host")
+    mocker.patch("ftp_transfer.urllib.request.urlopen", side_effect=hook)
+    report = sync(site, extract_url="https://example.invalid/extract.php")
+    assert report["uploaded"] == 12 and report["round_trips_saved"] > 0
+    assert server.command_count("STOR") == 2  # bundle + upload manifest
+    assert server.files[f"{REMOTE}/greece/AEK/index.html"] == b"<p>greece/AEK</p>"
+    assert not [path for path in server.files if ".bundle-" in path]
+    assert server.command_count("DELE") == 1  # the extracted archive
+
+    server.commands.clear()
+    (site / "italy" / "Roma" / "index.html").write_text("<p>derby</p>")
+    report = sync(site, extract_url="https://example.invalid/extract.php")
+    assert report["uploaded"] == 1 and server.command_count("STOR") == 2
+    assert server.files[f"{REMOTE}/italy/Roma/index.html"] == b"<p>derby</p>"
+
+
+def test_bundle_sync_falls_back_to_per_file_upload(server, site, tmp_path, mocker):
+    mocker.patch(
+        "ftp_transfer.urllib.request.urlopen", side_effect=ExtractHook(server, tmp_path, fail=True)
+    )
+    report = sync(site, extract_url="https://example.invalid/extract.php")
+    assert report["uploaded"] == 12
+    assert server.command_count("STOR") == 1 + 12 + 1
+    assert f"{REMOTE}/italy/Roma/figure-0.png" in server.files
+    assert not [path for path in server.files if ".bundle-" in path]
+
+
+def test_extract_bundle_rejects_tampered_files(site, tmp_path):
+    rel_paths = ["index.html", "greece/index.html"]
+    manifest = ftp_transfer.build_manifest(
+        str(site), [{"path": str(site / rel_path)} for rel_path in rel_paths]
+    )
+    bundle = ftp_transfer.build_bundle(str(site), rel_paths, manifest)
+    assert ftp_transfer.extract_bundle(bundle, tmp_path / "ok") == sorted(rel_paths)
+
+    manifest["index.html"]["md5"] = "0" * 32
+    bundle = ftp_transfer.build_bundle(str(site), rel_paths, manifest)
+    with pytest.raises(ValueError, match="Checksum"):
+        ftp_transfer.extract_bundle(bundle, tmp_path / "bad")
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import optimize, stats
+from synthetic import synthetic_country_df
+
+from sp_soccer_lib import goals_model
+
+
+@pytest.fixture
+def season():
+    df = synthetic_country_df(n_teams=10, periods=["2425", "2526"], seed=2)
+    return df[df["period"] == "2526"]
+
+
+def test_gradient_matches_finite_differences(season):
+    teams, home, away, x, y = goals_model.match_arrays(season)
+    n = len(teams)
+    rng = np.random.default_rng(0)
+    params = rng.normal(0, 0.2, 2 * n + 2)
+    params[-1] = 0.05
+    weights = rng.uniform(0.5, 1, len(x))
+
+    def value(p):
+        return goals_model.negative_log_likelihood(p, home, away, x, y, n, weights)[0]
+
+    def gradient(p):
+        return goals_model.negative_log_likelihood(p, home, away, x, y, n, weights)[1]
+
+    assert optimize.check_grad(value, gradient, params) < 1e-3 * np.abs(gradient(params)).sum()
+
+
+def test_recovers_simulated_strengths():
+    rng = np.random.default_rng(1)
+    matches = pd.concat(
+        [synthetic_country_df(n_teams=12, periods=["2526"], seed=s) for s in range(6)]
+    )
+    teams = sorted(set(matches["HomeTeam"]))
+    attack, defence = rng.normal(0, 0.3, (2, len(teams)))
+    home = matches["HomeTeam"].map({t: i for i, t in enumerate(teams)}).to_numpy()
+    away = matches["AwayTeam"].map({t: i for i, t in enumerate(teams)}).to_numpy()
+    matches = matches.assign(
+        FTHG=rng.poisson(np.exp(attack[home] + defence[away] + 0.3)),
+        FTAG=rng.poisson(np.exp(attack[away] + defence[home])),
+    )
+    model = goals_model.fit(matches)
+    assert model.teams == teams
+    assert np.corrcoef(model.attack, attack)[0, 1] > 0.9
+    assert np.corrcoef(model.defence, defence)[0, 1] > 0.9
+    assert model.home_advantage == pytest.approx(0.3, abs=0.1)
+    assert goals_model.RHO_BOUNDS[0] <= model.rho <= goals_model.RHO_BOUNDS[1]
+
+
+def test_result_probabilities(season):
+    model = goals_model.fit(season)
+    home, away = model.teams[:4], model.teams[4:8]
+    p_home, p_draw, p_away = model.result_probabilities(home, away, max_goals=15)
+    assert p_home + p_draw + p_away == pytest.approx(np.ones(4), abs=1e-6)
+    # Draw probability by hand: Poisson diagonal with the corrected 0-0 and 1-1 scores
+    lam, mu = model.rates(home[:1], away[:1])
+    goals = np.arange(16)
+    diagonal = stats.poisson.pmf(goals, lam[0]) * stats.poisson.pmf(goals, mu[0])
+    diagonal[0] *= 1 - lam[0] * mu[0] * model.rho
+    diagonal[1] *= 1 - model.rho
+    assert p_draw[0] == pytest.approx(diagonal.sum())
+
+    table = goals_model.match_probabilities(model, season.head(5))
+    assert table["p_draw"].between(0, 1).all()
+    assert table["p_draw_odds"].tolist() == [round(1 / odds, 4) for odds in season.head(5)["B365D"]]
+
+
+def test_daily_update_starts_from_saved_fit(season, tmp_path):
+    state_file = str(tmp_path / "goals_model.json")
+    first = goals_model.fit_leagues({"greece": season.iloc[:-5]}, state_file, period="2526")
+    saved = goals_model.load_fits(state_file)
+    np.testing.assert_allclose(saved["greece"].attack, first["greece"].attack)
+    assert saved["greece"].extra == {"league": "greece", "period": "2526"}
+
+    updated = goals_model.fit_leagues({"greece": season}, state_file, period="2526")["greece"]
+    cold = goals_model.fit(season)
+    assert updated.iterations < cold.iterations
+    np.testing.assert_allclose(updated.attack, cold.attack, atol=1e-3)
+    assert updated.matches == len(season)
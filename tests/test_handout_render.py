@@ -0,0 +1,77 @@
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from synthetic import synthetic_country_df
+
+from sp_soccer_lib import instrumentation
+
+COUNTRIES = ["greece", "italy"]
+
+
+def html_checksums(root: Path) -> dict:
+    return {
+        str(path.relative_to(root)): hashlib.md5(path.read_bytes()).hexdigest()
+        for path in sorted(root.rglob("*.html"))
+    }
+
+
+@pytest.fixture
+def offline_soccer1(mocker):
+    import soccer1
+
+    frames = {
+        country: synthetic_country_df(n_teams=4, periods=["2425", "2526"], seed=seed)
+        for seed, country in enumerate(COUNTRIES)
+    }
+    mocker.patch.object(soccer1, "COUNTRIES", COUNTRIES)
+    mocker.patch.object(soccer1, "load_country", side_effect=lambda c: frames[c].copy())
+    return soccer1
+
+
+def test_parallel_render_matches_serial(offline_soccer1, tmp_path, monkeypatch):
+    checksums = {}
+    for workers in (1, 2):
+        run_dir = tmp_path / f"workers{workers}"
+        run_dir.mkdir()
+        monkeypatch.chdir(run_dir)
+        instrumentation.reset()
+        offline_soccer1.update_local_handout(workers=workers)
+        checksums[workers] = html_checksums(run_dir / "handout")
+        # Pages rendered in pool workers are timed there and merged back
+        timings = instrumentation.report()["timings"]
+        assert timings["render_team_page"]["calls"] == len(COUNTRIES) * 4
+        assert timings["render_country_page"]["calls"] == len(COUNTRIES)
+
+    # index + per country (country page + 4 teams)
+    assert len(checksums[1]) == 1 + len(COUNTRIES) * 5
+    assert checksums[1] == checksums[2]
+    assert (tmp_path / "workers2" / "handout" / "italy" / "Team 03" / "figure-1.png").exists()
+
+
+def test_unchanged_pages_are_skipped(offline_soccer1, tmp_path, monkeypatch, mocker):
+    monkeypatch.chdir(tmp_path)
+    first = offline_soccer1.update_local_handout()
+    assert len(first) == len(COUNTRIES) * 5
+    before = html_checksums(tmp_path / "handout")
+
+    assert offline_soccer1.update_local_handout() == []
+    assert html_checksums(tmp_path / "handout") == before
+
+    # A new Greek match only touches the Greek country page and the two teams involved
+    greece = synthetic_country_df(n_teams=4, periods=["2425", "2526"], seed=0)
+    new_match = greece.iloc[[-1]].copy()
+    new_match.index = new_match.index + pd.Timedelta(days=7)
+    frames = {"greece": pd.concat([greece, new_match]), "italy": None}
+    original = offline_soccer1.load_country.side_effect
+    mocker.patch.object(
+        offline_soccer1,
+        "load_country",
+        side_effect=lambda c: frames[c] if frames[c] is not None else original(c),
+    )
+    home, away = new_match.iloc[0][["HomeTeam", "AwayTeam"]]
+    assert sorted(offline_soccer1.update_local_handout()) == sorted(
+        ["greece", f"greece/{home}", f"greece/{away}"]
+    )
+    assert len(offline_soccer1.update_local_handout(force=True)) == len(first)
@@ -0,0 +1,95 @@
+import json
+import pstats
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from sp_soccer_lib import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def fresh_run():
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+def test_timers_and_counters_aggregate_across_threads():
+    @instrumentation.timed("work")
+    def work():
+        time.sleep(0.01)
+        instrumentation.count("items", 2)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with pytest.raises(ValueError), instrumentation.timer("failing"):
+        raise ValueError
+
+    report = instrumentation.report()
+    assert report["timings"]["work"]["calls"] == 4
+    assert report["timings"]["work"]["max"] >= 0.01
+    assert report["timings"]["work"]["total"] >= 4 * 0.01
+    assert report["timings"]["failing"]["calls"] == 1
+    assert report["counters"] == {"items": 8}
+
+
+def test_write_report_with_cprofile_dump(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_STAGE", "hot")
+    for _ in range(2):
+        with instrumentation.timer("hot"):
+            sorted(range(10000), key=lambda x: -x)
+    with instrumentation.timer("cold"):
+        pass
+
+    written = instrumentation.write_report(
+        str(tmp_path / "reports" / "run.json"), profile_dir=str(tmp_path / "prof")
+    )
+    on_disk = json.loads((tmp_path / "reports" / "run.json").read_text())
+    assert on_disk == written
+    assert on_disk["profiles"] == [str(tmp_path / "prof" / "hot.prof")]
+    stats = pstats.Stats(on_disk["profiles"][0])
+    assert any(func[2] == "<lambda>" for func in stats.stats)
+
+
+def test_pipeline_run_is_reported(tmp_path, monkeypatch):
+    from synthetic import synthetic_country_df
+
+    import pipeline
+
+    monkeypatch.chdir(tmp_path)
+    frames = {"greece": synthetic_country_df(n_teams=4, periods=["2425", "2526"])}
+    pipeline.run_pipeline(countries=["greece"], dry_run=True, loader=lambda c: frames[c].copy())
+
+    report = instrumentation.report()
+    assert report["counters"]["pages_rendered"] == 5
+    for name in ("create_team_df_dict", "team_stats", "render_team_page", "pipeline.render"):
+        assert report["timings"][name]["calls"] >= 1
+    assert report["timings"]["render_team_page"]["calls"] == 4
+
+
+@instrumentation.timed("pooled")
+def pooled_work(n):
+    instrumentation.count("pooled_items", n)
+    return n * 2
+
+
+def test_pool_worker_timings_are_merged():
+    with instrumentation.timer("pooled"):  # the parent's own calls, not resent by workers
+        pass
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(instrumentation.recorded, pooled_work, n) for n in range(1, 5)]
+        results = []
+        for future in futures:
+            result, taken = future.result()
+            instrumentation.merge(taken)
+            results.append(result)
+
+    assert results == [2, 4, 6, 8]
+    report = instrumentation.report()
+    assert report["timings"]["pooled"]["calls"] == 1 + 4
+    assert report["counters"] == {"pooled_items": 10}
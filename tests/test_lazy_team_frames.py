@@ -0,0 +1,112 @@
+import pandas as pd
+import pytest
+from synthetic import synthetic_country_df
+
+from sp_soccer_lib import (
+    FrameCache,
+    LazyTeamFrames,
+    create_team_df_dict,
+    no_draw_frequencies,
+    streak_distribution,
+)
+from sp_soccer_lib.championships import team_stats
+
+
+@pytest.fixture
+def df():
+    df = synthetic_country_df(n_teams=6, periods=["2324", "2425", "2526"], seed=4)
+    # A relegated team: played the earlier periods only
+    relegated = df[df["period"] == "2324"].iloc[:3].copy()
+    relegated["HomeTeam"] = "Relegated FC"
+    return pd.concat([df, relegated]).sort_index()
+
+
+def test_same_keys_order_and_frames_as_create_team_df_dict(df):
+    eager = create_team_df_dict(df)
+    lazy = LazyTeamFrames(df)
+    assert list(lazy) == list(eager)
+    assert "Relegated FC" not in lazy
+    with pytest.raises(KeyError):
+        lazy["Relegated FC"]
+    assert len(lazy.positions("Relegated FC")) == 3
+    for team in eager:
+        pd.testing.assert_frame_equal(lazy[team], eager[team])
+    pd.testing.assert_frame_equal(team_stats(LazyTeamFrames(df)), team_stats(eager))
+
+
+def test_frames_are_built_on_access_and_evicted_lru(df):
+    lazy = LazyTeamFrames(df, maxsize=2)
+    assert len(lazy.cache) == 0
+    first, second, third = list(lazy)[:3]
+    built = lazy[first]
+    assert lazy[first] is built  # cached
+    lazy[second]
+    lazy[first]  # most recently used again
+    lazy[third]  # evicts second
+    assert len(lazy.cache) == 2
+    assert lazy[first] is built
+    pd.testing.assert_frame_equal(lazy[second], create_team_df_dict(df)[second])
+
+
+def test_shared_cache_bounds_frames_across_countries(df):
+    cache = FrameCache(maxsize=4)
+    greece = LazyTeamFrames(df, cache=cache)
+    italy = LazyTeamFrames(synthetic_country_df(n_teams=6, seed=9), cache=cache)
+    for team in greece:
+        greece[team]
+    for team in italy:
+        italy[team]
+    assert len(cache) == 4
+    assert greece[next(iter(greece))] is not italy[next(iter(italy))]
+
+
+def test_no_draw_frequencies_builds_no_team_frames(df, mocker):
+    mocker.patch("sp_soccer_lib.championships.load_country", return_value=df)
+    streak_distribution.clear_cache()
+    team = list(create_team_df_dict(df))[1]
+    expected = no_draw_frequencies(
+        "greece", team_dfs=create_team_df_dict(df), specific_teams=[team]
+    )
+    build = mocker.spy(LazyTeamFrames, "__getitem__")
+    assert no_draw_frequencies("greece", [team]) == expected
+    assert build.call_count == 0  # streaks come from the match arrays (StreakDistribution)
+    streak_distribution.clear_cache()
+
+
+def test_app_team_endpoint_builds_one_team(df, mocker):
+    app = pytest.importorskip("app")
+    mocker.patch.object(app, "TEAM_FRAMES", {})
+    mocker.patch.object(app, "COUNTRY_FRAMES", {})
+    mocker.patch.object(app, "FRAME_CACHE", FrameCache(maxsize=8))
+    load = mocker.patch.object(app, "bootstrap_country", return_value=df)
+    client = app.app.test_client()
+    team = list(create_team_df_dict(df))[0]
+    for _ in range(2):
+        response = client.get(f"/team/greece/{team}")
+        assert response.status_code == 200
+        assert len(response.get_json()[team]) == len(create_team_df_dict(df)[team])
+    load.assert_called_once_with("greece")
+    assert len(app.FRAME_CACHE) == 1
+    assert client.get("/team/greece/Relegated FC").status_code == 400
+
+
+def test_app_team_frames_reload_after_ttl(df, mocker):
+    app = pytest.importorskip("app")
+    mocker.patch.object(app, "TEAM_FRAMES", {})
+    mocker.patch.object(app, "COUNTRY_FRAMES", {})
+    mocker.patch.object(app, "FRAME_CACHE", FrameCache(maxsize=8))
+    mocker.patch.object(app.cfg, "API_DATA_TTL", 60)
+    newer = df.iloc[:-4]
+    load = mocker.patch.object(app, "bootstrap_country", side_effect=[newer, df])
+    clock = mocker.patch.object(app.time, "monotonic", return_value=1000.0)
+    client = app.app.test_client()
+    team = list(create_team_df_dict(df))[0]
+
+    full = len(create_team_df_dict(df)[team])
+    first = len(client.get(f"/team/greece/{team}").get_json()[team])
+    assert first < full
+    clock.return_value = 1059.0
+    assert len(client.get(f"/team/greece/{team}").get_json()[team]) == first
+    clock.return_value = 1060.0
+    assert len(client.get(f"/team/greece/{team}").get_json()[team]) == full
+    assert load.call_count == 2
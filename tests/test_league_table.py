@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from synthetic import synthetic_country_df
+
+import config as cfg
+from sp_soccer_lib import create_team_df_dict
+from sp_soccer_lib.championships import team_stats
+from sp_soccer_lib.league_table import TABLE_COLUMNS, LeagueHistory, league_histories
+
+
+@pytest.fixture
+def df():
+    return synthetic_country_df(n_teams=8, periods=cfg.PERIODS[-3:], seed=6)
+
+
+def expected_table(df, date):
+    """team_stats of the matches up to date, renamed to the table columns."""
+    stats = team_stats(create_team_df_dict(df[df.index <= date]))
+    period = cfg.CURRENT_PERIOD
+    stats = stats.rename(
+        columns={
+            f"{period}_wins": "W",
+            f"{period}_draws": "D",
+            f"{period}_losses": "L",
+            f"{period}_gf": "GF",
+            f"{period}_ga": "GA",
+            f"{period}_points": "PTS",
+        }
+    )
+    return stats[["W", "D", "L", "GF", "GA", "PTS", "CurrentNoDraw"]]
+
+
+@pytest.mark.parametrize("round_no", [0, 5, 13])
+def test_table_matches_team_stats_of_sliced_frame(df, round_no):
+    current = df[df["period"] == cfg.CURRENT_PERIOD]
+    date = current.index.unique()[round_no]
+    table = LeagueHistory.from_frame(df).table(date)
+    expected = expected_table(df, date)
+    assert list(table.index) == list(expected.index)
+    pd.testing.assert_frame_equal(
+        table[expected.columns], expected, check_dtype=False, check_names=False
+    )
+    assert (table["P"] == round_no + 1).all()
+
+
+def test_dates_between_and_outside_matches(df):
+    history = LeagueHistory.from_frame(df)
+    dates = df[df["period"] == cfg.CURRENT_PERIOD].index.unique()
+    between = dates[3] + pd.Timedelta(days=2)
+    assert history.table(between).equals(history.table(dates[3]))
+    first = history.table(dates[0] - pd.Timedelta(days=1), period=cfg.CURRENT_PERIOD)
+    assert (first[TABLE_COLUMNS].to_numpy() == 0).all()
+    assert history.period_of(dates[0] - pd.Timedelta(days=1)) == cfg.PERIODS[-2]
+    assert history.period_of(dates[0]) == cfg.CURRENT_PERIOD
+    assert history.period_of("2000-01-01") == cfg.PERIODS[-3]
+    last = history.table("2100-01-01")
+    assert (last["P"] == 14).all()
+
+
+def test_snapshot_and_max_streak(df):
+    history = LeagueHistory.from_frame(df)
+    dates = df[df["period"] == cfg.CURRENT_PERIOD].index.unique()
+    team_dfs = create_team_df_dict(df)
+    for team, team_df in team_dfs.items():
+        rows = team_df[(team_df["period"] == cfg.CURRENT_PERIOD) & (team_df.index <= dates[9])]
+        snapshot = history.snapshot(team, dates[9])
+        assert snapshot["CurrentNoDraw"] == rows["count_no_draw"].iloc[-1]
+        assert snapshot["MaxNoDrawPeriod"] == rows["count_no_draw"].max()
+        assert snapshot["PTS"] == history.table(dates[9]).loc[team, "PTS"]
+
+
+def test_league_histories(df):
+    histories = league_histories({"a": df, "b": synthetic_country_df(seed=1)})
+    assert set(histories) == {"a", "b"}
+    assert np.all(np.diff(histories["a"].keys) >= 0)
@@ -0,0 +1,86 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from synthetic import synthetic_country_df, write_synthetic_csvs
+
+import config as cfg
+from sp_soccer_lib import championships, leagues
+from sp_soccer_lib.handout_helpers import get_country_header
+
+
+def test_registry_lookup_by_key_name_or_code():
+    assert set(cfg.LEAGUES) <= set(leagues.LEAGUES)
+    assert len(leagues.LEAGUES) >= 20
+    assert leagues.get_league("greece") is leagues.get_league("Greece") is leagues.LEAGUES["greece"]
+    assert leagues.get_league("SC0").key == "scotland"
+    assert leagues.LEAGUES["england"].date_format("1718") == leagues.DATE_FORMAT_YYYY
+    assert leagues.LEAGUES["spain"].date_format("1718") == leagues.DATE_FORMAT_YY
+    with pytest.raises(KeyError):
+        leagues.get_league("atlantis")
+    with pytest.raises(Exception, match="Not Found Country"):
+        championships.load_country("atlantis")
+
+
+def test_headers_come_from_the_registry():
+    assert get_country_header("greece") == (
+        '<img src="https://www.slgr.gr/img/defaultOg.jpg" alt="Logo" width="100%">'
+    )
+    assert get_country_header("netherlands") == "<h2>Netherlands</h2>"
+    assert get_country_header("atlantis") == "<h2>Atlantis</h2>"
+
+
+def test_new_league_loads_with_its_own_corrections(tmp_path):
+    portugal = leagues.League("portugal", "P1", "Portugal", corrections={"Team 01": "Benfica"})
+    periods = ["1718", "1819"]
+    write_synthetic_csvs(tmp_path, [portugal], n_teams=4, periods=periods)
+    with (
+        mock.patch.dict(leagues.LEAGUES, {"portugal": portugal}),
+        mock.patch.object(championships, "DATA_URL", str(tmp_path)),
+        mock.patch.object(cfg, "PERIODS", periods),
+    ):
+        df = championships.load_country("portugal")
+    assert len(df) == 2 * 12
+    assert "Benfica" in set(df["HomeTeam"])
+    assert "Team 01" not in set(df["HomeTeam"])
+
+
+def test_iter_leagues_streams_in_order_with_bounded_prefetch():
+    keys = [f"league{i}" for i in range(12)]
+    lock = threading.Lock()
+    loaded = []  # keys loaded but not yet consumed
+    peak = [0]
+
+    def loader(key):
+        time.sleep(0.005)
+        if key == "league3":
+            raise ValueError("no such file")
+        with lock:
+            loaded.append(key)
+            peak[0] = max(peak[0], len(loaded))
+        return key.upper()
+
+    seen, errors = [], []
+    for key, loading in leagues.iter_leagues(keys, loader, workers=4, prefetch=3):
+        try:
+            assert loading.result() == key.upper()
+        except ValueError:
+            errors.append(key)
+            continue
+        with lock:
+            loaded.remove(key)
+        seen.append(key)
+    assert seen == [key for key in keys if key != "league3"]
+    assert errors == ["league3"]
+    assert peak[0] <= 3
+
+
+def test_app_bootstraps_any_registered_league(mocker):
+    app = pytest.importorskip("app")
+    frame = synthetic_country_df(n_teams=4)
+    load = mocker.patch.object(app, "load_country", return_value=frame)
+    client = app.app.test_client()
+    assert client.get("/team_stats/scotland").status_code == 200
+    load.assert_called_once_with("scotland")
+    assert client.get("/team_stats/atlantis").status_code == 400
@@ -0,0 +1,111 @@
+import hashlib
+
+import pytest
+from ftp_stub import FakeFTPServer
+from synthetic import synthetic_country_df
+
+import ftp_transfer
+import pipeline
+from sp_soccer_lib import elo
+
+COUNTRIES = ["greece", "italy", "spain"]
+FRAMES = {
+    country: synthetic_country_df(n_teams=4, periods=["2425", "2526"], seed=seed)
+    for seed, country in enumerate(COUNTRIES)
+}
+
+
+def load(country):
+    return FRAMES[country].copy()
+
+
+def html_checksums(root):
+    return {
+        str(path.relative_to(root)): hashlib.md5(path.read_bytes()).hexdigest()
+        for path in sorted(root.rglob("*.html"))
+    }
+
+
+@pytest.fixture
+def server(mocker):
+    server = FakeFTPServer()
+    server.dirs.add("/site")
+    mocker.patch("ftp_transfer.ftplib.FTP", side_effect=server.client)
+    mocker.patch.object(ftp_transfer.FtpAddOns, "PATH_CACHE", set())
+    mocker.patch.object(pipeline.soccer1, "COUNTRIES", COUNTRIES)
+    return server
+
+
+def run(**kwargs):
+    return pipeline.run_pipeline("host", "user", "pass", "/site", loader=load, **kwargs)
+
+
+def test_pipeline_renders_and_uploads_like_the_sequential_job(server, tmp_path, monkeypatch):
+    (tmp_path / "sequential").mkdir()
+    monkeypatch.chdir(tmp_path / "sequential")
+    monkeypatch.setattr(pipeline.soccer1, "load_country", load)
+    pipeline.soccer1.update_local_handout()
+    expected = html_checksums(tmp_path / "sequential" / "handout")
+
+    (tmp_path / "pipelined").mkdir()
+    monkeypatch.chdir(tmp_path / "pipelined")
+    report = run()
+    site = tmp_path / "pipelined" / "handout"
+    assert html_checksums(site) == expected
+    assert not report.errors
+    assert len(report.rendered) == len(COUNTRIES) * 5  # country page + 4 teams
+    assert set(report.country_seconds["italy"]) == set(pipeline.STAGES)
+    assert report.stage_seconds["render"] > 0 and report.stage_seconds["upload"] > 0
+    for rel_path in expected:
+        assert server.files[f"/site/{rel_path}"] == (site / rel_path).read_bytes()
+    # Country directories went up while rendering; the final sync only adds the root
+    assert report.uploads["greece"]["uploaded"] > 0
+    assert report.uploads["/"]["uploaded"] == len(
+        [p for p in site.iterdir() if p.is_file() and p.name[0] != "."]
+    )
+
+    # Nothing changed: nothing rendered, nothing but the manifests transferred
+    server.commands.clear()
+    report = run()
+    assert report.rendered == [] and report.uploads["/"]["uploaded"] == 0
+
+
+def test_failing_country_does_not_stop_the_others(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def flaky_load(country):
+        if country == "italy":
+            raise ConnectionError("football-data.co.uk unreachable")
+        return load(country)
+
+    report = pipeline.run_pipeline("host", "user", "pass", "/site", loader=flaky_load, queue_size=1)
+    assert list(report.errors) == ["italy"]
+    assert report.errors["italy"].startswith("fetch: ConnectionError")
+    assert "/site/spain/index.html" in server.files
+    assert not [page for page in report.rendered if page.startswith("italy")]
+    manifest = pipeline.soccer1.load_manifest()
+    assert "greece" in manifest and "italy" not in manifest
+
+
+def test_dry_run_renders_without_connecting(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = run(dry_run=True)
+    assert server.connections == 0 and report.uploads == {}
+    assert (tmp_path / "handout" / "spain" / "index.html").exists()
+    assert len(report.rendered) == len(COUNTRIES) * 5
+
+
+def test_elo_ratings_are_kept_between_runs(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    run(dry_run=True)
+    states = elo.load_ratings("elo_ratings.json")
+    assert set(states) == set(COUNTRIES)
+    expected, _ = elo.EloRatings.replay(FRAMES["greece"])
+    assert states["greece"].ratings == pytest.approx(expected.ratings)
+    assert "<th>Elo</th>" in (tmp_path / "handout" / "greece" / "index.html").read_text()
+
+    # The next run applies no match twice
+    run(dry_run=True)
+    again = elo.load_ratings("elo_ratings.json")["greece"]
+    assert again.matches == states["greece"].matches == FRAMES["greece"]["FTR"].notna().sum()
+    assert again.ratings == states["greece"].ratings
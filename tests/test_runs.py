@@ -0,0 +1,69 @@
+import itertools
+
+import numpy as np
+import pytest
+from synthetic import synthetic_country_df
+
+from sp_soccer_lib import create_team_df_dict, runs
+from sp_soccer_lib.championships import team_stats
+
+
+def brute_force(n, k, p, current=0):
+    """P(longest no-draw run >= k) over every draw/no-draw sequence of n matches."""
+    total = 0.0
+    for sequence in itertools.product([True, False], repeat=n):  # True: draw
+        run = longest = current
+        for draw in sequence:
+            run = 0 if draw else run + 1
+            longest = max(longest, run)
+        if longest >= k:
+            total += np.prod([p if draw else 1 - p for draw in sequence])
+    return total
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    runs.clear_cache()
+    yield
+    runs.clear_cache()
+
+
+@pytest.mark.parametrize(
+    "n, k, p", [(0, 2, 0.3), (6, 1, 0.3), (7, 7, 0.2), (10, 3, 0.3), (12, 5, 0.25), (5, 0, 0.3)]
+)
+def test_longest_run_matches_enumeration(n, k, p):
+    assert runs.longest_run_probability(n, k, p) == pytest.approx(brute_force(n, k, p))
+
+
+def test_vectorized_over_arrays():
+    n, k = np.meshgrid(np.arange(11), np.arange(1, 6))
+    p = np.where(k % 2, 0.3, 0.22)
+    result = runs.longest_run_probability(n, k, p)
+    assert result.shape == n.shape
+    expected = [brute_force(*args) for args in zip(n.ravel(), k.ravel(), p.ravel(), strict=True)]
+    assert result.ravel() == pytest.approx(expected)
+    assert np.all(np.diff(result, axis=1) >= -1e-12)  # more matches, likelier runs
+    # Second call is served from the cached tables
+    assert runs.longest_run_probability(n, k, p) == pytest.approx(result)
+
+
+@pytest.mark.parametrize(
+    "current, remaining, k, p", [(2, 8, 5, 0.3), (6, 4, 5, 0.3), (0, 10, 4, 0.25), (3, 2, 6, 0.3)]
+)
+def test_survival_from_current_streak(current, remaining, k, p):
+    assert runs.streak_survival_probability(current, remaining, k, p) == pytest.approx(
+        brute_force(remaining, k, p, current)
+    )
+
+
+def test_ruin_table():
+    df = synthetic_country_df(n_teams=6, periods=["2425", "2526"], seed=3)
+    stats = team_stats(create_team_df_dict(df))
+    table = runs.ruin_table(stats, spans=[3, 6])
+    assert list(table.index) == list(stats.index)
+    assert list(table.columns) == ["span_3", "span_6"]
+    assert ((table >= 0) & (table <= 1)).all().all()
+    assert (table["span_3"] >= table["span_6"]).all()
+    # A team already on a streak of the span has lost it
+    stats.iloc[0, stats.columns.get_loc("CurrentNoDraw")] = 6
+    assert runs.ruin_table(stats, spans=[3, 6]).iloc[0].tolist() == [1.0, 1.0]
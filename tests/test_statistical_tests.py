@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from synthetic import synthetic_country_df
+
+import statistical_tests as st
+from sp_soccer_lib import create_team_df_dict, no_draw_frequencies
+
+
+@pytest.fixture
+def team_dfs():
+    df = synthetic_country_df(n_teams=6, periods=["2324", "2425", "2526"], seed=11)
+    return create_team_df_dict(df)
+
+
+def team_arrays(team_df):
+    return (
+        (team_df["FTR"] == "D").to_numpy(),
+        (team_df["result"] == "D").to_numpy(),
+        pd.factorize(team_df["period"])[0],
+    )
+
+
+def test_runs_test():
+    runs, z, pvalue = st.runs_test([True, True, False, False, False, True, False, True])
+    # 4 draws and 4 others: 5 runs expected, which is what we have
+    mean = 2 * 4 * 4 / 8 + 1
+    variance = (2 * 4 * 4) * (2 * 4 * 4 - 8) / (8**2 * 7)
+    assert runs == 5
+    assert z == pytest.approx((5 - mean) / np.sqrt(variance))
+    assert pvalue == pytest.approx(1.0)
+    assert np.isnan(st.runs_test([False] * 6)[2])
+
+
+def test_streak_statistic_matches_no_draw_frequencies(team_dfs):
+    for team, team_df in team_dfs.items():
+        expected = np.mean(no_draw_frequencies(None, [team], team_dfs={team: team_df}))
+        assert st.mean_streak_before_draw(*team_arrays(team_df))[0] == pytest.approx(expected)
+
+
+def test_permutations_shuffle_within_seasons(team_dfs):
+    team_df = next(iter(team_dfs.values()))
+    is_draw, _, period = team_arrays(team_df)
+    test = st.StreakPermutationTest(team_arrays(team_df), rng=np.random.default_rng(0))
+    shuffled, _ = test.RunModels(200)
+    assert shuffled.shape == (200, len(is_draw))
+    for code in np.unique(period):
+        in_season = period == code
+        assert (shuffled[:, in_season].sum(axis=1) == is_draw[in_season].sum()).all()
+    assert len({row.tobytes() for row in shuffled}) > 100
+    assert 0 <= test.PValue(500) <= 1
+    assert len(test.test_stats) == 500 and test.test_cdf.Prob(test.MaxTestStat()) == 1
+
+
+def test_geometric_chi_square():
+    rng = np.random.default_rng(3)
+    geometric = rng.geometric(0.28, 2000) - 1
+    assert st.geometric_chi_square(geometric)[1] > 0.01
+    assert st.geometric_chi_square([5] * 200 + [0] * 50)[1] < 1e-6
+    assert np.isnan(st.geometric_chi_square([])[0])
+
+
+def test_league_battery(team_dfs):
+    df = synthetic_country_df(n_teams=6, periods=["2324", "2425", "2526"], seed=11)
+    table = st.league_battery("greece", df=df, iterations=100)
+    assert list(table.index) == list(team_dfs)
+    for column in ("runs_p", "perm_p", "chi2_p"):
+        assert table[column].dropna().between(0, 1).all()
+    pd.testing.assert_frame_equal(table, st.league_battery("greece", df=df, iterations=100))
+    assert not table.equals(st.league_battery("greece", df=df, iterations=100, seed=1))
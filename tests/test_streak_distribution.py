@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from synthetic import synthetic_country_df
+
+from sp_soccer_lib import create_team_df_dict, no_draw_frequencies, streak_distribution
+from sp_soccer_lib.streak_distribution import StreakDistribution
+
+
+def reference_frequencies(team_dfs, teams):
+    """The row-by-row definition: streak before each draw after the first match."""
+    values = []
+    for team in teams:
+        previous = None
+        for row in team_dfs[team].itertuples():
+            if previous is not None and row.result == "D":
+                values.append(previous)
+            previous = row.count_no_draw
+    return values
+
+
+@pytest.fixture
+def df():
+    df = synthetic_country_df(n_teams=8, periods=["2324", "2425", "2526"], seed=5)
+    df.loc[df.index[::11], "FTR"] = np.nan  # unplayed/missing results count as "D"
+    return df
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    streak_distribution.clear_cache()
+    yield
+    streak_distribution.clear_cache()
+
+
+def test_matches_row_by_row_definition(df):
+    team_dfs = create_team_df_dict(df)
+    expected = reference_frequencies(team_dfs, list(team_dfs))
+    assert StreakDistribution.from_frame(df).frequencies() == expected
+    assert StreakDistribution.from_team_dfs(team_dfs).frequencies() == expected
+    assert no_draw_frequencies("greece", team_dfs=team_dfs) == expected
+
+    teams = list(team_dfs)[2:5][::-1]
+    distribution = StreakDistribution.from_frame(df)
+    assert distribution.frequencies(teams + ["Nobody"]) == reference_frequencies(team_dfs, teams)
+    assert distribution.team_values(teams[0]).tolist() == reference_frequencies(team_dfs, teams[:1])
+
+
+def test_histogram(df):
+    distribution = StreakDistribution.from_frame(df)
+    lengths, counts = distribution.histogram()
+    values, expected_counts = np.unique(distribution.values, return_counts=True)
+    assert lengths.tolist() == values.tolist()
+    assert counts.tolist() == expected_counts.tolist()
+    team = distribution.teams[0]
+    _, team_counts = distribution.histogram([team])
+    assert team_counts.sum() == len(distribution.team_values(team))
+    assert StreakDistribution.from_team_dfs({}).histogram()[0].tolist() == []
+
+
+def test_per_team_queries_load_the_country_once(df, mocker):
+    load = mocker.patch("sp_soccer_lib.championships.load_country", return_value=df)
+    team_dfs = create_team_df_dict(df)
+    for team in team_dfs:
+        assert no_draw_frequencies("greece", [team]) == reference_frequencies(team_dfs, [team])
+    load.assert_called_once_with("greece")
+
+    streak_distribution.clear_cache("greece")
+    no_draw_frequencies("greece")
+    assert load.call_count == 2
@@ -0,0 +1,67 @@
+import time
+
+import pandas as pd
+import pytest
+from synthetic import synthetic_country_df
+
+from sp_soccer_lib import create_team_df_dict
+from sp_soccer_lib.championships import team_stats
+from sp_soccer_lib.streak_index import STREAK_FIELDS, StreakIndex
+
+
+def assert_records_match(index, stats):
+    assert index.teams() == sorted(stats.index)
+    for team in stats.index:
+        record = index.team(team)
+        for field in STREAK_FIELDS:
+            expected = stats.loc[team, field]
+            if expected is None or pd.isna(expected):
+                assert record[field] is None or pd.isna(record[field])
+            else:
+                assert record[field] == pytest.approx(expected, abs=1e-9), (team, field)
+
+
+def test_index_matches_team_stats():
+    df = synthetic_country_df(n_teams=8, periods=["2425", "2526"])
+    stats = team_stats(create_team_df_dict(df.copy()))
+    assert_records_match(StreakIndex.from_dataframe(df), stats)
+
+
+def test_incremental_ingest_matches_full_rebuild():
+    df = synthetic_country_df(n_teams=6, periods=["2425", "2526"], seed=3)
+    split = len(df) - 9
+    index = StreakIndex.from_dataframe(df.iloc[:split])
+
+    changed = index.ingest_frame(df)  # refreshed frame: only the new rows apply
+    assert 0 < len(changed) <= 6
+    assert index.ingest_frame(df) == []
+
+    stats = team_stats(create_team_df_dict(df.copy()))
+    assert_records_match(index, stats)
+
+
+def test_previous_period_teams_are_excluded():
+    df = synthetic_country_df(n_teams=4, periods=["2425"])
+    index = StreakIndex.from_dataframe(df, current_period="2526")
+    assert len(index) == 0
+    with pytest.raises(KeyError):
+        index.team("Team 00")
+
+
+def test_streak_endpoints(mocker):
+    import app
+
+    df = synthetic_country_df(n_teams=6, periods=["2425", "2526"])
+    mocker.patch.object(app, "bootstrap_country", return_value=df)
+    mocker.patch.dict(app.STREAK_INDEXES, clear=True)
+    client = app.app.test_client()
+
+    league = client.get("/streaks/greece").get_json()
+    assert sorted(league) == [f"Team {i:02d}" for i in range(6)]
+    assert set(league["Team 00"]) == set(STREAK_FIELDS)
+
+    start = time.perf_counter()
+    record = app.get_streak_index("greece").team("Team 01")
+    assert time.perf_counter() - start < 1e-3
+    assert client.get("/streaks/greece/Team 01").get_json() == {"Team 01": record}
+    assert client.get("/streaks/greece/Nobody").status_code == 400
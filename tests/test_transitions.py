@@ -0,0 +1,89 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+from synthetic import synthetic_country_df
+
+from sp_soccer_lib import create_team_df_dict, transitions
+from sp_soccer_lib.transitions import DrawTransitions
+
+
+def reference_counts(df, team=None):
+    """Row by row: (trials, draws) by the count_no_draw of the team's previous match."""
+    trials, draws = Counter(), Counter()
+    for name, team_df in create_team_df_dict(df).items():
+        if team not in (None, name):
+            continue
+        previous = None
+        for row in team_df.itertuples():
+            if previous is not None and previous.period == row.period and isinstance(row.FTR, str):
+                trials[previous.count_no_draw] += 1
+                draws[previous.count_no_draw] += row.FTR == "D"
+            previous = row
+    return trials, draws
+
+
+@pytest.fixture
+def df():
+    df = synthetic_country_df(n_teams=8, periods=["2324", "2425", "2526"], seed=7)
+    df.iloc[::17, df.columns.get_loc("FTR")] = np.nan  # unplayed: extends the streak, no trial
+    return df
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    transitions.clear_cache()
+    yield
+    transitions.clear_cache()
+
+
+def test_counts_match_row_by_row(df):
+    fitted = DrawTransitions.from_frame(df)
+    for team in (None, fitted.teams[3]):
+        trials, draws = reference_counts(df, team)
+        estimate = fitted.estimate(team=team)
+        assert estimate.index.tolist() == sorted(trials)
+        assert estimate["trials"].tolist() == [trials[k] for k in estimate.index]
+        assert estimate["draws"].tolist() == [draws[k] for k in estimate.index]
+
+    table = fitted.to_frame()
+    assert table["trials"].sum() == fitted.trials.sum()
+    period = table.groupby("period")["trials"].sum()
+    assert period["2425"] == fitted.estimate(period="2425")["trials"].sum()
+
+
+def test_snapshot_cache_and_leagues(df):
+    first = transitions.transitions_for(df)
+    assert transitions.transitions_for(df.copy()) is first
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc("FTR")] = "D" if df["FTR"].iloc[-1] != "D" else "H"
+    assert transitions.transitions_for(changed) is not first
+
+    italy = synthetic_country_df(n_teams=6, periods=["2425", "2526"], seed=8)
+    table = transitions.league_transitions({"greece": df, "italy": italy})
+    assert set(table["league"]) == {"greece", "italy"}
+    pooled = table.groupby("streak")[["trials", "draws"]].sum()
+    expected = first.trials.sum() + DrawTransitions.from_frame(italy).trials.sum()
+    assert pooled["trials"].sum() == expected
+
+
+def test_tests_detect_draws_due_after_long_streaks():
+    # Twenty team-seasons of five no-draws and a draw, repeated
+    is_draw = np.tile(np.array([False] * 5 + [True]), 80)
+    segment = np.repeat(np.arange(20), 24)
+    dependent = DrawTransitions([], [], np.zeros((0, 0, 0)), np.zeros((0, 0, 0)))
+    dependent.matches = (is_draw, segment)
+    observed, pvalue = dependent.permutation_test(
+        long_streak=5, iterations=200, rng=np.random.default_rng(1)
+    )
+    assert observed == pytest.approx(1.0)
+    assert pvalue == pytest.approx(1 / 201)
+
+
+def test_tests_on_independent_results(df):
+    fitted = DrawTransitions.from_frame(df)
+    observed, pvalue = fitted.permutation_test(iterations=300, rng=np.random.default_rng(2))
+    assert -1 <= observed <= 1 and 0 < pvalue <= 1
+    assert 0 <= fitted.exact_test(long_streak=3) <= 1
+    statistic, pvalue = fitted.homogeneity_test(max_streak=4)
+    assert statistic >= 0 and 0 <= pvalue <= 1
@@ -1,38 +1,70 @@
 import os
+import sys
 
 from dotenv import load_dotenv
 from loguru import logger
 
 import ftp_transfer
+import pipeline
 import soccer1
+from sp_soccer_lib import instrumentation
 
 load_dotenv()
 
 
-def update_and_upload():
-    soccer1.update_local_handout()
+def update_and_upload(dry_run=False):
+    instrumentation.reset()
     server = os.environ.get("FTP_SERVER", "spitoglou.byethost9.com")
     username = os.environ.get("FTP_USERNAME", "spitoglo")
     remote_dir = os.environ.get("FTP_REMOTE_DIR", "/soccerstats.csl.gr")
     encrypt = False
     monitor = False
     walk = True
+    delta = True
+    pipelined = True
     mode = "soccer_update"
 
     local_dir = "handout"
 
-    p = os.environ["FTP_PASSWORD"]
+    p = os.environ.get("FTP_PASSWORD") if dry_run else os.environ["FTP_PASSWORD"]
+    sync_options = {
+        "mode": mode,
+        "connections": 4,
+        "extract_url": os.environ.get("FTP_EXTRACT_URL"),
+        "extract_token": os.environ.get("FTP_EXTRACT_TOKEN"),
+    }
 
     try:
+        if pipelined:
+            # Each country uploads while the next one renders
+            pipeline.run_pipeline(
+                server,
+                username,
+                p,
+                remote_dir,
+                dry_run=dry_run,
+                workers=os.cpu_count(),
+                **sync_options,
+            )
+            return
+        soccer1.update_local_handout(workers=os.cpu_count())
+        if dry_run:
+            return
         if monitor:
-            ftp_transfer.monitor_and_ftp(server, username, p, local_dir, remote_dir, encrypt, walk)
+            ftp_transfer.monitor_and_ftp(
+                server, username, p, local_dir, remote_dir, encrypt, walk, mode
+            )
+        elif delta:
+            ftp_transfer.sync_all(server, username, p, local_dir, remote_dir, walk, **sync_options)
         else:
             ftp_transfer.upload_all(
                 server, username, p, local_dir, remote_dir, [], encrypt, walk, mode
             )
     except KeyboardInterrupt:
         logger.warning("Exiting...")
+    finally:
+        instrumentation.write_report(os.environ.get("RUN_REPORT", "run_report.json"))
 
 
 if __name__ == "__main__":
-    update_and_upload()
+    update_and_upload(dry_run="--dry-run" in sys.argv)